@@ -39,6 +39,11 @@ class Settings:
         "minimize_to_tray": False,
         "max_history": 1000,
         "retention_days": 30,
+        "max_storage_mb": 0,
+        "type_storage_mb": {},
+        "compression_codec": "auto",     # auto / zstd / zlib / none
+        "compression_level": 0,          # 0 = 编码默认级别
+        "compression_threshold": 32,     # 小于该字节数的内容不压缩
         "display_limit": 100,
         "auto_save_interval": 60,
         "hotkeys": DEFAULT_HOTKEYS.copy(),
@@ -56,7 +61,8 @@ class Settings:
             "max_tokens": 100,
             "temperature": 0.3,
             "trigger_delay": 150,
-            "max_context_items": 10
+            "max_context_items": 10,
+            "offline_prediction": False     # 未配置 AI 时也使用本地模型预测
         }
     }
     
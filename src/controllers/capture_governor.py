@@ -0,0 +1,160 @@
+"""
+Capture Governor - Throttle clipboard captures before they reach the history.
+
+Automation tools and some IDEs rewrite the clipboard many times per second.
+The governor sits between ClipboardController and ClipboardService:
+
+* Coalescing: a change from a source that was captured less than
+  ``quiet_ms`` ago is held back; further changes from the same source replace
+  it, and only the final value is committed once the source has been quiet
+  for ``quiet_ms`` (or after ``max_delay_ms`` at the latest).
+* Rate limiting: every commit takes a token from a bucket refilled at
+  ``rate`` tokens per second (up to ``burst``); without a token the change
+  stays pending until one is available.
+* At most ``max_pending`` sources are held back; beyond that the oldest
+  pending change is dropped.
+
+Counters for offered, committed, coalesced and dropped changes are available
+through ``stats()``.
+"""
+
+import time
+from typing import Callable, Dict
+
+from PyQt6.QtCore import QObject, QTimer
+
+from utils.logger import logger
+
+_QUIET_MS = 400
+_MAX_DELAY_MS = 2000
+_RATE_PER_SEC = 5.0
+_BURST = 10
+_MAX_PENDING = 8
+
+
+class _Pending:
+    __slots__ = ("snapshot", "first_seen", "deadline")
+
+    def __init__(self, snapshot, now, deadline):
+        self.snapshot = snapshot
+        self.first_seen = now
+        self.deadline = deadline
+
+
+class CaptureGovernor(QObject):
+    """Coalesces clipboard bursts per source and rate-limits commits."""
+
+    def __init__(self, on_commit: Callable[[dict], bool],
+                 quiet_ms: int = _QUIET_MS, max_delay_ms: int = _MAX_DELAY_MS,
+                 rate: float = _RATE_PER_SEC, burst: int = _BURST,
+                 max_pending: int = _MAX_PENDING, parent=None):
+        super().__init__(parent)
+        self._on_commit = on_commit
+        self._quiet = quiet_ms / 1000.0
+        self._max_delay = max_delay_ms / 1000.0
+        self._rate = max(rate, 0.001)
+        self._burst = max(burst, 1)
+        self._max_pending = max(max_pending, 1)
+
+        self._tokens = float(self._burst)
+        self._refilled_at = time.monotonic()
+        self._last_commit: Dict[object, float] = {}
+        self._pending: Dict[object, _Pending] = {}
+        self._counters = {"offered": 0, "committed": 0, "coalesced": 0, "dropped": 0}
+
+        self._timer = QTimer(self)
+        self._timer.setSingleShot(True)
+        self._timer.timeout.connect(self._flush_due)
+
+    def offer(self, source_key, snapshot: dict):
+        """Hand a new clipboard snapshot to the governor."""
+        now = time.monotonic()
+        pending = self._pending.get(source_key)
+        if pending is not None:
+            if pending.snapshot["signature"] == snapshot["signature"]:
+                return  # the same change seen again (e.g. by the fallback poll)
+            self._counters["offered"] += 1
+            self._counters["coalesced"] += 1
+            pending.snapshot = snapshot
+            pending.deadline = min(now + self._quiet, pending.first_seen + self._max_delay)
+            self._schedule()
+            return
+
+        self._counters["offered"] += 1
+        recent = now - self._last_commit.get(source_key, float("-inf")) < self._quiet
+        if not recent and not self._pending and self._take_token(now):
+            self._commit(source_key, snapshot, now)
+            return
+
+        if len(self._pending) >= self._max_pending:
+            oldest = min(self._pending, key=lambda key: self._pending[key].first_seen)
+            del self._pending[oldest]
+            self._counters["dropped"] += 1
+            logger.debug("Capture governor dropped a pending clipboard change")
+        deadline = now + self._quiet if recent else now
+        self._pending[source_key] = _Pending(snapshot, now, deadline)
+        self._schedule()
+
+    def has_pending(self) -> bool:
+        return bool(self._pending)
+
+    def cancel(self, source_key) -> bool:
+        """Discard the pending change of a source (the clipboard went back to
+        the value that was already captured)."""
+        if self._pending.pop(source_key, None) is None:
+            return False
+        self._counters["coalesced"] += 1
+        self._schedule()
+        return True
+
+    def stats(self) -> dict:
+        """Return a copy of the capture counters."""
+        stats = dict(self._counters)
+        stats["pending"] = len(self._pending)
+        return stats
+
+    def _take_token(self, now: float) -> bool:
+        self._tokens = min(self._burst, self._tokens + (now - self._refilled_at) * self._rate)
+        self._refilled_at = now
+        if self._tokens >= 1.0:
+            self._tokens -= 1.0
+            return True
+        return False
+
+    def _commit(self, source_key, snapshot: dict, now: float):
+        self._last_commit[source_key] = now
+        # Forget sources that have been idle long enough to no longer matter
+        if len(self._last_commit) > 64:
+            cutoff = now - self._quiet
+            self._last_commit = {key: ts for key, ts in self._last_commit.items() if ts >= cutoff}
+        try:
+            if self._on_commit(snapshot):
+                self._counters["committed"] += 1
+        except Exception as e:
+            logger.error(f"Error committing clipboard change: {e}")
+
+    def _flush_due(self):
+        """Commit every pending change whose deadline has passed, oldest first."""
+        now = time.monotonic()
+        due = sorted(
+            (key for key, pending in self._pending.items() if pending.deadline <= now),
+            key=lambda key: self._pending[key].first_seen,
+        )
+        for key in due:
+            if not self._take_token(now):
+                break
+            pending = self._pending.pop(key)
+            self._commit(key, pending.snapshot, now)
+        self._schedule()
+
+    def _schedule(self):
+        if not self._pending:
+            self._timer.stop()
+            return
+        now = time.monotonic()
+        next_deadline = min(pending.deadline for pending in self._pending.values())
+        wait = max(next_deadline - now, 0.0)
+        tokens = min(self._burst, self._tokens + (now - self._refilled_at) * self._rate)
+        if tokens < 1.0:
+            wait = max(wait, (1.0 - tokens) / self._rate)
+        self._timer.start(max(int(wait * 1000), 1))
@@ -1,18 +1,20 @@
-import base64
 import ctypes
 import ctypes.wintypes as wt
+import hashlib
 import platform
+from typing import Optional
 
-from PyQt6.QtCore import QByteArray, QBuffer, QObject, Qt, QTimer, QUrl, pyqtSignal
+from PyQt6.QtCore import QObject, QTimer, QUrl, pyqtSignal
 from PyQt6.QtGui import QClipboard, QImage
-from PyQt6.QtWidgets import QApplication
 
+from controllers.capture_governor import CaptureGovernor
 from models.clipboard_item import ClipboardItem, ContentType
 from services.clipboard_service import ClipboardService
 from utils.logger import logger
 from utils.source_tracker import SourceTracker
 
 _IS_WINDOWS = platform.system() == "Windows"
+_IS_MACOS = platform.system() == "Darwin"
 if _IS_WINDOWS:
     _user32 = ctypes.WinDLL("user32", use_last_error=True)
     _kernel32 = ctypes.WinDLL("kernel32", use_last_error=True)
@@ -30,6 +32,8 @@ if _IS_WINDOWS:
     _user32.GetClipboardSequenceNumber.restype = wt.DWORD
     _user32.RegisterClipboardFormatW.argtypes = [wt.LPCWSTR]
     _user32.RegisterClipboardFormatW.restype = wt.UINT
+    _user32.GetPriorityClipboardFormat.argtypes = [ctypes.POINTER(wt.UINT), ctypes.c_int]
+    _user32.GetPriorityClipboardFormat.restype = ctypes.c_int
 
     _kernel32.GlobalLock.argtypes = [wt.HGLOBAL]
     _kernel32.GlobalLock.restype = wt.LPVOID
@@ -52,104 +56,224 @@ else:
     _CF_HDROP = 0
     _CF_HTML = 0
 
+# macOS exposes a cheap pasteboard change counter through AppKit (pyobjc).
+NSPasteboard = None
+if _IS_MACOS:
+    try:
+        from AppKit import NSPasteboard
+    except ImportError:
+        NSPasteboard = None
+
+# Fallback polling: start fast after a change, back off exponentially while idle.
+_POLL_MIN_MS = 350
+_POLL_MAX_MS = 5000
+_DEBOUNCE_MS = 120
+
+# Image change detection hashes this many evenly spaced spans of the pixel data.
+_IMAGE_SAMPLES = 1024
+_IMAGE_SAMPLE_BYTES = 64
+
+
+def _fingerprint(kind, *parts):
+    """Hash a clipboard payload into a short dedup key.
+
+    Every part is length-prefixed so that ("ab", "c") and ("a", "bc") differ;
+    parts may be str or any buffer (bytes, memoryview, image bits).
+    """
+    digest = hashlib.blake2b(kind.encode("utf-8"), digest_size=16)
+    for part in parts:
+        if isinstance(part, str):
+            part = part.encode("utf-8", errors="surrogatepass")
+        view = memoryview(part)
+        digest.update(view.nbytes.to_bytes(8, "little"))
+        digest.update(view)
+    return f"{kind}:{digest.hexdigest()}"
+
+
+def _image_fingerprint(image):
+    """Fingerprint an image from its geometry and evenly spaced pixel samples.
+
+    Hashing every byte of a large screenshot costs milliseconds on the GUI
+    thread, on every poll tick while it stays on the clipboard. This key only
+    detects clipboard changes: the capture pipeline hashes the full encoded
+    image in its worker, and that hash is what deduplicates history rows.
+    """
+    total = image.sizeInBytes()
+    bits = image.constBits()
+    bits.setsize(total)
+    view = memoryview(bits)
+    if total > _IMAGE_SAMPLES * _IMAGE_SAMPLE_BYTES:
+        step = total // _IMAGE_SAMPLES
+        offsets = [i * step for i in range(_IMAGE_SAMPLES)] + [total - _IMAGE_SAMPLE_BYTES]
+        view = b"".join(view[offset:offset + _IMAGE_SAMPLE_BYTES] for offset in offsets)
+    size = f"{image.width()}x{image.height()}:{image.format().value}:{image.bytesPerLine()}"
+    return _fingerprint("image", size, view)
+
 
 class ClipboardController(QObject):
     """Clipboard monitor and copy helper."""
 
     history_updated = pyqtSignal()
     item_added = pyqtSignal(object)
+    items_removed = pyqtSignal(list)
+    favorite_changed = pyqtSignal(str, bool)
+    page_loaded = pyqtSignal(int, list, object)
 
     def __init__(self, clipboard: QClipboard):
         super().__init__()
         self.clipboard = clipboard
         self.service = ClipboardService()
-        self._last_clipboard_data = None
-        self._last_clipboard_sequence = self._get_clipboard_sequence_number()
+        self._last_signature = None
+        self._last_change_token = self._get_change_token()
+        # (change token, snapshot): one clipboard read per change, shared by
+        # polling, dedup, processing and source tracking
+        self._snapshot_cache = None
+
+        # Coalesces clipboard storms and rate-limits what reaches the history
+        self._governor = CaptureGovernor(self._commit_snapshot, parent=self)
 
         self._debounce_timer = QTimer(self)
         self._debounce_timer.setSingleShot(True)
         self._debounce_timer.timeout.connect(self._process_clipboard_change)
 
-        # Some Windows apps update clipboard formats lazily. Poll as a fallback.
+        # dataChanged is the primary signal. Some Windows apps update clipboard
+        # formats lazily, so poll as a fallback with an adaptive interval.
+        self._poll_interval = _POLL_MIN_MS
         self._poll_timer = QTimer(self)
         self._poll_timer.timeout.connect(self._poll_clipboard)
-        self._poll_timer.start(350)
+        self._poll_timer.start(self._poll_interval)
 
         self.clipboard.dataChanged.connect(self._on_clipboard_changed)
 
         self.service.item_added.connect(self.item_added.emit)
         self.service.history_changed.connect(self.history_updated.emit)
+        self.service.items_removed.connect(self.items_removed.emit)
+        self.service.favorite_changed.connect(self.favorite_changed.emit)
+        self.service.page_loaded.connect(self.page_loaded.emit)
         self.history_updated.emit()
 
     def _on_clipboard_changed(self):
         """Process clipboard changes with debounce."""
+        self._reset_poll_interval()
         self._debounce_timer.stop()
-        self._debounce_timer.start(120)
+        self._debounce_timer.start(_DEBOUNCE_MS)
 
     def _poll_clipboard(self):
-        """Fallback for apps that do not emit a reliable clipboard notification."""
-        sequence = self._get_clipboard_sequence_number()
-        if sequence and sequence == self._last_clipboard_sequence:
+        """Fallback for apps that do not emit a reliable clipboard notification.
+
+        Compares a cheap change token first (Windows sequence number, macOS
+        changeCount) and only reads the clipboard payload when no token is
+        available. The interval doubles after every idle tick.
+        """
+        token = self._get_change_token()
+        if token is not None:
+            if token == self._last_change_token:
+                self._back_off_poll()
+                return
+            self._last_change_token = token
+            self._on_clipboard_changed()
             return
 
         signature = self._build_clipboard_signature()
-        if signature and signature != self._last_clipboard_data:
-            self._debounce_timer.stop()
-            self._debounce_timer.start(120)
+        if signature and signature != self._last_signature:
+            self._on_clipboard_changed()
+        else:
+            self._back_off_poll()
+
+    def _reset_poll_interval(self):
+        if self._poll_interval != _POLL_MIN_MS:
+            self._poll_interval = _POLL_MIN_MS
+            self._poll_timer.start(self._poll_interval)
+
+    def _back_off_poll(self):
+        interval = min(self._poll_interval * 2, _POLL_MAX_MS)
+        if interval != self._poll_interval:
+            self._poll_interval = interval
+            self._poll_timer.start(self._poll_interval)
+
+    def _get_change_token(self):
+        """Return a cheap clipboard change counter, or None if the platform has none."""
+        if _IS_WINDOWS:
+            return self._get_clipboard_sequence_number() or None
+        if NSPasteboard is not None:
+            try:
+                return int(NSPasteboard.generalPasteboard().changeCount())
+            except Exception:
+                return None
+        return None
 
     def _process_clipboard_change(self):
-        """Read clipboard content and add it to history."""
+        """Read clipboard content once and add it to history."""
         try:
-            native_snapshot = self._get_windows_clipboard_snapshot()
-            if native_snapshot:
-                self._process_native_snapshot(native_snapshot)
-                self._last_clipboard_sequence = self._get_clipboard_sequence_number()
+            snapshot = self._read_clipboard_snapshot()
+            self._last_change_token = self._get_change_token()
+            if not snapshot:
                 return
-
-            mime_data = self.clipboard.mimeData()
-            if mime_data is None:
-                self._last_clipboard_sequence = self._get_clipboard_sequence_number()
+            if snapshot["signature"] == self._last_signature and not snapshot.get("sampled"):
+                # Back to the captured value: a held-back burst value is stale
+                if self._governor.has_pending():
+                    self._governor.cancel(self._source_key(snapshot))
                 return
 
-            signature = self._build_clipboard_signature(mime_data)
-            if not signature or signature == self._last_clipboard_data:
-                self._last_clipboard_sequence = self._get_clipboard_sequence_number()
-                return
-
-            html_content = mime_data.html() if mime_data.hasHtml() else None
-            source_info = SourceTracker.track_source(html_content)
-            metadata = {"source": source_info.to_dict()}
-
-            added = False
-            if mime_data.hasImage():
-                added = self._handle_image_clipboard(metadata)
-            elif mime_data.hasUrls():
-                added = self._handle_file_clipboard(mime_data.urls(), metadata)
-            elif mime_data.hasHtml():
-                html = mime_data.html()
-                text = mime_data.text() or html
-                metadata["html"] = html
-                added = self.service.add_item(
-                    content=text,
-                    content_type=ContentType.HTML,
-                    metadata=metadata,
-                )
-            else:
-                text = mime_data.text()
-                if text and text.strip():
-                    added = self.service.add_item(
-                        text,
-                        ContentType.TEXT,
-                        metadata=metadata,
-                    )
-
-            if added:
-                self._last_clipboard_data = signature
-                self._last_clipboard_sequence = self._get_clipboard_sequence_number()
+            self._governor.offer(self._source_key(snapshot), snapshot)
 
         except Exception as e:
             logger.error(f"Error processing clipboard change: {e}")
 
+    def _commit_snapshot(self, snapshot):
+        """Add a snapshot released by the capture governor to the history.
+
+        A sampled image signature that matches the last one may still be a
+        different image: it is passed on, and the capture pipeline drops it
+        only if the full pixel hash matches the previous image too.
+        """
+        unchanged = snapshot["signature"] == self._last_signature
+        if unchanged and not snapshot.get("sampled"):
+            return False
+
+        # Record the signature even if the service rejects the snapshot
+        # (blank text, a duplicate in another format): otherwise polling sees
+        # the same clipboard as a new change on every tick and never backs off.
+        self._last_signature = snapshot["signature"]
+        if snapshot.get("native"):
+            return self._process_native_snapshot(snapshot)
+        return self._process_qt_snapshot(snapshot, unchanged)
+
+    def _source_key(self, snapshot):
+        """Identify the application a change came from, for burst coalescing."""
+        source = self._snapshot_source(snapshot)
+        return source.get("app_name") or source.get("domain") or source.get("title") or ""
+
+    def capture_stats(self):
+        """Counters of offered, committed, coalesced and dropped clipboard changes."""
+        return self._governor.stats()
+
+    def _process_qt_snapshot(self, snapshot, unchanged=False):
+        """Add a snapshot read through QClipboard."""
+        snapshot_type = snapshot["type"]
+        metadata = {"source": self._snapshot_source(snapshot)}
+
+        if snapshot_type == "image":
+            return self._handle_image_clipboard(snapshot["content"], metadata,
+                                                skip_if_unchanged=unchanged)
+        if snapshot_type == "files":
+            return self._handle_file_clipboard(snapshot["content"], metadata)
+        if snapshot_type == "html":
+            metadata["html"] = snapshot["html"]
+            return self.service.add_item(
+                content=snapshot.get("text") or snapshot["html"],
+                content_type=ContentType.HTML,
+                metadata=metadata,
+            )
+        text = snapshot["content"]
+        if text and text.strip():
+            return self.service.add_item(
+                text,
+                ContentType.TEXT,
+                metadata=metadata,
+            )
+        return False
+
     def _process_native_snapshot(self, snapshot):
         """Use the Windows clipboard API for apps that Qt misses."""
         snapshot_type = snapshot.get("type")
@@ -157,13 +281,8 @@ class ClipboardController(QObject):
         if not content:
             return False
 
-        signature = f"{snapshot_type}:{content}"
-        if signature == self._last_clipboard_data:
-            return False
-
-        source_info = SourceTracker.get_active_window_info()
         metadata = {
-            "source": source_info.to_dict(),
+            "source": self._snapshot_source(snapshot),
             "native_clipboard": True,
         }
 
@@ -192,42 +311,79 @@ class ClipboardController(QObject):
                     metadata=metadata,
                 )
 
-        if added:
-            self._last_clipboard_data = signature
         return added
 
-    def _build_clipboard_signature(self, mime_data=None):
-        """Create a lightweight fingerprint for duplicate suppression."""
-        native_snapshot = self._get_windows_clipboard_snapshot()
-        if native_snapshot and native_snapshot.get("content"):
-            content = native_snapshot["content"]
-            if isinstance(content, list):
-                content = "|".join(content)
-            return f"{native_snapshot['type']}:{content}"
+    def _build_clipboard_signature(self):
+        """Fingerprint the current clipboard content for duplicate suppression."""
+        snapshot = self._read_clipboard_snapshot()
+        return snapshot["signature"] if snapshot else None
 
-        if mime_data is None:
-            mime_data = self.clipboard.mimeData()
+    def _snapshot_source(self, snapshot):
+        """Resolve the source of a snapshot once and keep it on the snapshot."""
+        if "source" not in snapshot:
+            if snapshot.get("native"):
+                source_info = SourceTracker.get_active_window_info()
+            else:
+                source_info = SourceTracker.track_source(snapshot.get("html"))
+            snapshot["source"] = source_info.to_dict()
+        return snapshot["source"]
+
+    def _read_clipboard_snapshot(self):
+        """Return the snapshot for the current clipboard change.
+
+        When the platform has a change token the snapshot is cached per token,
+        so repeated calls for the same change do not touch the clipboard again.
+        """
+        token = self._get_change_token()
+        if token is not None and self._snapshot_cache and self._snapshot_cache[0] == token:
+            return self._snapshot_cache[1]
+
+        snapshot = self._read_clipboard_payload()
+        self._snapshot_cache = (token, snapshot) if token is not None else None
+        return snapshot
+
+    def _read_clipboard_payload(self):
+        """Read the clipboard once: the native Win32 snapshot, else QClipboard."""
+        snapshot = self._get_windows_clipboard_snapshot()
+        if snapshot and snapshot.get("content"):
+            snapshot["native"] = True
+            content = snapshot["content"]
+            if snapshot["type"] == "files":
+                snapshot["signature"] = _fingerprint("files", *content)
+            else:
+                snapshot["signature"] = _fingerprint(snapshot["type"], content)
+            return snapshot
+        return self._read_qt_snapshot()
+
+    def _read_qt_snapshot(self):
+        """Read only the highest-priority format: image, local files, HTML, text."""
+        mime_data = self.clipboard.mimeData()
         if mime_data is None:
             return None
 
         if mime_data.hasImage():
             image = self.clipboard.image()
             if not image.isNull():
-                return f"image:{image.width()}x{image.height()}:{image.cacheKey()}"
+                return {"type": "image", "content": image, "sampled": True,
+                        "signature": _image_fingerprint(image)}
 
         if mime_data.hasUrls():
-            urls = [url.toString() for url in mime_data.urls()]
-            if urls:
-                return "urls:" + "|".join(urls)
+            files = [url.toLocalFile() for url in mime_data.urls() if url.isLocalFile()]
+            if files:
+                return {"type": "files", "content": files,
+                        "signature": _fingerprint("files", *files)}
 
         if mime_data.hasHtml():
             html = mime_data.html()
             if html:
-                return "html:" + html
+                text = mime_data.text()
+                return {"type": "html", "content": html, "html": html, "text": text,
+                        "signature": _fingerprint("html", html)}
 
         text = mime_data.text()
         if text:
-            return "text:" + text
+            return {"type": "text", "content": text,
+                    "signature": _fingerprint("text", text)}
 
         return None
 
@@ -241,25 +397,36 @@ class ClipboardController(QObject):
             return 0
 
     def _get_windows_clipboard_snapshot(self):
-        """Read clipboard content directly via Win32 for better IDE compatibility."""
+        """Read clipboard content directly via Win32 for better IDE compatibility.
+
+        GetPriorityClipboardFormat picks the best available format without
+        opening the clipboard; only that format (and lower-priority ones if it
+        turns out empty) is read.
+        """
         if not _IS_WINDOWS or not _user32:
             return None
 
+        readers = [
+            (_CF_HDROP, self._read_windows_files_snapshot),
+            (_CF_HTML, self._read_windows_html),
+            (_CF_UNICODETEXT, self._read_windows_text_snapshot),
+        ]
+        readers = [(fmt, reader) for fmt, reader in readers if fmt]
+        priority = (wt.UINT * len(readers))(*(fmt for fmt, _ in readers))
+        best = _user32.GetPriorityClipboardFormat(priority, len(readers))
+        if best <= 0:
+            # Empty clipboard, or only formats Qt handles (e.g. bitmaps)
+            return None
+        start = next(i for i, (fmt, _) in enumerate(readers) if fmt == best)
+
         if not _user32.OpenClipboard(None):
             return None
 
         try:
-            file_snapshot = self._read_windows_files()
-            if file_snapshot:
-                return {"type": "files", "content": file_snapshot}
-
-            html_snapshot = self._read_windows_html()
-            if html_snapshot:
-                return html_snapshot
-
-            text_snapshot = self._read_windows_unicode_text()
-            if text_snapshot:
-                return {"type": "text", "content": text_snapshot}
+            for _, reader in readers[start:]:
+                snapshot = reader()
+                if snapshot:
+                    return snapshot
         except Exception as e:
             logger.debug(f"Failed to read Windows clipboard directly: {e}")
         finally:
@@ -267,6 +434,14 @@ class ClipboardController(QObject):
 
         return None
 
+    def _read_windows_files_snapshot(self):
+        files = self._read_windows_files()
+        return {"type": "files", "content": files} if files else None
+
+    def _read_windows_text_snapshot(self):
+        text = self._read_windows_unicode_text()
+        return {"type": "text", "content": text} if text else None
+
     def _read_windows_unicode_text(self):
         if not _user32.IsClipboardFormatAvailable(_CF_UNICODETEXT):
             return None
@@ -346,49 +521,20 @@ class ClipboardController(QObject):
                 return html
         return html
 
-    def _handle_image_clipboard(self, metadata=None):
-        """Store clipboard image as base64."""
+    def _handle_image_clipboard(self, image, metadata=None, skip_if_unchanged=False):
+        """Queue the already grabbed image; scaling and encoding run in the background."""
         try:
-            image = self.clipboard.image()
             if image.isNull():
                 return False
 
-            buffer_image = QApplication.clipboard().pixmap().toImage()
-            scaled_image = buffer_image.scaled(
-                800,
-                600,
-                Qt.AspectRatioMode.KeepAspectRatio,
-                Qt.TransformationMode.SmoothTransformation,
-            )
-
-            byte_array = QByteArray()
-            buffer_stream = QBuffer(byte_array)
-            buffer_stream.open(QBuffer.OpenModeFlag.WriteOnly)
-            scaled_image.save(buffer_stream, "JPEG", 85)
-
-            base64_data = base64.b64encode(byte_array.data()).decode("utf-8")
-
-            item_metadata = {
-                "width": image.width(),
-                "height": image.height(),
-                "format": "jpeg",
-            }
-            if metadata:
-                item_metadata.update(metadata)
-
-            return self.service.add_item(
-                content=f"data:image/jpeg;base64,{base64_data}",
-                content_type=ContentType.IMAGE,
-                metadata=item_metadata,
-            )
+            return self.service.add_image(image, metadata, skip_if_unchanged)
         except Exception as e:
             logger.error(f"Error handling image clipboard content: {e}")
             return False
 
-    def _handle_file_clipboard(self, urls, metadata=None):
+    def _handle_file_clipboard(self, file_paths, metadata=None):
         """Store copied local file paths."""
         try:
-            file_paths = [url.toLocalFile() for url in urls if url.isLocalFile()]
             if not file_paths:
                 return False
 
@@ -408,8 +554,8 @@ class ClipboardController(QObject):
     def copy_text(self, text: str) -> None:
         try:
             self.clipboard.setText(text)
-            self._last_clipboard_data = self._build_clipboard_signature()
-            self._last_clipboard_sequence = self._get_clipboard_sequence_number()
+            self._last_signature = self._build_clipboard_signature()
+            self._last_change_token = self._get_change_token()
         except Exception as e:
             logger.error(f"Error copying text: {e}")
 
@@ -417,17 +563,14 @@ class ClipboardController(QObject):
         try:
             if item.content_type == ContentType.IMAGE:
                 try:
-                    if item.content.startswith("data:image"):
-                        base64_data = item.content.split(",", 1)[1]
-                        image_data = base64.b64decode(base64_data)
-                        image = QImage()
-                        image.loadFromData(image_data)
+                    image_data = item.data if item.data is not None else self.service.get_blob(item.content_hash)
+                    image = QImage()
+                    if image_data and image.loadFromData(image_data):
                         self.clipboard.setImage(image)
                     else:
-                        self.clipboard.setText(item.content)
+                        logger.warning(f"Image data missing for {item.content_hash}")
                 except Exception as e:
                     logger.error(f"Error copying image: {e}")
-                    self.clipboard.setText(item.content)
             elif item.content_type == ContentType.FILE:
                 from PyQt6.QtCore import QMimeData
 
@@ -438,8 +581,13 @@ class ClipboardController(QObject):
             else:
                 self.clipboard.setText(item.content)
 
-            self._last_clipboard_data = self._build_clipboard_signature()
-            self._last_clipboard_sequence = self._get_clipboard_sequence_number()
+            snapshot = self._read_clipboard_snapshot()
+            self._last_signature = snapshot["signature"] if snapshot else None
+            self._last_change_token = self._get_change_token()
+            if snapshot and snapshot["type"] == "image":
+                # The sampled signature cannot tell images apart; let the
+                # pipeline recognise this exact image when dataChanged arrives
+                self.service.remember_image(snapshot["content"])
         except Exception as e:
             logger.error(f"Error copying item: {e}")
 
@@ -464,8 +612,19 @@ class ClipboardController(QObject):
     def get_history(self, limit: int = 100, offset: int = 0, search_text: str = None, favorites_only: bool = False):
         return self.service.get_history(limit, offset, search_text, favorites_only)
 
-    def get_count(self) -> int:
-        return self.service.get_count()
+    def get_history_page(self, limit: int = 100, after=None, search_text: str = None, favorites_only: bool = False):
+        return self.service.get_page(limit, after, search_text, favorites_only)
+
+    def get_item(self, content_hash: str):
+        return self.service.get_item(content_hash)
+
+    def request_history_page(self, token: int, limit: int = 100, after=None,
+                             search_text: str = None, favorites_only: bool = False):
+        self.service.request_page(token, limit, after, search_text, favorites_only)
+
+    def get_count(self, content_type: Optional[ContentType] = None,
+                  favorites_only: bool = False) -> int:
+        return self.service.get_count(content_type, favorites_only)
 
     def export_history(self, file_path: str) -> bool:
         try:
@@ -481,8 +640,14 @@ class ClipboardController(QObject):
             logger.error(f"Error importing history: {e}")
             return False
 
-    def update_settings(self, max_history: int = None, retention_days: int = None):
+    def get_stored_bytes(self) -> int:
+        return self.service.get_stored_bytes()
+
+    def update_settings(self, max_history: int = None, retention_days: int = None,
+                        max_storage_mb: int = None):
         if max_history is not None:
             self.service.set_max_history(max_history)
+        if max_storage_mb is not None:
+            self.service.set_storage_budget(max_storage_mb)
         if retention_days is not None:
             self.service.set_retention_days(retention_days)
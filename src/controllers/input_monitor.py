@@ -50,6 +50,15 @@ class InputMonitor(QObject):
     typing_changed = pyqtSignal(str)
     word_completed = pyqtSignal(str)
 
+    # Individual buffer edits, for listeners that track the line incrementally;
+    # emitted before typing_changed
+    char_appended = pyqtSignal(str)
+    char_removed = pyqtSignal()
+    buffer_cleared = pyqtSignal()
+    # The oldest characters were dropped to keep the buffer within _max_buf;
+    # incremental listeners have to rebuild their state from the buffer
+    buffer_trimmed = pyqtSignal()
+
     # Emitted on main thread when Tab / Esc are detected
     tab_pressed = pyqtSignal()
     esc_pressed = pyqtSignal()
@@ -127,6 +136,7 @@ class InputMonitor(QObject):
 
     def clear_buffer(self):
         self._buffer.clear()
+        self.buffer_cleared.emit()
 
     def get_context(self) -> str:
         return "".join(self._buffer)
@@ -184,28 +194,32 @@ class InputMonitor(QObject):
 
         if name == "escape":
             self.esc_pressed.emit()
-            self._buffer.clear()
+            self.clear_buffer()
             return
 
         if name == "backspace":
             if self._buffer:
                 self._buffer.pop()
+                self.char_removed.emit()
             self._emit_changed()
             return
 
         is_boundary = name in _WORD_BOUNDARY
 
         if name == "enter":
-            self._buffer.append("\n")
+            char = "\n"
         elif name == "space":
-            self._buffer.append(" ")
+            char = " "
         elif len(key_name) == 1:
-            self._buffer.append(key_name)
+            char = key_name
         else:
             return
+        self._buffer.append(char)
+        self.char_appended.emit(char)
 
         if len(self._buffer) > self._max_buf:
             self._buffer = self._buffer[-self._max_buf:]
+            self.buffer_trimmed.emit()
 
         self._emit_changed()
 
@@ -1,8 +1,9 @@
 from datetime import datetime
 from dataclasses import dataclass, field
-from typing import Dict, Optional, Literal
+from typing import Callable, Dict, Optional, Literal
 from enum import Enum
 import hashlib
+import json
 import re
 
 class ContentType(Enum):
@@ -13,25 +14,219 @@ class ContentType(Enum):
     HTML = "html"
     RTF = "rtf"
 
-@dataclass
+# 写入数据库的预览文本最大长度（列表只显示前 60 个字符）
+PREVIEW_CHARS = 200
+
+# 二进制内容（图片）单独存放在 blob 表中，content 只保存 "blob:<sha256>" 引用
+BLOB_PREFIX = "blob:"
+
+
+def calculate_hash(content: str) -> str:
+    """计算内容哈希（用于快速去重）"""
+    return hashlib.md5(content.encode('utf-8')).hexdigest()[:16]
+
+
+def blob_ref(data: bytes) -> str:
+    """按内容寻址生成 blob 引用，相同数据得到相同引用"""
+    return BLOB_PREFIX + hashlib.sha256(data).hexdigest()
+
+_ICONS = {
+    ContentType.TEXT: "📝",
+    ContentType.IMAGE: "🖼️",
+    ContentType.FILE: "📎",
+    ContentType.HTML: "🌐",
+    ContentType.RTF: "📄"
+}
+
+
+def _truncate(text: str, max_length: int) -> str:
+    if len(text) > max_length:
+        return text[:max_length] + '...'
+    return text
+
+
+def _source_display(source: Dict) -> str:
+    """获取用于显示的来源名称"""
+    # 优先显示域名（网页来源）
+    domain = source.get('domain', '')
+    if domain:
+        return domain
+
+    # 其次显示应用名称
+    app_name = source.get('app_name', '')
+    if app_name:
+        return app_name
+
+    # 最后显示窗口标题
+    title = source.get('title', '')
+    if title and len(title) < 40:
+        return title
+
+    # 默认返回
+    url = source.get('url', '')
+    if url:
+        return url[:30] + '...' if len(url) > 30 else url
+
+    return "未知来源"
+
+
+def _source_tooltip(source: Dict) -> str:
+    """获取来源的详细提示信息"""
+    parts = []
+
+    url = source.get('url', '')
+    if url:
+        parts.append(f"URL: {url}")
+
+    title = source.get('title', '')
+    if title:
+        parts.append(f"标题: {title}")
+
+    app_name = source.get('app_name', '')
+    if app_name:
+        parts.append(f"应用: {app_name}")
+
+    domain = source.get('domain', '')
+    if domain and not url:
+        parts.append(f"域名: {domain}")
+
+    return "\n".join(parts) if parts else "来源信息不可用"
+
+
 class ClipboardItem:
-    """剪贴板项目"""
-    content: str
-    timestamp: datetime
-    content_type: ContentType = ContentType.TEXT
-    content_hash: str = ""
-    is_favorite: bool = False
-    tags: list = field(default_factory=list)
-    metadata: Dict = field(default_factory=dict)
-    
-    def __post_init__(self):
-        """初始化后计算哈希"""
-        if not self.content_hash and self.content:
+    """剪贴板项目
+
+    从数据库读取时 content（可能已压缩）、tags 和 metadata 以原始形式保存，
+    第一次访问对应属性时才解压 / 解析 JSON：只用到预览、哈希、时间等字段的
+    调用方不必为每一行付出解码成本。使用 __slots__ 减少每个实例的内存占用。
+    """
+    __slots__ = (
+        '_content', '_raw_content', 'timestamp', 'content_type', 'content_hash',
+        'is_favorite', '_tags', '_raw_tags', '_metadata', '_raw_metadata',
+        'data', 'thumbnail', 'use_count',
+    )
+
+    def __init__(self, content: str, timestamp: datetime,
+                 content_type: ContentType = ContentType.TEXT, content_hash: str = "",
+                 is_favorite: bool = False, tags: Optional[list] = None,
+                 metadata: Optional[Dict] = None, data: Optional[bytes] = None,
+                 thumbnail: Optional[bytes] = None, use_count: int = 1):
+        self._content = content
+        self._raw_content = None
+        self.timestamp = timestamp
+        self.content_type = content_type
+        self.content_hash = content_hash
+        self.is_favorite = is_favorite
+        self._tags = tags if tags is not None else []
+        self._raw_tags = None
+        self._metadata = metadata if metadata is not None else {}
+        self._raw_metadata = None
+        # 待写入 blob 表的原始二进制数据（仅新捕获的图片携带，从数据库读取时为 None）
+        self.data = data
+        # 列表缩略图（JPEG 字节，图片捕获时由写入线程生成；b'' 表示无法生成）
+        self.thumbnail = thumbnail
+        self.use_count = use_count  # 复制次数（同一内容再次复制时累加）
+
+        if self.data is not None and not self._content:
+            self._content = blob_ref(self.data)
+        if not self.content_hash and self._content:
             self.content_hash = self._calculate_hash()
+
+    @classmethod
+    def from_stored(cls, stored_content, decode: Callable[[object, int], str], codec: int,
+                    timestamp: datetime, content_type: ContentType, content_hash: str,
+                    is_favorite: bool, raw_tags: Optional[str], raw_metadata: Optional[str],
+                    thumbnail: Optional[bytes] = None, use_count: int = 1) -> 'ClipboardItem':
+        """从数据库中保存的形式创建实例，内容和 JSON 字段延迟解码
+
+        decode(stored_content, codec) 在第一次访问 content 时调用。
+        """
+        item = cls.__new__(cls)
+        if codec:
+            item._content = None
+            item._raw_content = (decode, stored_content, codec)
+        else:
+            item._content = stored_content
+            item._raw_content = None
+        item.timestamp = timestamp
+        item.content_type = content_type
+        item.content_hash = content_hash
+        item.is_favorite = is_favorite
+        item._tags = None
+        item._raw_tags = raw_tags
+        item._metadata = None
+        item._raw_metadata = raw_metadata
+        item.data = None
+        item.thumbnail = thumbnail
+        item.use_count = use_count
+        return item
+
+    @property
+    def content(self) -> str:
+        if self._raw_content is not None:
+            decode, stored, codec = self._raw_content
+            self._content = decode(stored, codec)
+            self._raw_content = None
+        return self._content
+
+    @content.setter
+    def content(self, value: str):
+        self._content = value
+        self._raw_content = None
+
+    @property
+    def tags(self) -> list:
+        if self._tags is None:
+            self._tags = json.loads(self._raw_tags or '[]')
+            self._raw_tags = None
+        return self._tags
+
+    @tags.setter
+    def tags(self, value: list):
+        self._tags = value
+        self._raw_tags = None
+
+    @property
+    def metadata(self) -> Dict:
+        if self._metadata is None:
+            self._metadata = json.loads(self._raw_metadata or '{}')
+            self._raw_metadata = None
+        return self._metadata
+
+    @metadata.setter
+    def metadata(self, value: Dict):
+        self._metadata = value
+        self._raw_metadata = None
+
+    def __eq__(self, other) -> bool:
+        if not isinstance(other, ClipboardItem):
+            return NotImplemented
+        return (self.content_hash, self.content, self.timestamp, self.content_type,
+                self.is_favorite, self.tags, self.metadata, self.use_count) == \
+               (other.content_hash, other.content, other.timestamp, other.content_type,
+                other.is_favorite, other.tags, other.metadata, other.use_count)
+
+    __hash__ = None
+
+    def __repr__(self) -> str:
+        return (f"ClipboardItem(content_hash={self.content_hash!r}, "
+                f"content_type={self.content_type}, timestamp={self.timestamp!r}, "
+                f"is_favorite={self.is_favorite}, use_count={self.use_count})")
     
     def _calculate_hash(self) -> str:
         """计算内容哈希（用于快速去重）"""
-        return hashlib.md5(self.content.encode('utf-8')).hexdigest()[:16]
+        return calculate_hash(self.content)
+    
+    @property
+    def blob_digest(self) -> Optional[str]:
+        """内容保存在 blob 表中时返回其摘要，否则返回 None
+
+        只有图片才会保存为 blob 引用；文本内容即使以 "blob:" 开头（如浏览器的
+        blob URL）也是普通文本。
+        """
+        if self.content_type == ContentType.IMAGE and self.content.startswith(BLOB_PREFIX):
+            return self.content[len(BLOB_PREFIX):]
+        return None
     
     @classmethod
     def from_dict(cls, data: Dict) -> 'ClipboardItem':
@@ -56,7 +251,8 @@ class ClipboardItem:
             content_hash=data.get('content_hash', ''),
             is_favorite=data.get('is_favorite', False),
             tags=data.get('tags', []),
-            metadata=data.get('metadata', {})
+            metadata=data.get('metadata', {}),
+            use_count=data.get('use_count', 1)
         )
     
     def to_dict(self) -> Dict:
@@ -68,7 +264,8 @@ class ClipboardItem:
             'content_hash': self.content_hash,
             'is_favorite': self.is_favorite,
             'tags': self.tags,
-            'metadata': self.metadata
+            'metadata': self.metadata,
+            'use_count': self.use_count
         }
     
     def display_text(self) -> str:
@@ -96,23 +293,17 @@ class ClipboardItem:
     
     def preview_text(self, max_length: int = 50) -> str:
         """获取预览文本"""
-        text = self.display_text()
-        if len(text) > max_length:
-            return text[:max_length] + '...'
-        return text
+        return _truncate(self.display_text(), max_length)
+    
+    def summary_text(self) -> str:
+        """获取写入数据库的单行预览（供列表投影查询使用）"""
+        return ' '.join(self.display_text()[:PREVIEW_CHARS * 2].split())[:PREVIEW_CHARS]
     
     def get_icon(self) -> str:
         """获取内容类型对应的图标"""
-        icons = {
-            ContentType.TEXT: "📝",
-            ContentType.IMAGE: "🖼️",
-            ContentType.FILE: "📎",
-            ContentType.HTML: "🌐",
-            ContentType.RTF: "📄"
-        }
         if self.is_favorite:
             return "⭐"
-        return icons.get(self.content_type, "📋")
+        return _ICONS.get(self.content_type, "📋")
 
     def get_source_info(self) -> dict:
         """获取来源信息"""
@@ -127,50 +318,62 @@ class ClipboardItem:
 
     def get_source_display(self) -> str:
         """获取用于显示的来源名称"""
-        source = self.metadata.get('source', {})
+        return _source_display(self.metadata.get('source', {}))
 
-        # 优先显示域名（网页来源）
-        domain = source.get('domain', '')
-        if domain:
-            return domain
-
-        # 其次显示应用名称
-        app_name = source.get('app_name', '')
-        if app_name:
-            return app_name
+    def get_source_tooltip(self) -> str:
+        """获取来源的详细提示信息"""
+        return _source_tooltip(self.metadata.get('source', {}))
 
-        # 最后显示窗口标题
-        title = source.get('title', '')
-        if title and len(title) < 40:
-            return title
 
-        # 默认返回
-        url = source.get('url', '')
-        if url:
-            return url[:30] + '...' if len(url) > 30 else url
+@dataclass(slots=True)
+class ClipboardListRow:
+    """列表行：只包含列表显示所需的字段，不加载完整内容
 
-        return "未知来源"
+    完整内容按 content_hash 延迟获取（复制、查看完整内容、AI 上下文）。
+    """
+    content_hash: str
+    timestamp: datetime
+    content_type: ContentType = ContentType.TEXT
+    is_favorite: bool = False
+    preview: str = ""
+    source: Dict = field(default_factory=dict)
+    thumbnail: Optional[bytes] = field(default=None, repr=False, compare=False)
 
-    def get_source_tooltip(self) -> str:
-        """获取来源的详细提示信息"""
-        source = self.metadata.get('source', {})
+    @classmethod
+    def from_item(cls, item: ClipboardItem) -> 'ClipboardListRow':
+        """从完整项目生成列表行"""
+        return cls(
+            content_hash=item.content_hash,
+            timestamp=item.timestamp,
+            content_type=item.content_type,
+            is_favorite=item.is_favorite,
+            preview=item.summary_text(),
+            source=item.metadata.get('source', {}),
+            thumbnail=item.thumbnail,
+        )
 
-        parts = []
+    def preview_text(self, max_length: int = 50) -> str:
+        """获取预览文本"""
+        return _truncate(self.preview, max_length)
 
-        url = source.get('url', '')
-        if url:
-            parts.append(f"URL: {url}")
+    def get_icon(self) -> str:
+        """获取内容类型对应的图标"""
+        if self.is_favorite:
+            return "⭐"
+        return _ICONS.get(self.content_type, "📋")
 
-        title = source.get('title', '')
-        if title:
-            parts.append(f"标题: {title}")
+    def get_source_display(self) -> str:
+        """获取用于显示的来源名称"""
+        return _source_display(self.source)
 
-        app_name = source.get('app_name', '')
-        if app_name:
-            parts.append(f"应用: {app_name}")
+    def get_source_tooltip(self) -> str:
+        """获取来源的详细提示信息"""
+        return _source_tooltip(self.source)
 
-        domain = source.get('domain', '')
-        if domain and not url:
-            parts.append(f"域名: {domain}")
 
-        return "\n".join(parts) if parts else "来源信息不可用"
\ No newline at end of file
+@dataclass(slots=True)
+class ClipboardText:
+    """文本记录：只包含正文，供本地预测使用，不解析标签和元数据"""
+    content_hash: str
+    text: str
+    is_favorite: bool = False
@@ -1,8 +1,13 @@
 import json
-import gzip
+import functools
+import html
+import re
+import shutil
 import sqlite3
 import threading
-from typing import List, Optional, Callable
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, List, Optional, Callable, Tuple
+from dataclasses import dataclass
 from datetime import datetime, timedelta
 from PyQt6.QtCore import QObject, QTimer, pyqtSignal
 from PyQt6.QtGui import QImage, QPixmap
@@ -11,38 +16,193 @@ import os
 import base64
 import io
 
-from models.clipboard_item import ClipboardItem, ContentType
+from models.clipboard_item import (
+    BLOB_PREFIX, ClipboardItem, ClipboardListRow, ClipboardText, ContentType, blob_ref,
+    calculate_hash
+)
 from config.settings import Settings
+from services.content_codec import CODEC_NONE, ContentCodec
+from services.history_writer import HistoryWriter
+from services.image_pipeline import ImageCapturePipeline
 from utils.logger import logger
 
 
+_HTML_TAG_RE = re.compile(r'<[^>]+>')
+
+# 单条记录占用的字节数：正文（可能已压缩）、元数据、预览、缩略图以及引用的二进制内容
+_STORED_BYTES_SQL = '''
+    length(CAST(content AS BLOB)) + COALESCE(length(CAST(metadata AS BLOB)), 0)
+    + COALESCE(length(CAST(preview AS BLOB)), 0) + COALESCE(length(thumbnail), 0)
+    + CASE WHEN content_type = 'image' AND content LIKE 'blob:%' THEN COALESCE(
+        (SELECT size FROM clipboard_blobs WHERE digest = substr(content, 6)), 0) ELSE 0 END
+'''
+_VACUUM_PAGES = 1024        # 每次增量 VACUUM 最多归还的空闲页数
+_DICT_MIN_SAMPLES = 200     # 训练压缩字典所需的最少文本记录数
+_DICT_MAX_SAMPLES = 2000    # 训练时最多使用的最近记录数
+_DICT_RETRAIN_ROWS = 5000   # 字典训练后新增这么多记录时重新训练
+
+
+@dataclass(frozen=True)
+class HistoryCursor:
+    """历史记录分页游标：列表中最后一行的排序键，搜索结果则为偏移量"""
+    is_favorite: int = 0
+    timestamp: float = 0.0
+    row_id: int = 0
+    offset: int = 0
+
+
+def _strip_html(text: str) -> str:
+    """去除 HTML 标签并压缩空白"""
+    text = html.unescape(_HTML_TAG_RE.sub(' ', text))
+    return ' '.join(text.split())
+
+
+def _search_text(codec: ContentCodec, content, compressed, content_type) -> str:
+    """SQL 函数 clip_search_text：返回行内容的可检索纯文本（解压并去除 HTML）"""
+    if content_type == ContentType.IMAGE.value or content is None:
+        return ''
+    content = codec.decode(content, compressed)
+    if content_type == ContentType.HTML.value:
+        return _strip_html(content)
+    return content
+
+
+def _decode_data_uri(content: str) -> Optional[bytes]:
+    """解析 data:...;base64, 形式的内联数据，不是内联数据时返回 None"""
+    if not content.startswith('data:') or ';base64,' not in content[:64]:
+        return None
+    try:
+        return base64.b64decode(content.split(',', 1)[1])
+    except (ValueError, IndexError):
+        return None
+
+
+def _source_text(metadata) -> str:
+    """SQL 函数 clip_source_text：返回来源域名、标题和应用名"""
+    try:
+        source = json.loads(metadata or '{}').get('source', {})
+    except (TypeError, ValueError):
+        return ''
+    parts = (source.get('domain'), source.get('title'), source.get('app_name'))
+    return ' '.join(p for p in parts if p)
+
+
+def _search_filter(search_text: str):
+    """把搜索词转换为基于索引的过滤条件
+
+    每个以空白分隔的词都必须作为子串出现（大小写不敏感），词之间为 AND。
+    3 个字符以上的词走三元组索引 history_trigram（任意子串，含中文和压缩内容）；
+    更短的词无法用三元组索引（按词的前缀索引也找不到词中间的中文子串），
+    在 history_text 的纯文本上做 LIKE 过滤（别名 s）。有长词时只过滤三元组
+    索引的候选行；全部是短词时逐行扫描（见 _list_query）。
+
+    返回 (MATCH 表达式, 额外 WHERE 子句列表, 参数列表)。
+    """
+    match_terms, clauses, params = [], [], []
+    for term in search_text.split():
+        if len(term) >= 3:
+            match_terms.append('"' + term.replace('"', '""') + '"')
+            continue
+        escaped = term.replace('\\', '\\\\').replace('%', '\\%').replace('_', '\\_')
+        clauses.append(
+            "(s.body LIKE ? ESCAPE '\\' OR s.tags LIKE ? ESCAPE '\\' "
+            "OR s.source LIKE ? ESCAPE '\\')"
+        )
+        params.extend([f'%{escaped}%'] * 3)
+    return ' '.join(match_terms), clauses, params
+
+
 class DatabaseManager:
     """SQLite数据库管理器 - 高效存储大量数据"""
     
-    def __init__(self, db_path: str):
+    # 每个连接打开时设置的 PRAGMA（WAL 模式下读写互不阻塞）
+    PRAGMAS = (
+        ('journal_mode', 'WAL'),
+        ('synchronous', 'NORMAL'),          # WAL 下只在检查点时 fsync
+        ('cache_size', -16000),             # 页缓存约 16MB（负数单位为 KiB）
+        ('mmap_size', 256 * 1024 * 1024),   # 内存映射读取 256MB
+        ('temp_store', 'MEMORY'),
+        ('busy_timeout', 5000),             # 遇到锁时最多等待 5 秒
+        ('wal_autocheckpoint', 1000),       # WAL 超过 1000 页自动检查点
+        ('journal_size_limit', 64 * 1024 * 1024),
+    )
+
+    # 列表投影查询读取的列（不含 content / metadata 等大字段）
+    _LIST_COLUMNS = ('h.id, h.content_hash, h.content_type, h.timestamp, h.is_favorite, '
+                     'h.preview, h.source, h.thumbnail')
+
+    def __init__(self, db_path: str, tuned: bool = True, codec: Optional[ContentCodec] = None):
         self.db_path = db_path
+        self.tuned = tuned
+        self.codec = codec or ContentCodec()
         self._local = threading.local()
+        self._connections = set()
+        self._connections_lock = threading.Lock()
         self._init_db()
     
+    def _create_connection(self) -> sqlite3.Connection:
+        """创建新连接并应用 PRAGMA 设置"""
+        conn = sqlite3.connect(self.db_path, check_same_thread=False)
+        conn.row_factory = sqlite3.Row
+        # 全文索引触发器依赖这些函数，每个连接都必须注册
+        conn.create_function('clip_search_text', 3, functools.partial(_search_text, self.codec),
+                             deterministic=True)
+        conn.create_function('clip_source_text', 1, _source_text, deterministic=True)
+        if self.tuned:
+            for name, value in self.PRAGMAS:
+                conn.execute(f'PRAGMA {name} = {value}')
+        return conn
+    
     def _get_connection(self) -> sqlite3.Connection:
         """获取线程本地连接"""
         if not hasattr(self._local, 'connection') or self._local.connection is None:
-            self._local.connection = sqlite3.connect(self.db_path, check_same_thread=False)
-            self._local.connection.row_factory = sqlite3.Row
+            conn = self._create_connection()
+            self._local.connection = conn
+            with self._connections_lock:
+                self._connections.add(conn)
         return self._local.connection
 
     def close(self):
         """关闭当前线程的数据库连接"""
         if hasattr(self._local, 'connection') and self._local.connection is not None:
+            conn = self._local.connection
+            self._local.connection = None
+            with self._connections_lock:
+                self._connections.discard(conn)
             try:
-                self._local.connection.close()
+                conn.close()
             except Exception:
                 pass
-            self._local.connection = None
+
+    def close_all(self):
+        """检查点后关闭所有线程打开的连接（仅在退出时调用）"""
+        self.checkpoint('TRUNCATE')
+        with self._connections_lock:
+            connections = list(self._connections)
+            self._connections.clear()
+        for conn in connections:
+            try:
+                conn.close()
+            except Exception:
+                pass
+        self._local.connection = None
+
+    def checkpoint(self, mode: str = 'PASSIVE') -> bool:
+        """执行 WAL 检查点，把 WAL 内容写回主数据库文件"""
+        if not self.tuned:
+            return False
+        try:
+            conn = self._get_connection()
+            busy, _, _ = conn.execute(f'PRAGMA wal_checkpoint({mode})').fetchone()
+            return busy == 0
+        except Exception as e:
+            logger.warning(f"WAL 检查点失败: {str(e)}")
+            return False
     
     def _init_db(self):
         """初始化数据库"""
         conn = self._get_connection()
+        self._init_auto_vacuum(conn)
         cursor = conn.cursor()
         
         # 创建历史记录表
@@ -56,9 +216,16 @@ class DatabaseManager:
                 is_favorite INTEGER DEFAULT 0,
                 tags TEXT DEFAULT '[]',
                 metadata TEXT DEFAULT '{}',
-                compressed INTEGER DEFAULT 0
+                compressed INTEGER DEFAULT 0,
+                preview TEXT DEFAULT '',
+                source TEXT DEFAULT '{}',
+                thumbnail BLOB,
+                use_count INTEGER DEFAULT 1,
+                stored_bytes INTEGER DEFAULT 0
             )
         ''')
+        self._init_dictionaries(cursor)
+        sizes_missing = self._migrate_columns(cursor)
         
         # 创建索引
         cursor.execute('''
@@ -70,99 +237,784 @@ class DatabaseManager:
         cursor.execute('''
             CREATE INDEX IF NOT EXISTS idx_favorite ON clipboard_history(is_favorite)
         ''')
+        # 列表排序与 keyset 分页使用的复合索引
+        cursor.execute('''
+            CREATE INDEX IF NOT EXISTS idx_list_order 
+            ON clipboard_history(is_favorite, timestamp, id)
+        ''')
+        
+        self._init_blobs(cursor)
+        if sizes_missing:
+            # 图片迁移到 blob 表之后再统计，才能计入二进制内容的大小
+            cursor.execute(f'UPDATE clipboard_history SET stored_bytes = {_STORED_BYTES_SQL}')
+        self._init_counts(cursor, rebuild=sizes_missing)
+        self._init_fts(cursor)
         
         conn.commit()
     
-    def add_item(self, item: ClipboardItem) -> bool:
-        """添加项目"""
+    def _init_auto_vacuum(self, conn: sqlite3.Connection):
+        """新数据库直接启用增量 VACUUM，删除记录后空出的页可以归还给文件系统（见 reclaim_space）
+
+        auto_vacuum 只能在创建数据库前设置，之后需要执行一次完整 VACUUM 才能切换。
+        已有数据的旧数据库不在这里转换（会阻塞启动），由写入线程空闲时调用
+        enable_incremental_vacuum 完成；转换之前 reclaim_space 不做任何事。
+        """
+        self.incremental_vacuum = False
+        if not self.tuned:
+            return
+        if conn.execute('PRAGMA auto_vacuum').fetchone()[0] == 2:
+            self.incremental_vacuum = True
+            return
+        if conn.execute('SELECT COUNT(*) FROM sqlite_master').fetchone()[0]:
+            return
+        conn.execute('PRAGMA auto_vacuum = INCREMENTAL')
+        # 切换到 WAL 时文件头已写入，即使是空数据库也要 VACUUM 才能生效
+        conn.execute('VACUUM')
+        self.incremental_vacuum = True
+    
+    def enable_incremental_vacuum(self) -> bool:
+        """把旧数据库转换为增量 VACUUM 模式（完整 VACUUM 一次），返回是否已启用
+
+        耗时与数据库大小成正比，并且临时需要与数据库大小相当的磁盘空间；
+        由写入线程在空闲时调用，空间不足时跳过，下次启动再尝试。
+        """
+        if self.incremental_vacuum or not self.tuned:
+            return self.incremental_vacuum
         try:
+            size = os.path.getsize(self.db_path)
+            free = shutil.disk_usage(os.path.dirname(os.path.abspath(self.db_path))).free
+            if free < size * 2:
+                logger.warning(f"磁盘空间不足（需要约 {size * 2 // (1024 * 1024)} MB），"
+                               "暂不转换为增量 VACUUM 模式")
+                return False
             conn = self._get_connection()
-            cursor = conn.cursor()
-            
-            # 检查是否已存在
+            conn.commit()
+            logger.info(f"正在整理数据库以启用增量 VACUUM（{size // (1024 * 1024)} MB）")
+            conn.execute('PRAGMA auto_vacuum = INCREMENTAL')
+            conn.execute('VACUUM')
+            self.incremental_vacuum = conn.execute('PRAGMA auto_vacuum').fetchone()[0] == 2
+            logger.info("已启用增量 VACUUM")
+            return self.incremental_vacuum
+        except Exception as e:
+            logger.warning(f"转换为增量 VACUUM 模式失败: {str(e)}")
+            return False
+    
+    def _migrate_columns(self, cursor: sqlite3.Cursor) -> bool:
+        """为旧数据库补充 preview / source / thumbnail / use_count / stored_bytes 列并回填
+
+        返回 stored_bytes 是否需要重新统计（由 _init_db 在迁移图片后完成）。
+        """
+        cursor.execute('PRAGMA table_info(clipboard_history)')
+        columns = {row['name'] for row in cursor.fetchall()}
+        sizes_missing = 'stored_bytes' not in columns
+        if sizes_missing:
+            cursor.execute('ALTER TABLE clipboard_history ADD COLUMN stored_bytes INTEGER DEFAULT 0')
+        if 'thumbnail' not in columns:
+            # 缩略图由写入线程在后台补齐（见 missing_thumbnails）
+            cursor.execute('ALTER TABLE clipboard_history ADD COLUMN thumbnail BLOB')
+        if 'use_count' not in columns:
+            cursor.execute('ALTER TABLE clipboard_history ADD COLUMN use_count INTEGER DEFAULT 1')
+        if {'preview', 'source'} <= columns:
+            return sizes_missing
+        if 'preview' not in columns:
+            cursor.execute("ALTER TABLE clipboard_history ADD COLUMN preview TEXT DEFAULT ''")
+        if 'source' not in columns:
+            cursor.execute("ALTER TABLE clipboard_history ADD COLUMN source TEXT DEFAULT '{}'")
+        
+        cursor.execute('SELECT * FROM clipboard_history')
+        updates = []
+        for row in cursor.fetchall():
+            item = self._row_to_item(row)
+            updates.append((item.summary_text(),
+                            json.dumps(item.metadata.get('source', {})),
+                            row['id']))
+        cursor.executemany(
+            'UPDATE clipboard_history SET preview = ?, source = ? WHERE id = ?', updates
+        )
+        if updates:
+            logger.info(f"已为 {len(updates)} 条历史记录生成列表预览")
+        return sizes_missing
+    
+    def _init_blobs(self, cursor: sqlite3.Cursor):
+        """创建二进制内容表
+
+        图片等二进制内容以原始字节按 SHA-256 摘要保存在 clipboard_blobs 中，
+        历史记录的 content 只保存 "blob:<摘要>" 引用，相同数据只存一份。
+        只有图片记录的引用指向 blob 表：文本本身也可能以 "blob:" 开头（浏览器的
+        blob URL），所有判断都同时检查 content_type。
+        与历史记录位于同一数据库，写入和删除都在同一个事务中完成；
+        最后一条引用被删除时由触发器清理对应的数据。
+        """
+        cursor.execute('''
+            CREATE TABLE IF NOT EXISTS clipboard_blobs (
+                digest TEXT PRIMARY KEY,
+                data BLOB NOT NULL,
+                size INTEGER NOT NULL
+            )
+        ''')
+        cursor.execute('DROP TRIGGER IF EXISTS clipboard_blobs_gc')
+        cursor.execute('''
+            CREATE TRIGGER clipboard_blobs_gc
+            AFTER DELETE ON clipboard_history
+            WHEN old.content_type = 'image' AND old.content LIKE 'blob:%'
+            BEGIN
+                DELETE FROM clipboard_blobs
+                WHERE digest = substr(old.content, 6)
+                AND NOT EXISTS (
+                    SELECT 1 FROM clipboard_history WHERE content_hash = old.content_hash
+                );
+            END
+        ''')
+        
+        # 旧数据库：把内联的 base64 图片迁移到 blob 表
+        cursor.execute('''
+            SELECT id, content, compressed FROM clipboard_history 
+            WHERE content_type = ? AND content NOT LIKE 'blob:%'
+        ''', (ContentType.IMAGE.value,))
+        migrated = 0
+        for row in cursor.fetchall():
+            content = self.codec.decode(row['content'], row['compressed'])
+            data = _decode_data_uri(content)
+            if data is None:
+                continue
+            ref = blob_ref(data)
+            self._store_blob(cursor, ref, data)
+            content_hash = calculate_hash(ref)
             cursor.execute(
-                'SELECT id FROM clipboard_history WHERE content_hash = ?',
-                (item.content_hash,)
+                'SELECT 1 FROM clipboard_history WHERE content_hash = ? AND id != ?',
+                (content_hash, row['id'])
             )
             if cursor.fetchone():
-                # 更新时间和移动到最前（通过删除再插入）
+                # 同一张图片已以新格式存在
+                cursor.execute('DELETE FROM clipboard_history WHERE id = ?', (row['id'],))
+            else:
                 cursor.execute(
-                    'DELETE FROM clipboard_history WHERE content_hash = ?',
-                    (item.content_hash,)
+                    'UPDATE clipboard_history SET content = ?, content_hash = ?, compressed = 0 '
+                    'WHERE id = ?',
+                    (ref, content_hash, row['id'])
                 )
-            
-            # 压缩大文本内容
-            content = item.content
-            compressed = 0
-            if len(content) > 1000:
-                content = gzip.compress(content.encode('utf-8'))
-                compressed = 1
-            
+            migrated += 1
+        if migrated:
+            logger.info(f"已将 {migrated} 张图片迁移到二进制内容表")
+    
+    def _init_counts(self, cursor: sqlite3.Cursor, rebuild: bool = False):
+        """创建由触发器维护的记录计数表（按内容类型和收藏状态分组的条数和字节数）
+
+        计数与历史记录在同一事务中更新，读取总数、分类数量或占用空间都不需要扫描全表。
+        """
+        cursor.execute('PRAGMA table_info(history_counts)')
+        columns = {row['name'] for row in cursor.fetchall()}
+        if columns and 'bytes' not in columns:
+            cursor.execute('ALTER TABLE history_counts ADD COLUMN bytes INTEGER NOT NULL DEFAULT 0')
+            rebuild = True
+        cursor.execute('''
+            CREATE TABLE IF NOT EXISTS history_counts (
+                content_type TEXT NOT NULL,
+                is_favorite INTEGER NOT NULL,
+                count INTEGER NOT NULL DEFAULT 0,
+                bytes INTEGER NOT NULL DEFAULT 0,
+                PRIMARY KEY (content_type, is_favorite)
+            ) WITHOUT ROWID
+        ''')
+        
+        for name in ('history_counts_insert', 'history_counts_delete', 'history_counts_update'):
+            cursor.execute(f'DROP TRIGGER IF EXISTS {name}')
+        
+        increment = '''
+                INSERT INTO history_counts (content_type, is_favorite, count, bytes)
+                VALUES (new.content_type, new.is_favorite, 1, new.stored_bytes)
+                ON CONFLICT(content_type, is_favorite) DO UPDATE SET 
+                    count = count + 1, bytes = bytes + excluded.bytes;
+        '''
+        decrement = '''
+                UPDATE history_counts SET count = count - 1, bytes = bytes - old.stored_bytes
+                WHERE content_type = old.content_type AND is_favorite = old.is_favorite;
+        '''
+        cursor.execute(f'''
+            CREATE TRIGGER history_counts_insert
+            AFTER INSERT ON clipboard_history BEGIN
+                {increment}
+            END
+        ''')
+        cursor.execute(f'''
+            CREATE TRIGGER history_counts_delete
+            AFTER DELETE ON clipboard_history BEGIN
+                {decrement}
+            END
+        ''')
+        cursor.execute(f'''
+            CREATE TRIGGER history_counts_update
+            AFTER UPDATE OF content_type, is_favorite, stored_bytes ON clipboard_history BEGIN
+                {decrement}
+                {increment}
+            END
+        ''')
+        
+        if not columns or rebuild:
+            cursor.execute('DELETE FROM history_counts')
             cursor.execute('''
-                INSERT INTO clipboard_history 
-                (content_hash, content, content_type, timestamp, is_favorite, tags, metadata, compressed)
-                VALUES (?, ?, ?, ?, ?, ?, ?, ?)
-            ''', (
-                item.content_hash,
-                content if compressed == 0 else content,
-                item.content_type.value,
-                item.timestamp.timestamp(),
-                1 if item.is_favorite else 0,
-                json.dumps(item.tags),
-                json.dumps(item.metadata),
-                compressed
-            ))
+                INSERT INTO history_counts (content_type, is_favorite, count, bytes)
+                SELECT content_type, is_favorite, COUNT(*), COALESCE(SUM(stored_bytes), 0)
+                FROM clipboard_history
+                GROUP BY content_type, is_favorite
+            ''')
+    
+    def _init_dictionaries(self, cursor: sqlite3.Cursor):
+        """创建压缩字典表并把所有字典加载到编解码器（最新的字典用于压缩新内容）
+
+        旧字典一直保留，使用它压缩的记录仍然可以读取。
+        """
+        cursor.execute('''
+            CREATE TABLE IF NOT EXISTS codec_dictionaries (
+                dict_id INTEGER PRIMARY KEY,
+                data BLOB NOT NULL,
+                trained_upto INTEGER NOT NULL,
+                created REAL NOT NULL
+            )
+        ''')
+        cursor.execute('SELECT dict_id, data FROM codec_dictionaries ORDER BY created')
+        for row in cursor.fetchall():
+            self.codec.load_dictionary(row['dict_id'], row['data'])
+    
+    def maybe_train_dictionary(self) -> bool:
+        """历史记录足够且没有字典（或字典训练后新增了大量记录）时训练新字典
+
+        训练耗时较长，由写入线程在空闲时调用；已有记录不会重新压缩。
+        """
+        if not self.codec.supports_dictionary:
+            return False
+        conn = self._get_connection()
+        try:
+            cursor = conn.cursor()
+            cursor.execute('SELECT COALESCE(MAX(trained_upto), 0) FROM codec_dictionaries')
+            trained_upto = cursor.fetchone()[0]
+            cursor.execute('SELECT COUNT(*) FROM clipboard_history WHERE id > ?', (trained_upto,))
+            new_rows = cursor.fetchone()[0]
+            if new_rows < (_DICT_RETRAIN_ROWS if trained_upto else _DICT_MIN_SAMPLES):
+                return False
             
+            cursor.execute('''
+                SELECT id, content, compressed FROM clipboard_history 
+                WHERE content_type IN (?, ?) ORDER BY id DESC LIMIT ?
+            ''', (ContentType.TEXT.value, ContentType.HTML.value, _DICT_MAX_SAMPLES))
+            rows = cursor.fetchall()
+            if len(rows) < _DICT_MIN_SAMPLES:
+                return False
+            samples = [self.codec.decode(row['content'], row['compressed']).encode('utf-8')
+                       for row in rows]
+            trained = self.codec.train(samples)
+            if trained is None:
+                return False
+            dict_id, data = trained
+            cursor.execute(
+                'INSERT OR REPLACE INTO codec_dictionaries (dict_id, data, trained_upto, created) '
+                'VALUES (?, ?, ?, ?)',
+                (dict_id, data, rows[0]['id'], datetime.now().timestamp())
+            )
             conn.commit()
+            self.codec.load_dictionary(dict_id, data)
+            logger.info(f"已用 {len(samples)} 条记录训练压缩字典 {dict_id}（{len(data)} 字节）")
             return True
         except Exception as e:
-            logger.error(f"添加项目到数据库时发生错误: {str(e)}")
+            conn.rollback()
+            logger.error(f"训练压缩字典时发生错误: {str(e)}")
             return False
     
+    @staticmethod
+    def _store_blob(cursor: sqlite3.Cursor, ref: str, data: bytes):
+        """写入二进制内容（已存在时跳过）"""
+        cursor.execute(
+            'INSERT OR IGNORE INTO clipboard_blobs (digest, data, size) VALUES (?, ?, ?)',
+            (ref[len(BLOB_PREFIX):], data, len(data))
+        )
+    
+    def _init_fts(self, cursor: sqlite3.Cursor):
+        """创建全文索引及同步触发器
+
+        history_text 保存解压、去除 HTML 后的正文、标签以及来源域名/标题
+        （普通表，id 与 clipboard_history.id 一致）；history_trigram 以它为外部内容表
+        建立三元组索引，用于任意子串检索，不重复保存文本。短词无法使用三元组索引，
+        直接在 history_text 上过滤（见 _search_filter）。
+        """
+        cursor.execute(
+            "SELECT name FROM sqlite_master WHERE type = 'table' "
+            "AND name IN ('history_fts', 'history_text', 'history_trigram')"
+        )
+        existing = {row[0] for row in cursor.fetchall()}
+        
+        # 触发器随索引结构变化，每次启动时重建以保证旧数据库也使用最新定义
+        for name in ('history_fts_insert', 'history_fts_delete', 'history_fts_update'):
+            cursor.execute(f'DROP TRIGGER IF EXISTS {name}')
+        
+        cursor.execute('''
+            CREATE TABLE IF NOT EXISTS history_text (
+                id INTEGER PRIMARY KEY,
+                body TEXT,
+                tags TEXT,
+                source TEXT
+            )
+        ''')
+        rebuild = 'history_text' not in existing
+        if rebuild:
+            if 'history_fts' in existing:
+                # 旧版本把纯文本保存在 unicode61 全文索引（history_fts）中：直接复制，
+                # 不必重新解压；该索引从未用于查询，只增加写入开销，迁移后删除
+                cursor.execute('''
+                    INSERT INTO history_text(id, body, tags, source)
+                    SELECT rowid, body, tags, source FROM history_fts
+                ''')
+                cursor.execute('DROP TABLE IF EXISTS history_trigram')
+                cursor.execute('DROP TABLE history_fts')
+            else:
+                cursor.execute('''
+                    INSERT INTO history_text(id, body, tags, source)
+                    SELECT id,
+                           clip_search_text(content, compressed, content_type),
+                           tags,
+                           clip_source_text(metadata)
+                    FROM clipboard_history
+                ''')
+        
+        cursor.execute('''
+            CREATE VIRTUAL TABLE IF NOT EXISTS history_trigram USING fts5(
+                body, tags, source,
+                content = 'history_text',
+                content_rowid = 'id',
+                tokenize = 'trigram'
+            )
+        ''')
+        
+        insert_sql = '''
+                INSERT INTO history_text(id, body, tags, source) VALUES (
+                    new.id,
+                    clip_search_text(new.content, new.compressed, new.content_type),
+                    new.tags,
+                    clip_source_text(new.metadata)
+                );
+                INSERT INTO history_trigram(rowid, body, tags, source)
+                SELECT id, body, tags, source FROM history_text WHERE id = new.id;
+        '''
+        # 外部内容表删除时必须提供原始值，因此先删三元组索引再删 history_text
+        delete_sql = '''
+                INSERT INTO history_trigram(history_trigram, rowid, body, tags, source)
+                SELECT 'delete', id, body, tags, source FROM history_text WHERE id = old.id;
+                DELETE FROM history_text WHERE id = old.id;
+        '''
+        cursor.execute(f'''
+            CREATE TRIGGER history_fts_insert
+            AFTER INSERT ON clipboard_history BEGIN
+                {insert_sql}
+            END
+        ''')
+        cursor.execute(f'''
+            CREATE TRIGGER history_fts_delete
+            AFTER DELETE ON clipboard_history BEGIN
+                {delete_sql}
+            END
+        ''')
+        cursor.execute(f'''
+            CREATE TRIGGER history_fts_update
+            AFTER UPDATE OF content, compressed, content_type, tags, metadata
+            ON clipboard_history BEGIN
+                {delete_sql}
+                {insert_sql}
+            END
+        ''')
+        
+        if rebuild:
+            cursor.execute("INSERT INTO history_trigram(history_trigram) VALUES ('rebuild')")
+            count = cursor.execute('SELECT COUNT(*) FROM history_text').fetchone()[0]
+            if count:
+                logger.info(f"已为 {count} 条历史记录建立全文索引")
+    
+    def add_item(self, item: ClipboardItem) -> bool:
+        """添加项目"""
+        written, _ = self.add_items([item])
+        return bool(written)
+
+    def add_items(self, items: List[ClipboardItem], max_history: int = None,
+                  max_bytes: int = 0, type_max_bytes: Dict[ContentType, int] = None,
+                  upsert: bool = True) -> Tuple[List[ClipboardItem], List[str]]:
+        """在一个事务中批量添加项目，并按需执行最大记录数和存储空间限制
+
+        upsert 为 False 时已存在的内容保持不变（导入时使用，不累加复制次数）。
+        返回 (成功写入的项目列表, 因超出限制被删除的 content_hash 列表)；
+        任一项目失败时整个批次回滚。
+        """
+        if not items:
+            return [], []
+        conn = self._get_connection()
+        try:
+            cursor = conn.cursor()
+            for item in items:
+                self._insert_item(cursor, item, upsert)
+            evicted = []
+            if max_history is not None:
+                evicted = self._evict_over_limit(cursor, max_history)
+            evicted += self._evict_over_budget(cursor, max_bytes, type_max_bytes)
+            conn.commit()
+            return list(items), evicted
+        except Exception as e:
+            conn.rollback()
+            logger.error(f"添加项目到数据库时发生错误: {str(e)}")
+            return [], []
+
+    def _insert_item(self, cursor: sqlite3.Cursor, item: ClipboardItem, upsert: bool = True):
+        """写入单个项目（不提交）
+
+        相同内容已存在时只更新时间并累加复制次数（保留 id、收藏和标签，
+        不重新压缩内容），并把数据库中的收藏、标签和次数同步回 item；
+        upsert 为 False 时已存在的内容不做任何修改。
+        """
+        if upsert:
+            cursor.execute('''
+                UPDATE clipboard_history 
+                SET timestamp = MAX(timestamp, ?), use_count = use_count + 1
+                WHERE content_hash = ?
+                RETURNING is_favorite, tags, use_count
+            ''', (item.timestamp.timestamp(), item.content_hash))
+        else:
+            cursor.execute(
+                'SELECT is_favorite, tags, use_count FROM clipboard_history WHERE content_hash = ?',
+                (item.content_hash,)
+            )
+        row = cursor.fetchone()
+        if row:
+            self._sync_existing(item, row)
+            return
+
+        # 二进制内容写入 blob 表
+        if item.data is not None:
+            self._store_blob(cursor, item.content, item.data)
+
+        # 压缩文本内容（blob 引用保持原样，触发器按类型和前缀识别）
+        content, compressed = item.content, CODEC_NONE
+        if item.data is None and item.blob_digest is None:
+            content, compressed = self.codec.encode(content)
+
+        metadata = json.dumps(item.metadata)
+        preview = item.summary_text()
+        stored_bytes = (
+            (len(content) if compressed else len(content.encode('utf-8')))
+            + len(metadata.encode('utf-8')) + len(preview.encode('utf-8'))
+            + len(item.thumbnail or b'') + len(item.data or b'')
+        )
+
+        cursor.execute('''
+            INSERT INTO clipboard_history 
+            (content_hash, content, content_type, timestamp, is_favorite, tags, metadata, 
+             compressed, preview, source, thumbnail, use_count, stored_bytes)
+            VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+            ON CONFLICT(content_hash) DO UPDATE SET 
+                timestamp = MAX(timestamp, excluded.timestamp),
+                use_count = use_count + 1
+            RETURNING is_favorite, tags, use_count
+        ''', (
+            item.content_hash,
+            content,
+            item.content_type.value,
+            item.timestamp.timestamp(),
+            1 if item.is_favorite else 0,
+            json.dumps(item.tags),
+            metadata,
+            compressed,
+            preview,
+            json.dumps(item.metadata.get('source', {})),
+            item.thumbnail,
+            item.use_count,
+            stored_bytes
+        ))
+        self._sync_existing(item, cursor.fetchone())
+
+    @staticmethod
+    def _sync_existing(item: ClipboardItem, row):
+        """用数据库中的收藏、标签和复制次数更新 item"""
+        item.is_favorite = bool(row['is_favorite'])
+        item.tags = json.loads(row['tags'] or '[]')
+        item.use_count = row['use_count']
+
+    def _delete_selected(self, cursor: sqlite3.Cursor, where: str, params=()) -> List[str]:
+        """删除满足条件的行（不提交），返回被删除的 content_hash 列表"""
+        cursor.execute(f'SELECT id, content_hash FROM clipboard_history WHERE {where}', params)
+        rows = cursor.fetchall()
+        if rows:
+            cursor.executemany(
+                'DELETE FROM clipboard_history WHERE id = ?',
+                [(row['id'],) for row in rows]
+            )
+        return [row['content_hash'] for row in rows]
+
+    def _evict_over_limit(self, cursor: sqlite3.Cursor, max_history: int) -> List[str]:
+        """删除超出最大记录数的最旧非收藏项目（不提交），返回被删除的 content_hash"""
+        excess = self._totals(cursor)[0] - max_history
+        if excess <= 0:
+            return []
+        return self._delete_selected(
+            cursor, 'is_favorite = 0 ORDER BY timestamp ASC LIMIT ?', (excess,)
+        )
+
+    def _evict_over_budget(self, cursor: sqlite3.Cursor, max_bytes: int = 0,
+                           type_max_bytes: Dict[ContentType, int] = None) -> List[str]:
+        """删除非收藏项目直到占用空间回到预算内（不提交），返回被删除的 content_hash
+
+        先检查各内容类型的预算，再检查总预算（0 表示不限制）。按 存在时长 × 大小
+        从高到低淘汰，又大又旧的项目最先删除，刚复制的大项目排在最后；
+        图片的二进制内容由触发器随记录一起删除，缩略图保存在记录行中。
+        """
+        budgets = [(content_type, budget) for content_type, budget in (type_max_bytes or {}).items()
+                   if budget > 0]
+        if max_bytes > 0:
+            budgets.append((None, max_bytes))
+        
+        removed = []
+        now = datetime.now().timestamp()
+        for content_type, budget in budgets:
+            excess = self._totals(cursor, content_type)[1] - budget
+            if excess <= 0:
+                continue
+            type_clause = ''
+            params = [now]
+            if content_type is not None:
+                type_clause = 'AND content_type = ?'
+                params.append(content_type.value)
+            params.append(excess)
+            removed += self._delete_selected(cursor, f'''
+                id IN (
+                    SELECT id FROM (
+                        SELECT id, stored_bytes, SUM(stored_bytes) OVER (
+                            ORDER BY (MAX(? - timestamp, 0) + 1) * stored_bytes DESC, timestamp ASC
+                            ROWS UNBOUNDED PRECEDING
+                        ) AS freed
+                        FROM clipboard_history WHERE is_favorite = 0 {type_clause}
+                    ) WHERE freed - stored_bytes < ?
+                )
+            ''', params)
+        return removed
+
+    def enforce_max_limit(self, max_history: int, max_bytes: int = 0,
+                          type_max_bytes: Dict[ContentType, int] = None) -> List[str]:
+        """强制执行最大记录数和存储空间限制，返回被删除的 content_hash"""
+        try:
+            conn = self._get_connection()
+            cursor = conn.cursor()
+            removed = self._evict_over_limit(cursor, max_history)
+            removed += self._evict_over_budget(cursor, max_bytes, type_max_bytes)
+            conn.commit()
+            return removed
+        except Exception as e:
+            logger.error(f"强制执行最大限制时发生错误: {str(e)}")
+            return []
+    
+    def _list_query(self, search_text: str = None, favorites_only: bool = False,
+                    after: Optional['HistoryCursor'] = None, columns: str = 'h.*'):
+        """构造列表查询（不含 LIMIT），返回 (SQL, 参数, 是否按相关度排序)
+
+        有搜索词时走三元组索引并按 BM25 排序；否则按
+        (is_favorite, timestamp, id) 倒序，after 不为空时从该游标之后继续（keyset 分页）。
+        搜索词全部是 1-2 个字符的短词时没有索引可用，沿列表顺序的索引逐行匹配，
+        常见的词取够一页即停止，最坏情况扫描全部记录（受 max_history 限制）。
+        """
+        match, clauses, params = _search_filter(search_text or '')
+        short_terms = bool(clauses)
+        if favorites_only:
+            clauses.append('h.is_favorite = 1')
+        if match:
+            # 所有匹配都参与排序：记录数受 max_history 限制，BM25 的开销有上限
+            text_join = ' JOIN history_text s ON s.id = h.id' if short_terms else ''
+            # 正文、标签、来源的权重；bm25 越小越相关，常复制的内容相关度适当提高
+            query = f'''
+                SELECT {columns} FROM history_trigram
+                JOIN clipboard_history h ON h.id = history_trigram.rowid{text_join}
+                WHERE history_trigram MATCH ?{''.join(f' AND {clause}' for clause in clauses)}
+                ORDER BY bm25(history_trigram, 1.0, 2.0, 0.5)
+                         * (1.0 + 0.1 * MIN(h.use_count - 1, 10)), h.timestamp DESC
+            '''
+            return query, [match] + params, True
+        
+        query = f'SELECT {columns} FROM clipboard_history h'
+        if short_terms:
+            query += ' JOIN history_text s ON s.id = h.id'
+        query += ' WHERE 1=1'
+        for clause in clauses:
+            query += f' AND {clause}'
+        if after is not None:
+            query += ' AND (h.is_favorite, h.timestamp, h.id) < (?, ?, ?)'
+            params.extend([after.is_favorite, after.timestamp, after.row_id])
+        query += ' ORDER BY h.is_favorite DESC, h.timestamp DESC, h.id DESC'
+        return query, params, False
+    
     def get_items(self, limit: int = 100, offset: int = 0, 
                   search_text: str = None, favorites_only: bool = False) -> List[ClipboardItem]:
-        """获取项目列表"""
+        """获取项目列表（有搜索词时使用全文/三元组索引，按 BM25 相关度排序）"""
         try:
             conn = self._get_connection()
             cursor = conn.cursor()
             
-            query = 'SELECT * FROM clipboard_history WHERE 1=1'
-            params = []
-            
-            if favorites_only:
-                query += ' AND is_favorite = 1'
+            query, params, _ = self._list_query(search_text, favorites_only)
+            query += ' LIMIT ? OFFSET ?'
+            params.extend([limit, offset])
             
-            if search_text:
-                query += ' AND content LIKE ?'
-                params.append(f'%{search_text}%')
+            cursor.execute(query, params)
+            return [self._row_to_item(row) for row in cursor.fetchall()]
+        except Exception as e:
+            logger.error(f"从数据库获取项目时发生错误: {str(e)}")
+            return []
+    
+    def get_page(self, limit: int = 100, after: Optional['HistoryCursor'] = None,
+                 search_text: str = None, favorites_only: bool = False
+                 ) -> Tuple[List[ClipboardListRow], Optional['HistoryCursor']]:
+        """按游标获取一页列表行，返回 (列表行, 下一页游标)；没有更多数据时游标为 None
+
+        普通列表使用 keyset 分页，每页都只走一次索引范围扫描；搜索结果按相关度
+        排序，需要先求出全部匹配项，因此游标记录的是偏移量。只读取预览等投影列，
+        完整内容通过 get_item 按需获取。
+        """
+        try:
+            conn = self._get_connection()
+            cursor = conn.cursor()
             
-            query += ' ORDER BY is_favorite DESC, timestamp DESC LIMIT ? OFFSET ?'
-            params.extend([limit, offset])
+            query, params, ranked = self._list_query(
+                search_text, favorites_only, after, columns=self._LIST_COLUMNS
+            )
+            query += ' LIMIT ?'
+            params.append(limit)
+            if ranked:
+                query += ' OFFSET ?'
+                params.append(after.offset if after else 0)
             
             cursor.execute(query, params)
             rows = cursor.fetchall()
+            items = [self._row_to_list_row(row) for row in rows]
             
-            items = []
-            for row in rows:
-                content = row['content']
-                if row['compressed']:
-                    content = gzip.decompress(content).decode('utf-8')
-                
-                items.append(ClipboardItem(
-                    content=content,
-                    timestamp=datetime.fromtimestamp(row['timestamp']),
-                    content_type=ContentType(row['content_type']),
+            if len(rows) < limit:
+                return items, None
+            if ranked:
+                return items, HistoryCursor(offset=(after.offset if after else 0) + len(rows))
+            last = rows[-1]
+            return items, HistoryCursor(last['is_favorite'], last['timestamp'], last['id'])
+        except Exception as e:
+            logger.error(f"分页获取项目时发生错误: {str(e)}")
+            return [], None
+    
+    def get_item(self, content_hash: str) -> Optional[ClipboardItem]:
+        """按 content_hash 获取完整项目"""
+        try:
+            cursor = self._get_connection().cursor()
+            cursor.execute(
+                'SELECT * FROM clipboard_history WHERE content_hash = ?', (content_hash,)
+            )
+            row = cursor.fetchone()
+            return self._row_to_item(row) if row else None
+        except Exception as e:
+            logger.error(f"获取项目时发生错误: {str(e)}")
+            return None
+    
+    def get_texts(self, limit: int = 100,
+                  content_hashes: Optional[List[str]] = None) -> List[ClipboardText]:
+        """获取文本记录（只解压正文，不解析标签和元数据），收藏在前、最新在前
+
+        content_hashes 不为空时只返回这些记录。
+        """
+        try:
+            query = '''
+                SELECT content_hash, content, compressed, is_favorite
+                FROM clipboard_history WHERE content_type = ?
+            '''
+            params = [ContentType.TEXT.value]
+            if content_hashes is not None:
+                query += f' AND content_hash IN ({", ".join("?" * len(content_hashes))})'
+                params.extend(content_hashes)
+            query += ' ORDER BY is_favorite DESC, timestamp DESC, id DESC LIMIT ?'
+            params.append(limit)
+            cursor = self._get_connection().cursor()
+            cursor.execute(query, params)
+            return [
+                ClipboardText(
                     content_hash=row['content_hash'],
-                    is_favorite=bool(row['is_favorite']),
-                    tags=json.loads(row['tags']),
-                    metadata=json.loads(row['metadata'])
-                ))
-            
-            return items
+                    text=self.codec.decode(row['content'], row['compressed']),
+                    is_favorite=bool(row['is_favorite'])
+                )
+                for row in cursor.fetchall()
+            ]
         except Exception as e:
-            logger.error(f"从数据库获取项目时发生错误: {str(e)}")
+            logger.error(f"获取文本记录时发生错误: {str(e)}")
+            return []
+    
+    def get_blob(self, content_hash: str) -> Optional[bytes]:
+        """按 content_hash 读取项目的二进制内容（原始字节，无需 base64 解码）"""
+        try:
+            cursor = self._get_connection().cursor()
+            cursor.execute('''
+                SELECT b.data FROM clipboard_history h
+                JOIN clipboard_blobs b ON b.digest = substr(h.content, 6)
+                WHERE h.content_hash = ? AND h.content_type = ? AND h.content LIKE 'blob:%'
+            ''', (content_hash, ContentType.IMAGE.value))
+            row = cursor.fetchone()
+            return row[0] if row else None
+        except Exception as e:
+            logger.error(f"读取二进制内容时发生错误: {str(e)}")
+            return None
+    
+    def missing_thumbnails(self, limit: int = 20) -> List[Tuple[str, bytes]]:
+        """返回尚未生成缩略图的图片 (content_hash, 原始字节)"""
+        try:
+            cursor = self._get_connection().cursor()
+            cursor.execute('''
+                SELECT h.content_hash, b.data FROM clipboard_history h
+                JOIN clipboard_blobs b ON b.digest = substr(h.content, 6)
+                WHERE h.content_type = ? AND h.thumbnail IS NULL AND h.content LIKE 'blob:%'
+                LIMIT ?
+            ''', (ContentType.IMAGE.value, limit))
+            return [(row[0], row[1]) for row in cursor.fetchall()]
+        except Exception as e:
+            logger.error(f"查询缺少缩略图的项目时发生错误: {str(e)}")
             return []
     
+    def set_thumbnails(self, thumbnails: List[Tuple[str, bytes]]) -> bool:
+        """批量保存缩略图 (content_hash, 缩略图字节)"""
+        conn = self._get_connection()
+        try:
+            conn.executemany('''
+                UPDATE clipboard_history 
+                SET stored_bytes = stored_bytes - COALESCE(length(thumbnail), 0) + length(?),
+                    thumbnail = ?
+                WHERE content_hash = ?
+            ''', [(thumb, thumb, content_hash) for content_hash, thumb in thumbnails])
+            conn.commit()
+            return True
+        except Exception as e:
+            conn.rollback()
+            logger.error(f"保存缩略图时发生错误: {str(e)}")
+            return False
+    
+    @staticmethod
+    def _row_to_list_row(row: sqlite3.Row) -> ClipboardListRow:
+        """投影查询结果转换为 ClipboardListRow"""
+        return ClipboardListRow(
+            content_hash=row['content_hash'],
+            timestamp=datetime.fromtimestamp(row['timestamp']),
+            content_type=ContentType(row['content_type']),
+            is_favorite=bool(row['is_favorite']),
+            preview=row['preview'] or '',
+            source=json.loads(row['source'] or '{}'),
+            thumbnail=row['thumbnail']
+        )
+    
+    def _row_to_item(self, row: sqlite3.Row) -> ClipboardItem:
+        """数据库行转换为 ClipboardItem（内容解压和 JSON 解析推迟到第一次访问）"""
+        keys = row.keys()
+        return ClipboardItem.from_stored(
+            row['content'], self.codec.decode, row['compressed'],
+            timestamp=datetime.fromtimestamp(row['timestamp']),
+            content_type=ContentType(row['content_type']),
+            content_hash=row['content_hash'],
+            is_favorite=bool(row['is_favorite']),
+            raw_tags=row['tags'],
+            raw_metadata=row['metadata'],
+            thumbnail=row['thumbnail'] if 'thumbnail' in keys else None,
+            use_count=row['use_count'] if 'use_count' in keys else 1
+        )
+    
     def delete_item(self, content_hash: str) -> bool:
         """删除项目"""
         try:
@@ -192,8 +1044,8 @@ class DatabaseManager:
             logger.error(f"清空历史记录时发生错误: {str(e)}")
             return False
     
-    def toggle_favorite(self, content_hash: str) -> bool:
-        """切换收藏状态"""
+    def toggle_favorite(self, content_hash: str) -> Optional[bool]:
+        """切换收藏状态，返回新的收藏状态；项目不存在时返回 None"""
         try:
             conn = self._get_connection()
             cursor = conn.cursor()
@@ -202,16 +1054,24 @@ class DatabaseManager:
                 SET is_favorite = CASE WHEN is_favorite = 1 THEN 0 ELSE 1 END
                 WHERE content_hash = ?
             ''', (content_hash,))
+            if cursor.rowcount == 0:
+                conn.commit()
+                return None
+            cursor.execute(
+                'SELECT is_favorite FROM clipboard_history WHERE content_hash = ?',
+                (content_hash,)
+            )
+            is_favorite = bool(cursor.fetchone()[0])
             conn.commit()
-            return cursor.rowcount > 0
+            return is_favorite
         except Exception as e:
             logger.error(f"切换收藏状态时发生错误: {str(e)}")
-            return False
+            return None
     
-    def clean_expired(self, days: int) -> int:
-        """清理过期记录"""
+    def clean_expired(self, days: int) -> List[str]:
+        """清理过期记录，返回被删除的 content_hash"""
         if days <= 0:
-            return 0
+            return []
         
         try:
             conn = self._get_connection()
@@ -219,33 +1079,79 @@ class DatabaseManager:
             
             cutoff_time = (datetime.now() - timedelta(days=days)).timestamp()
             
-            cursor.execute('''
-                DELETE FROM clipboard_history 
-                WHERE timestamp < ? AND is_favorite = 0
-            ''', (cutoff_time,))
+            removed = self._delete_selected(
+                cursor, 'timestamp < ? AND is_favorite = 0', (cutoff_time,)
+            )
             
             conn.commit()
-            return cursor.rowcount
+            return removed
         except Exception as e:
             logger.error(f"清理过期记录时发生错误: {str(e)}")
+            return []
+    
+    @staticmethod
+    def _totals(cursor: sqlite3.Cursor, content_type: Optional[ContentType] = None,
+                favorites_only: bool = False) -> Tuple[int, int]:
+        """从计数表读取 (记录数, 占用字节数)"""
+        query = 'SELECT COALESCE(SUM(count), 0), COALESCE(SUM(bytes), 0) FROM history_counts WHERE 1=1'
+        params = []
+        if content_type is not None:
+            query += ' AND content_type = ?'
+            params.append(content_type.value)
+        if favorites_only:
+            query += ' AND is_favorite = 1'
+        cursor.execute(query, params)
+        count, stored_bytes = cursor.fetchone()
+        return count, stored_bytes
+    
+    def get_count(self, content_type: Optional[ContentType] = None,
+                  favorites_only: bool = False) -> int:
+        """获取记录数（可按内容类型、收藏筛选）"""
+        try:
+            return self._totals(self._get_connection().cursor(), content_type, favorites_only)[0]
+        except Exception as e:
+            logger.error(f"获取记录数时发生错误: {str(e)}")
+            return 0
+    
+    def get_stored_bytes(self, content_type: Optional[ContentType] = None) -> int:
+        """获取历史记录占用的字节数（可按内容类型筛选）"""
+        try:
+            return self._totals(self._get_connection().cursor(), content_type)[1]
+        except Exception as e:
+            logger.error(f"获取占用空间时发生错误: {str(e)}")
             return 0
     
-    def get_count(self) -> int:
-        """获取记录总数"""
+    def reclaim_space(self, max_pages: int = _VACUUM_PAGES) -> int:
+        """增量 VACUUM：把空闲页归还给文件系统，返回归还的页数"""
+        if not self.incremental_vacuum:
+            return 0
         try:
             conn = self._get_connection()
-            cursor = conn.cursor()
-            cursor.execute('SELECT COUNT(*) FROM clipboard_history')
-            return cursor.fetchone()[0]
+            free_pages = conn.execute('PRAGMA freelist_count').fetchone()[0]
+            pages = min(free_pages, max_pages)
+            if pages > 0:
+                # execute() 只单步执行一次（只归还一页），executescript 会执行到结束
+                conn.executescript(f'PRAGMA incremental_vacuum({pages})')
+            return pages
         except Exception as e:
-            logger.error(f"获取记录数时发生错误: {str(e)}")
+            logger.warning(f"增量 VACUUM 失败: {str(e)}")
             return 0
     
     def export_to_json(self, file_path: str) -> bool:
         """导出到JSON文件"""
         try:
             items = self.get_items(limit=10000)
-            data = [item.to_dict() for item in items]
+            data = []
+            for item in items:
+                item_data = item.to_dict()
+                if item.blob_digest:
+                    # 导出文件需自包含：二进制内容以内联 base64 写出
+                    blob = self.get_blob(item.content_hash)
+                    if blob is None:
+                        continue
+                    mime = f"image/{item.metadata.get('format', 'jpeg')}"
+                    item_data['content'] = f"data:{mime};base64,{base64.b64encode(blob).decode('ascii')}"
+                data.append(item_data)
             
             with open(file_path, 'w', encoding='utf-8') as f:
                 json.dump(data, f, ensure_ascii=False, indent=2)
@@ -261,14 +1167,39 @@ class DatabaseManager:
             with open(file_path, 'r', encoding='utf-8') as f:
                 data = json.load(f)
             
+            items = []
             for item_data in data:
                 try:
                     item = ClipboardItem.from_dict(item_data)
-                    self.add_item(item)
+                    if item.content_type == ContentType.IMAGE:
+                        blob = _decode_data_uri(item.content)
+                        if blob is not None:
+                            item = ClipboardItem(
+                                content='', timestamp=item.timestamp,
+                                content_type=item.content_type, is_favorite=item.is_favorite,
+                                tags=item.tags, metadata=item.metadata, data=blob
+                            )
+                    items.append(item)
                 except Exception as e:
                     logger.warning(f"跳过无效项目: {str(e)}")
                     continue
             
+            # 批量写入，避免每个项目单独提交；已存在的内容保持原样
+            failed = 0
+            for i in range(0, len(items), 500):
+                batch = items[i:i + 500]
+                written, _ = self.add_items(batch, upsert=False)
+                if written:
+                    continue
+                # 批次已整体回滚：逐条重试，只丢弃写不进去的项目
+                for item in batch:
+                    written, _ = self.add_items([item], upsert=False)
+                    if not written:
+                        failed += 1
+            
+            if failed:
+                logger.error(f"导入时有 {failed}/{len(items)} 个项目写入失败")
+                return False
             return True
         except Exception as e:
             logger.error(f"从JSON导入时发生错误: {str(e)}")
@@ -278,17 +1209,43 @@ class DatabaseManager:
 class ClipboardService(QObject):
     """优化的剪贴板服务类"""
     
-    history_changed = pyqtSignal()
+    history_changed = pyqtSignal()  # 批量变化（清空、导入等），需要整体刷新
     item_added = pyqtSignal(object)  # ClipboardItem
+    items_removed = pyqtSignal(list)  # 被删除/淘汰的 content_hash 列表
+    favorite_changed = pyqtSignal(str, bool)  # content_hash, 新的收藏状态
+    _items_committed = pyqtSignal(list, list)  # 写入线程 -> GUI 线程
+    _image_ready = pyqtSignal(object)  # 图片处理线程 -> GUI 线程
+    page_loaded = pyqtSignal(int, list, object)  # 请求令牌, 项目列表, 下一页游标
     
     def __init__(self):
         super().__init__()
-        self.db = DatabaseManager(str(Settings.DATA_DIR / "clipboard.db"))
+        self.db = DatabaseManager(str(Settings.DATA_DIR / "clipboard.db"), codec=ContentCodec(
+            codec=Settings.get("compression_codec", "auto"),
+            level=Settings.get("compression_level", 0),
+            threshold=Settings.get("compression_threshold", 32),
+        ))
         self.max_history = Settings.get("max_history", 1000)
         self.retention_days = Settings.get("retention_days", 30)
+        self.max_bytes, self.type_max_bytes = self._load_byte_budget()
         self._last_content_hash = None
-        self._batch_timer = None
-        self._pending_items = []
+        
+        # 后台批量写入线程：捕获只入队，写入完成后经信号回到 GUI 线程
+        self._items_committed.connect(self._on_items_committed)
+        self._writer = HistoryWriter(
+            self.db,
+            on_committed=self._items_committed.emit,
+            get_max_history=lambda: self.max_history,
+            get_byte_budget=lambda: (self.max_bytes, self.type_max_bytes),
+            on_backfilled=self.history_changed.emit,
+        )
+        self._writer.start()
+        
+        # 后台图片处理：缩放、编码、摘要不占用 GUI 线程
+        self._image_ready.connect(self._submit_item)
+        self._image_pipeline = ImageCapturePipeline(on_ready=self._image_ready.emit)
+        
+        # 后台读取线程：分页加载不占用 GUI 线程（WAL 模式下与写入互不阻塞）
+        self._reader = ThreadPoolExecutor(max_workers=1, thread_name_prefix="HistoryReader")
         
         # 清理过期记录
         self._clean_expired_items()
@@ -301,79 +1258,128 @@ class ClipboardService(QObject):
         self._cleanup_timer = QTimer(self)
         self._cleanup_timer.timeout.connect(self._clean_expired_items)
         self._cleanup_timer.start(3600000)  # 每小时检查一次
+        
+        # 定期归还空闲页并执行 WAL 检查点，防止数据库和 WAL 文件在长时间运行时持续增长
+        self._checkpoint_timer = QTimer(self)
+        self._checkpoint_timer.timeout.connect(self._maintain_db)
+        self._checkpoint_timer.start(600000)  # 每10分钟一次
+    
+    def _maintain_db(self):
+        """增量 VACUUM 后执行 WAL 检查点"""
+        pages = self.db.reclaim_space()
+        if pages:
+            logger.debug(f"已归还 {pages} 个空闲数据库页")
+        self.db.checkpoint()
+    
+    @staticmethod
+    def _load_byte_budget() -> Tuple[int, Dict[ContentType, int]]:
+        """读取存储空间预算（设置中以 MB 为单位，0 表示不限制）"""
+        max_bytes = int(Settings.get("max_storage_mb", 0) or 0) * 1024 * 1024
+        type_max_bytes = {}
+        for key, megabytes in (Settings.get("type_storage_mb", {}) or {}).items():
+            try:
+                content_type = ContentType(key)
+            except ValueError:
+                logger.warning(f"忽略未知内容类型的存储空间预算: {key}")
+                continue
+            if megabytes:
+                type_max_bytes[content_type] = int(megabytes) * 1024 * 1024
+        return max_bytes, type_max_bytes
     
     def _clean_expired_items(self):
         """清理过期记录"""
         if self.retention_days > 0:
             removed = self.db.clean_expired(self.retention_days)
-            if removed > 0:
-                logger.info(f"已清理 {removed} 条过期历史记录")
-                self.history_changed.emit()
+            if removed:
+                logger.info(f"已清理 {len(removed)} 条过期历史记录")
+                self.items_removed.emit(removed)
     
     def add_item(self, content: str, content_type: ContentType = ContentType.TEXT,
-                 metadata: dict = None) -> bool:
-        """添加项目到历史记录"""
+                 metadata: dict = None, data: bytes = None) -> bool:
+        """添加项目到历史记录
+
+        data 为图片等二进制内容的原始字节，此时 content 可为空，
+        由内容摘要生成 blob 引用。
+        """
         try:
             # 如果内容为空，则忽略
-            if not content or (isinstance(content, str) and content.isspace()):
+            if data is None and (not content or (isinstance(content, str) and content.isspace())):
+                return False
+            if data is not None and not data:
                 return False
             
             # 创建新项目
             new_item = ClipboardItem(
-                content=content,
+                content='' if data is not None else content,
                 timestamp=datetime.now(),
                 content_type=content_type,
-                metadata=metadata or {}
+                metadata=metadata or {},
+                data=data
             )
-            
-            # 检查是否与上次内容相同（避免重复）
-            if new_item.content_hash == self._last_content_hash:
-                return False
-            
-            self._last_content_hash = new_item.content_hash
-            
-            # 添加到数据库
-            if self.db.add_item(new_item):
-                # 检查并限制总数
-                self._enforce_max_limit()
-                
-                self.item_added.emit(new_item)
-                self.history_changed.emit()
-                
-                logger.debug(f"已添加新项目: {new_item.preview_text(30)}")
-                return True
-            
-            return False
+            return self._submit_item(new_item)
             
         except Exception as e:
             logger.error(f"添加项目到历史记录时发生错误: {str(e)}")
             return False
     
-    def _enforce_max_limit(self):
-        """强制执行最大记录数限制"""
+    def remember_image(self, image: QImage):
+        """记录放回剪贴板的图片，之后再次捕获到同一张图片时不重复写入"""
+        self._image_pipeline.remember(image)
+    
+    def add_image(self, image: QImage, metadata: dict = None,
+                  skip_if_unchanged: bool = False) -> bool:
+        """添加剪贴板图片：交给后台管线处理，完成后再写入历史记录
+
+        skip_if_unchanged 时，像素与上一张图片完全相同则不写入（由管线计算完整摘要后判断）。
+        """
         try:
-            count = self.db.get_count()
-            if count > self.max_history:
-                # 获取需要删除的项目
-                excess = count - self.max_history
-                conn = self.db._get_connection()
-                cursor = conn.cursor()
-                
-                # 删除最旧的非收藏项目
-                cursor.execute('''
-                    DELETE FROM clipboard_history 
-                    WHERE id IN (
-                        SELECT id FROM clipboard_history 
-                        WHERE is_favorite = 0 
-                        ORDER BY timestamp ASC 
-                        LIMIT ?
-                    )
-                ''', (excess,))
-                
-                conn.commit()
-                logger.info(f"已删除 {cursor.rowcount} 条旧记录以限制总数")
+            return self._image_pipeline.submit(image, metadata, skip_if_unchanged)
         except Exception as e:
-            logger.error(f"强制执行最大限制时发生错误: {str(e)}")
+            logger.error(f"提交图片时发生错误: {str(e)}")
+            return False
+    
+    def _submit_item(self, new_item: ClipboardItem) -> bool:
+        """去重后交给写入线程批量落盘"""
+        # 检查是否与上次内容相同（避免重复）
+        if new_item.content_hash == self._last_content_hash:
+            return False
+        
+        self._last_content_hash = new_item.content_hash
+        
+        if self._writer.submit(new_item):
+            logger.debug(f"已提交新项目: {new_item.preview_text(30)}")
+            return True
+        
+        return False
+    
+    def _on_items_committed(self, items: list, evicted: list):
+        """一批项目已写入数据库（GUI 线程）"""
+        for item in items:
+            self.item_added.emit(item)
+        if evicted:
+            self.items_removed.emit(evicted)
+        logger.debug(f"已写入 {len(items)} 个新项目，淘汰 {len(evicted)} 个旧项目")
+    
+    def flush(self, timeout: float = None) -> bool:
+        """等待写入线程写完所有已提交的项目"""
+        return self._writer.flush(timeout)
+    
+    def shutdown(self):
+        """停止写入线程并关闭数据库连接"""
+        self._checkpoint_timer.stop()
+        self._reader.shutdown(wait=True, cancel_futures=True)
+        self._image_pipeline.shutdown()
+        # 处理完的图片经排队信号交回，写入线程停止前先投递
+        QApplication.sendPostedEvents()
+        self._writer.stop()
+        self.db.close_all()
+    
+    def _enforce_max_limit(self):
+        """强制执行最大记录数和存储空间限制"""
+        removed = self.db.enforce_max_limit(self.max_history, self.max_bytes, self.type_max_bytes)
+        if removed:
+            logger.info(f"已删除 {len(removed)} 条旧记录以限制总数")
+            self.items_removed.emit(removed)
     
     def clear_history(self, keep_favorites: bool = True) -> bool:
         """清空历史记录"""
@@ -392,7 +1398,7 @@ class ClipboardService(QObject):
         try:
             result = self.db.delete_item(content_hash)
             if result:
-                self.history_changed.emit()
+                self.items_removed.emit([content_hash])
                 logger.debug(f"已删除项目: {content_hash}")
             return result
         except Exception as e:
@@ -402,11 +1408,12 @@ class ClipboardService(QObject):
     def toggle_favorite(self, content_hash: str) -> bool:
         """切换收藏状态"""
         try:
-            result = self.db.toggle_favorite(content_hash)
-            if result:
-                self.history_changed.emit()
-                logger.debug(f"已切换收藏状态: {content_hash}")
-            return result
+            is_favorite = self.db.toggle_favorite(content_hash)
+            if is_favorite is None:
+                return False
+            self.favorite_changed.emit(content_hash, is_favorite)
+            logger.debug(f"已切换收藏状态: {content_hash}")
+            return True
         except Exception as e:
             logger.error(f"切换收藏状态时发生错误: {str(e)}")
             return False
@@ -416,9 +1423,46 @@ class ClipboardService(QObject):
         """获取历史记录"""
         return self.db.get_items(limit, offset, search_text, favorites_only)
     
-    def get_count(self) -> int:
-        """获取记录总数"""
-        return self.db.get_count()
+    def get_page(self, limit: int = 100, after: Optional[HistoryCursor] = None,
+                 search_text: str = None, favorites_only: bool = False
+                 ) -> Tuple[List[ClipboardListRow], Optional[HistoryCursor]]:
+        """按游标获取一页历史记录（列表行，不含完整内容）"""
+        return self.db.get_page(limit, after, search_text, favorites_only)
+    
+    def get_item(self, content_hash: str) -> Optional[ClipboardItem]:
+        """按 content_hash 获取完整项目"""
+        return self.db.get_item(content_hash)
+    
+    def get_texts(self, limit: int = 100,
+                  content_hashes: Optional[List[str]] = None) -> List[ClipboardText]:
+        """获取文本记录（只含正文），供本地预测使用"""
+        return self.db.get_texts(limit, content_hashes)
+    
+    def get_blob(self, content_hash: str) -> Optional[bytes]:
+        """按 content_hash 读取项目的二进制内容"""
+        return self.db.get_blob(content_hash)
+    
+    def request_page(self, token: int, limit: int = 100, after: Optional[HistoryCursor] = None,
+                     search_text: str = None, favorites_only: bool = False):
+        """在后台读取线程中获取一页历史记录，完成后发出 page_loaded(token, 列表行, 下一页游标)"""
+        def _load():
+            items, next_cursor = self.db.get_page(limit, after, search_text, favorites_only)
+            self.page_loaded.emit(token, items, next_cursor)
+        
+        try:
+            self._reader.submit(_load)
+        except RuntimeError:
+            # 读取线程已关闭（程序退出中）
+            pass
+    
+    def get_count(self, content_type: Optional[ContentType] = None,
+                  favorites_only: bool = False) -> int:
+        """获取记录数（可按内容类型、收藏筛选）"""
+        return self.db.get_count(content_type, favorites_only)
+    
+    def get_stored_bytes(self, content_type: Optional[ContentType] = None) -> int:
+        """获取历史记录占用的字节数"""
+        return self.db.get_stored_bytes(content_type)
     
     def set_max_history(self, max_history: int):
         """设置最大历史记录数"""
@@ -427,6 +1471,15 @@ class ClipboardService(QObject):
         self._enforce_max_limit()
         logger.info(f"已设置最大历史记录数为 {self.max_history}")
     
+    def set_storage_budget(self, max_storage_mb: int, type_storage_mb: Dict[str, int] = None):
+        """设置存储空间上限（MB，0 表示不限制），type_storage_mb 按内容类型单独限制"""
+        Settings.set("max_storage_mb", max(0, max_storage_mb))
+        if type_storage_mb is not None:
+            Settings.set("type_storage_mb", dict(type_storage_mb))
+        self.max_bytes, self.type_max_bytes = self._load_byte_budget()
+        self._enforce_max_limit()
+        logger.info(f"已设置存储空间上限为 {Settings.get('max_storage_mb', 0)} MB")
+    
     def set_retention_days(self, days: int):
         """设置历史记录保留天数"""
         self.retention_days = max(0, days)
@@ -449,9 +1502,10 @@ class ClipboardService(QObject):
         """从文件导入历史记录"""
         try:
             result = self.db.import_from_json(file_path)
+            # 部分失败时其余批次已经写入，同样需要限制数量并刷新列表
+            self._enforce_max_limit()
+            self.history_changed.emit()
             if result:
-                self._enforce_max_limit()
-                self.history_changed.emit()
                 logger.info(f"已从 {file_path} 导入历史记录")
             return result
         except Exception as e:
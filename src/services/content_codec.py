@@ -0,0 +1,152 @@
+import gzip
+import threading
+import zlib
+from typing import Dict, List, Optional, Tuple, Union
+
+from utils.logger import logger
+
+try:
+    import zstandard
+    _ZSTD_AVAILABLE = True
+except ImportError:
+    zstandard = None
+    _ZSTD_AVAILABLE = False
+
+
+# clipboard_history.compressed 列保存的编码方式
+CODEC_NONE = 0
+CODEC_GZIP = 1              # 旧版本写入的 gzip，只用于读取
+CODEC_ZLIB = 2
+CODEC_ZSTD = 3              # 使用字典时字典 ID 记录在 zstd 帧头中
+
+CODEC_NAMES = {CODEC_NONE: 'none', CODEC_GZIP: 'gzip', CODEC_ZLIB: 'zlib', CODEC_ZSTD: 'zstd'}
+
+_DEFAULT_THRESHOLD = 32     # 小于该字节数的内容不压缩
+_DEFAULT_LEVELS = {CODEC_ZLIB: 6, CODEC_ZSTD: 3}
+_DICT_SIZE = 32 * 1024      # 训练字典的大小
+
+
+def zstd_available() -> bool:
+    return _ZSTD_AVAILABLE
+
+
+class ContentCodec:
+    """历史记录内容的压缩编解码
+
+    有 zstandard 时使用 zstd，可加载从历史记录训练出的字典——剪贴板内容大多是
+    URL、路径、代码片段等短小而重复的文本，单独压缩效果很差，共享字典后短文本
+    也能压缩；没有 zstandard 时退回 zlib。只有压缩后确实变小时才保存压缩结果。
+
+    decode 支持所有编码方式，旧版本 gzip 压缩的记录和换用其他编码后写入的记录
+    可以混合存放。zstd 压缩/解压对象不能跨线程共享，按线程缓存。
+    """
+
+    def __init__(self, codec: str = 'auto', level: int = 0,
+                 threshold: int = _DEFAULT_THRESHOLD):
+        if codec == 'zstd' and not _ZSTD_AVAILABLE:
+            logger.warning("未安装 zstandard，内容压缩改用 zlib")
+        if codec in ('auto', 'zstd') and _ZSTD_AVAILABLE:
+            self.codec = CODEC_ZSTD
+        elif codec == 'none':
+            self.codec = CODEC_NONE
+        else:
+            self.codec = CODEC_ZLIB
+        self.level = level or _DEFAULT_LEVELS.get(self.codec, 0)
+        self.threshold = max(threshold, 1)
+        self._dictionaries: Dict[int, bytes] = {}
+        self._active_dict_id = 0
+        self._local = threading.local()
+
+    @property
+    def name(self) -> str:
+        return CODEC_NAMES[self.codec]
+
+    @property
+    def active_dict_id(self) -> int:
+        return self._active_dict_id
+
+    @property
+    def supports_dictionary(self) -> bool:
+        return self.codec == CODEC_ZSTD
+
+    def load_dictionary(self, dict_id: int, data: bytes, activate: bool = True):
+        """加载一个字典（用于解压），activate 时新写入的内容使用该字典压缩"""
+        self._dictionaries[dict_id] = data
+        if activate and self.supports_dictionary:
+            self._active_dict_id = dict_id
+
+    def encode(self, text: str) -> Tuple[Union[str, bytes], int]:
+        """压缩文本，返回 (保存的值, 编码方式)；不值得压缩时原样返回"""
+        raw = text.encode('utf-8')
+        if self.codec == CODEC_NONE or len(raw) < self.threshold:
+            return text, CODEC_NONE
+        if self.codec == CODEC_ZSTD:
+            packed = self._compressor().compress(raw)
+        else:
+            packed = zlib.compress(raw, self.level)
+        if len(packed) >= len(raw):
+            return text, CODEC_NONE
+        return packed, self.codec
+
+    def decode(self, value: Union[str, bytes], codec: int) -> str:
+        """按编码方式解压，返回文本"""
+        if not codec:
+            return value
+        if codec == CODEC_GZIP:
+            raw = gzip.decompress(value)
+        elif codec == CODEC_ZLIB:
+            raw = zlib.decompress(value)
+        elif codec == CODEC_ZSTD:
+            if not _ZSTD_AVAILABLE:
+                raise RuntimeError("内容使用 zstd 压缩，需要安装 zstandard 才能读取")
+            dict_id = zstandard.get_frame_parameters(value).dict_id
+            raw = self._decompressor(dict_id).decompress(value)
+        else:
+            raise ValueError(f"未知的内容编码: {codec}")
+        return raw.decode('utf-8')
+
+    def train(self, samples: List[bytes], dict_size: int = _DICT_SIZE) -> Optional[Tuple[int, bytes]]:
+        """用历史内容训练 zstd 字典，返回 (字典 ID, 字典数据)；无法训练时返回 None"""
+        if not self.supports_dictionary or not samples:
+            return None
+        try:
+            trained = zstandard.train_dictionary(dict_size, samples, level=self.level)
+        except zstandard.ZstdError as e:
+            logger.info(f"样本不足，暂不训练压缩字典: {str(e)}")
+            return None
+        return trained.dict_id(), trained.as_bytes()
+
+    def _compressor(self):
+        compressors = self._thread_cache('compressors')
+        key = (self._active_dict_id, self.level)
+        compressor = compressors.get(key)
+        if compressor is None:
+            dict_data = self._zstd_dict(self._active_dict_id)
+            compressor = zstandard.ZstdCompressor(
+                level=self.level, dict_data=dict_data, write_content_size=True
+            )
+            compressors[key] = compressor
+        return compressor
+
+    def _decompressor(self, dict_id: int):
+        decompressors = self._thread_cache('decompressors')
+        decompressor = decompressors.get(dict_id)
+        if decompressor is None:
+            dict_data = self._zstd_dict(dict_id)
+            if dict_id and dict_data is None:
+                raise RuntimeError(f"缺少压缩字典 {dict_id}")
+            decompressor = zstandard.ZstdDecompressor(dict_data=dict_data)
+            decompressors[dict_id] = decompressor
+        return decompressor
+
+    def _zstd_dict(self, dict_id: int):
+        if not dict_id or dict_id not in self._dictionaries:
+            return None
+        return zstandard.ZstdCompressionDict(self._dictionaries[dict_id])
+
+    def _thread_cache(self, name: str) -> dict:
+        cache = getattr(self._local, name, None)
+        if cache is None:
+            cache = {}
+            setattr(self._local, name, cache)
+        return cache
@@ -0,0 +1,190 @@
+import queue
+import threading
+import time
+from typing import Callable, Dict, List, Optional, Tuple
+
+from models.clipboard_item import ClipboardItem, ContentType
+from utils.logger import logger
+from utils.thumbnail import make_thumbnail
+
+
+_FLUSH_INTERVAL_MS = 50     # 合并窗口：首个待写项目到达后最多等待的时间
+_MAX_BATCH_SIZE = 200       # 单个事务最多写入的项目数
+_QUEUE_SIZE = 1000          # 有界队列容量，写满时调用方阻塞（背压）
+_BACKFILL_CHUNK = 20        # 空闲时每次为旧图片补生成缩略图的数量
+_DICT_CHECK_INTERVAL = 60.0 # 两次检查是否需要训练压缩字典的最短间隔（秒）
+
+_STOP = object()
+
+
+class HistoryWriter(threading.Thread):
+    """后台批量写入线程
+
+    剪贴板捕获只负责把项目放进有界队列，写入线程在一个合并窗口内
+    收集所有待写项目，用一个事务写入数据库（每批只提交/fsync 一次），
+    提交成功后通过回调 on_committed(写入的项目, 被淘汰的 content_hash)
+    通知调用方。回调在写入线程中执行，调用方应通过 Qt 信号把通知转回 GUI 线程。
+
+    图片缩略图也在写入线程中生成：新捕获的图片在写入前生成，旧数据库中
+    缺少缩略图的图片在队列空闲时分批补齐，全部完成后调用 on_backfilled，
+    随后把旧数据库转换为增量 VACUUM 模式（只需一次）。
+    之后写入了新记录时，每隔 _DICT_CHECK_INTERVAL 秒在队列空闲时检查一次
+    是否需要训练内容压缩字典。
+    """
+
+    def __init__(self, db, on_committed: Callable[[List[ClipboardItem], List[str]], None],
+                 get_max_history: Callable[[], int],
+                 flush_interval_ms: int = _FLUSH_INTERVAL_MS,
+                 max_batch: int = _MAX_BATCH_SIZE,
+                 queue_size: int = _QUEUE_SIZE,
+                 get_byte_budget: Optional[Callable[[], Tuple[int, Dict[ContentType, int]]]] = None,
+                 on_backfilled: Optional[Callable[[], None]] = None):
+        super().__init__(name="HistoryWriter", daemon=True)
+        self.db = db
+        self._on_committed = on_committed
+        self._on_backfilled = on_backfilled
+        self._get_max_history = get_max_history
+        self._get_byte_budget = get_byte_budget
+        self._flush_interval = max(flush_interval_ms, 0) / 1000.0
+        self._max_batch = max(max_batch, 1)
+        self._queue: queue.Queue = queue.Queue(maxsize=max(queue_size, 1))
+        self._stopped = threading.Event()
+        self._written_since_check = 0
+
+    def submit(self, item: ClipboardItem) -> bool:
+        """提交一个待写项目（队列已满时阻塞，直到写入线程腾出空间）"""
+        if self._stopped.is_set() or not self.is_alive():
+            return False
+        self._queue.put(item)
+        return True
+
+    def flush(self, timeout: Optional[float] = None) -> bool:
+        """等待已提交的项目全部写入"""
+        done = threading.Event()
+        if self._stopped.is_set() or not self.is_alive():
+            return False
+        self._queue.put(done)
+        return done.wait(timeout)
+
+    def stop(self, timeout: Optional[float] = 5.0):
+        """写完队列中剩余项目后停止线程"""
+        if self._stopped.is_set():
+            return
+        self._stopped.set()
+        if self.is_alive():
+            self._queue.put(_STOP)
+            self.join(timeout)
+
+    def run(self):
+        backfill_pending = True
+        backfilled = 0
+        next_dict_check = 0.0
+        try:
+            while True:
+                if backfill_pending:
+                    try:
+                        first = self._queue.get_nowait()
+                    except queue.Empty:
+                        # 队列空闲：补齐一批旧图片的缩略图
+                        count = self._backfill_thumbnails()
+                        backfilled += count
+                        backfill_pending = count > 0
+                        if not backfill_pending:
+                            if backfilled:
+                                logger.info(f"已为 {backfilled} 张图片生成缩略图")
+                                self._notify_backfilled()
+                            # 旧数据库一次性转换为增量 VACUUM 模式（完整 VACUUM，耗时较长）
+                            self.db.enable_incremental_vacuum()
+                            # 启动后的空闲任务完成：按需训练压缩字典
+                            self.db.maybe_train_dictionary()
+                            next_dict_check = time.monotonic() + _DICT_CHECK_INTERVAL
+                        continue
+                else:
+                    try:
+                        first = self._queue.get(timeout=max(next_dict_check - time.monotonic(), 0))
+                    except queue.Empty:
+                        # 检查间隔已到且队列空闲：有新记录时检查是否需要（重新）训练字典
+                        next_dict_check = time.monotonic() + _DICT_CHECK_INTERVAL
+                        if self._written_since_check:
+                            self._written_since_check = 0
+                            self.db.maybe_train_dictionary()
+                        continue
+                if first is _STOP:
+                    break
+                batch, markers, stop = self._collect(first)
+                if batch:
+                    self._write_batch(batch)
+                for marker in markers:
+                    marker.set()
+                if stop:
+                    break
+        finally:
+            self.db.close()
+
+    def _collect(self, first):
+        """在合并窗口内收集待写项目，返回 (项目, flush 标记, 是否停止)"""
+        batch = []
+        markers = []
+        pending = first
+        deadline = time.monotonic() + self._flush_interval
+        while True:
+            if pending is _STOP:
+                return batch, markers, True
+            if isinstance(pending, threading.Event):
+                # flush 请求：立即写出已收集的项目
+                markers.append(pending)
+                return batch, markers, False
+            batch.append(pending)
+            if len(batch) >= self._max_batch:
+                return batch, markers, False
+
+            remaining = deadline - time.monotonic()
+            try:
+                if remaining > 0:
+                    pending = self._queue.get(timeout=remaining)
+                else:
+                    pending = self._queue.get_nowait()
+            except queue.Empty:
+                return batch, markers, False
+
+    def _backfill_thumbnails(self) -> int:
+        """为一批缺少缩略图的图片生成缩略图，返回处理的数量"""
+        pending = self.db.missing_thumbnails(_BACKFILL_CHUNK)
+        if not pending:
+            return 0
+        # 无法解码的图片保存空缩略图，避免每次启动重复尝试
+        thumbnails = [(content_hash, make_thumbnail(data) or b'') for content_hash, data in pending]
+        if not self.db.set_thumbnails(thumbnails):
+            return 0
+        return len(thumbnails)
+
+    def _notify_backfilled(self):
+        if self._on_backfilled is None:
+            return
+        try:
+            self._on_backfilled()
+        except Exception as e:
+            logger.error(f"缩略图补齐回调发生错误: {str(e)}")
+
+    def _write_batch(self, batch: List[ClipboardItem]):
+        # 同一批次中重复的内容只保留最后一次
+        coalesced = {}
+        for item in batch:
+            coalesced.pop(item.content_hash, None)
+            coalesced[item.content_hash] = item
+        items = list(coalesced.values())
+
+        for item in items:
+            if item.data is not None and item.thumbnail is None:
+                item.thumbnail = make_thumbnail(item.data) or b''
+
+        max_bytes, type_max_bytes = self._get_byte_budget() if self._get_byte_budget else (0, None)
+        written, evicted = self.db.add_items(items, max_history=self._get_max_history(),
+                                             max_bytes=max_bytes, type_max_bytes=type_max_bytes)
+        if not written:
+            return
+        self._written_since_check += len(written)
+        try:
+            self._on_committed(written, evicted)
+        except Exception as e:
+            logger.error(f"写入完成回调发生错误: {str(e)}")
@@ -0,0 +1,147 @@
+import hashlib
+import threading
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+from typing import Callable, Dict
+
+from PyQt6.QtCore import QBuffer, QByteArray, Qt
+from PyQt6.QtGui import QImage
+
+from models.clipboard_item import ClipboardItem, ContentType
+from utils.logger import logger
+from utils.thumbnail import render_thumbnail
+
+
+_MAX_WIDTH = 800            # 保存的图片最大尺寸（超过时等比缩小）
+_MAX_HEIGHT = 600
+_JPEG_QUALITY = 85
+_MAX_WORKERS = 2
+_MAX_PENDING = 4            # 等待处理的图片上限，超出时丢弃最旧的一张
+
+
+class ImageCapturePipeline:
+    """后台图片捕获管线
+
+    GUI 线程只负责从剪贴板取出一次 QImage 并入队，像素摘要、缩放、JPEG 编码、
+    缩略图和内容摘要都在工作线程中完成，完成后通过回调 on_ready(ClipboardItem)
+    交回调用方。回调在工作线程中执行，调用方应通过 Qt 信号转回 GUI 线程。
+
+    等待队列有上限：连续截图时只保留最新的几张，避免大图在内存中堆积。
+    """
+
+    def __init__(self, on_ready: Callable[[ClipboardItem], None],
+                 max_workers: int = _MAX_WORKERS, max_pending: int = _MAX_PENDING):
+        self._on_ready = on_ready
+        self._max_pending = max(max_pending, 1)
+        self._pending: deque = deque()
+        self._lock = threading.Lock()
+        self._executor = ThreadPoolExecutor(max_workers=max(max_workers, 1),
+                                            thread_name_prefix="ImageCapture")
+        self._closed = False
+        self._last_digest = None  # 上一张处理的图片的像素摘要
+        self.dropped = 0  # 因队列已满被丢弃的图片数
+
+    def submit(self, image: QImage, metadata: Dict = None, skip_if_unchanged: bool = False) -> bool:
+        """提交一张剪贴板图片（QImage 为隐式共享，入队不复制像素数据）
+
+        GUI 线程只用抽样指纹判断剪贴板是否变化；指纹未变时传入 skip_if_unchanged，
+        工作线程计算完整像素摘要，与上一张图片相同才丢弃。
+        """
+        if image.isNull():
+            return False
+        with self._lock:
+            if self._closed:
+                return False
+            if len(self._pending) >= self._max_pending:
+                self._pending.popleft()
+                self.dropped += 1
+                logger.warning("图片处理队列已满，丢弃最旧的一张待处理图片")
+            self._pending.append((image, dict(metadata or {}), datetime.now(), skip_if_unchanged))
+        # 每个任务只取队首一项；被丢弃的项目对应的任务会直接返回
+        self._executor.submit(self._process_next)
+        return True
+
+    def remember(self, image: QImage):
+        """把 image 记为上一张图片（程序自己放回剪贴板的图片，图片较小）"""
+        if image.isNull():
+            return
+        digest = self._pixel_digest(image)
+        with self._lock:
+            self._last_digest = digest
+
+    def shutdown(self, wait: bool = True):
+        """停止接收新图片，等待已入队的图片处理完成"""
+        with self._lock:
+            self._closed = True
+        self._executor.shutdown(wait=wait)
+
+    def _process_next(self):
+        with self._lock:
+            if not self._pending:
+                return
+            image, metadata, timestamp, skip_if_unchanged = self._pending.popleft()
+        try:
+            digest = self._pixel_digest(image)
+            with self._lock:
+                unchanged = digest == self._last_digest
+                self._last_digest = digest
+            if skip_if_unchanged and unchanged:
+                return
+            item = self._build_item(image, metadata, timestamp)
+        except Exception as e:
+            logger.error(f"处理剪贴板图片时发生错误: {str(e)}")
+            return
+        if item is None:
+            return
+        try:
+            self._on_ready(item)
+        except Exception as e:
+            logger.error(f"图片处理完成回调发生错误: {str(e)}")
+
+    @staticmethod
+    def _pixel_digest(image: QImage) -> str:
+        """完整像素数据的摘要（含尺寸和格式）"""
+        bits = image.constBits()
+        bits.setsize(image.sizeInBytes())
+        digest = hashlib.blake2b(digest_size=16)
+        digest.update(f"{image.width()}x{image.height()}:{image.format().value}".encode())
+        digest.update(memoryview(bits))
+        return digest.hexdigest()
+
+    @staticmethod
+    def _build_item(image: QImage, metadata: Dict, timestamp: datetime):
+        """缩放、编码并生成缩略图，返回待写入的 ClipboardItem"""
+        scaled = image
+        if image.width() > _MAX_WIDTH or image.height() > _MAX_HEIGHT:
+            scaled = image.scaled(
+                _MAX_WIDTH, _MAX_HEIGHT,
+                Qt.AspectRatioMode.KeepAspectRatio,
+                Qt.TransformationMode.SmoothTransformation,
+            )
+
+        byte_array = QByteArray()
+        buffer = QBuffer(byte_array)
+        buffer.open(QBuffer.OpenModeFlag.WriteOnly)
+        if not scaled.save(buffer, "JPEG", _JPEG_QUALITY):
+            return None
+        data = byte_array.data()
+        if not data:
+            return None
+
+        item_metadata = {
+            "width": image.width(),
+            "height": image.height(),
+            "format": "jpeg",
+        }
+        item_metadata.update(metadata)
+
+        # content 由数据摘要生成 blob 引用，content_hash 随之确定
+        return ClipboardItem(
+            content='',
+            timestamp=timestamp,
+            content_type=ContentType.IMAGE,
+            metadata=item_metadata,
+            data=data,
+            thumbnail=render_thumbnail(scaled) or b'',
+        )
@@ -0,0 +1,290 @@
+"""
+N-gram Model - Offline character-level prediction from clipboard history.
+
+A PPM-style model over the stored texts: for every context of 1..``order``
+preceding characters it counts how often each character followed.  Each
+text is trained with a trailing newline, so the model also learns where texts
+end.  A prediction walks forward one character at a time, following the most
+frequent next character of the longest context seen so far, for as long as
+that context has been seen at least ``_MIN_CONTEXT_COUNT`` times and the
+running probability stays above ``_MIN_PROBABILITY``.  It never falls back
+to a shorter context, whose generic statistics make poor completions.  That
+gives short completions for text the user types repeatedly (identifiers,
+paths, phrases) without any network access.
+
+Counts live in two open-addressing hash tables backed by ``array``:
+
+  - contexts: 63-bit context hash, total count, most frequent next
+    character and its count (kept up to date on every increment, so a
+    prediction step is a single probe per order);
+  - symbols: hash of (context, character) and its count.
+
+Keys are only hashes, so two contexts could in theory share counts; at 63
+bits that does not happen in practice.  Both tables start small and double
+until they reach their share of ``max_bytes``; after that, training halves
+every count and evicts the entries that drop to zero, so older statistics
+age out and the memory stays bounded.
+"""
+
+from array import array
+from typing import Tuple
+
+_ORDER = 5                  # longest context, in characters
+_MAX_BYTES = 4 * 1024 * 1024
+_CONTEXT_SHARE = 0.45       # part of the budget used by the context table
+_INITIAL_CAPACITY = 4096
+_MAX_LOAD = 0.7             # grow or prune above this fill ratio
+_PRUNE_LOAD = 0.5           # pruning halves counts until below this fill ratio
+_MIN_CONTEXT_COUNT = 2      # contexts seen less often are not trusted
+_MIN_PROBABILITY = 0.4      # stop once the completion is less likely than this
+_MIN_COMPLETION = 2
+_MAX_COMPLETION = 40
+_MAX_TEXT_CHARS = 2000      # characters of each text used for training
+
+_MASK = (1 << 63) - 1
+_MULTIPLIER = 0x100000001B3     # 64-bit FNV prime
+_SEED = 0x4F1BBCDCBFA53E0B
+_SYMBOL_SALT = 0x2545F4914F6CDD1D
+
+# Bytes per slot: key plus value columns
+_CONTEXT_SLOT = 8 + 4 + 4 + 4
+_SYMBOL_SLOT = 8 + 4
+
+
+def _extend(key: int, ch: str) -> int:
+    return ((key ^ ord(ch)) * _MULTIPLIER) & _MASK
+
+
+def _capacity_for(budget: float, slot_bytes: int) -> int:
+    capacity = _INITIAL_CAPACITY
+    while capacity * 2 * slot_bytes <= budget:
+        capacity *= 2
+    return capacity
+
+
+class _CountTable:
+    """Open-addressing hash table with parallel ``array`` columns; the first
+    ``counters`` columns hold counts, the first of them the row's weight."""
+
+    __slots__ = ("keys", "columns", "counters", "mask", "used")
+
+    def __init__(self, capacity: int, columns: int, counters: int = 1):
+        self.keys = array("q", bytes(8 * capacity))
+        self.columns = [array("I", bytes(4 * capacity)) for _ in range(columns)]
+        self.counters = counters
+        self.mask = capacity - 1
+        self.used = 0
+
+    @property
+    def capacity(self) -> int:
+        return self.mask + 1
+
+    @property
+    def nbytes(self) -> int:
+        return self.capacity * (8 + 4 * len(self.columns))
+
+    def find(self, key: int) -> int:
+        """Return the slot of ``key``, or -1."""
+        keys, mask = self.keys, self.mask
+        slot = (key ^ (key >> 31)) & mask
+        while True:
+            found = keys[slot]
+            if found == key:
+                return slot
+            if not found:
+                return -1
+            slot = (slot + 1) & mask
+
+    def insert(self, key: int) -> int:
+        """Return the slot of ``key``, claiming an empty one if needed."""
+        keys, mask = self.keys, self.mask
+        slot = (key ^ (key >> 31)) & mask
+        while True:
+            found = keys[slot]
+            if found == key:
+                return slot
+            if not found:
+                keys[slot] = key
+                self.used += 1
+                return slot
+            slot = (slot + 1) & mask
+
+    def over(self, load: float) -> bool:
+        return self.used > self.capacity * load
+
+    def rebuilt(self, capacity: int, halve: bool = False) -> "_CountTable":
+        """Copy into a table of ``capacity`` slots, optionally halving every
+        count first; rows whose weight drops to zero are left out."""
+        table = _CountTable(capacity, len(self.columns), self.counters)
+        keys, mask = table.keys, table.mask
+        shift = 1 if halve else 0
+        moved = []
+        for old_slot, (key, weight) in enumerate(zip(self.keys, self.columns[0])):
+            if not key or not weight >> shift:
+                continue
+            slot = (key ^ (key >> 31)) & mask
+            while keys[slot]:
+                slot = (slot + 1) & mask
+            keys[slot] = key
+            moved.append((old_slot, slot))
+        table.used = len(moved)
+        for column, (old, new) in enumerate(zip(self.columns, table.columns)):
+            if column < self.counters:
+                for old_slot, slot in moved:
+                    new[slot] = old[old_slot] >> shift
+            else:
+                for old_slot, slot in moved:
+                    new[slot] = old[old_slot]
+        return table
+
+
+class NGramModel:
+    """Character n-gram model trained incrementally on clipboard texts."""
+
+    def __init__(self, order: int = _ORDER, max_bytes: int = _MAX_BYTES):
+        self.order = max(order, 1)
+        self.max_bytes = max_bytes
+        self._max_contexts = _capacity_for(max_bytes * _CONTEXT_SHARE, _CONTEXT_SLOT)
+        self._max_symbols = _capacity_for(max_bytes * (1 - _CONTEXT_SHARE), _SYMBOL_SLOT)
+        self.clear()
+
+    def clear(self):
+        # contexts: total, best count, best character; symbols: count
+        self._contexts = _CountTable(_INITIAL_CAPACITY, 3, counters=2)
+        self._symbols = _CountTable(_INITIAL_CAPACITY, 1)
+        self.prunes = 0
+
+    @property
+    def nbytes(self) -> int:
+        return self._contexts.nbytes + self._symbols.nbytes
+
+    def __len__(self) -> int:
+        """Number of distinct contexts."""
+        return self._contexts.used
+
+    def train(self, text: str):
+        """Count every character of ``text`` after each of its contexts."""
+        codes = [ord(ch) for ch in text[:_MAX_TEXT_CHARS] + "\n"]
+        order = self.order
+        pos, end = 1, len(codes)
+        while pos < end:
+            # Hashing and probing are inlined: this loop is the training cost
+            contexts, symbols = self._contexts, self._symbols
+            context_keys, context_mask = contexts.keys, contexts.mask
+            symbol_keys, symbol_mask = symbols.keys, symbols.mask
+            totals, best_counts, best_chars = contexts.columns
+            counts = symbols.columns[0]
+            context_used, symbol_used = contexts.used, symbols.used
+            context_limit = contexts.capacity * _MAX_LOAD
+            symbol_limit = symbols.capacity * _MAX_LOAD
+            while pos < end and context_used <= context_limit and symbol_used <= symbol_limit:
+                code = codes[pos]
+                key = _SEED
+                for back in range(pos - 1, max(pos - order, 0) - 1, -1):
+                    key = ((key ^ codes[back]) * _MULTIPLIER) & _MASK
+                    slot = (key ^ (key >> 31)) & context_mask
+                    while True:
+                        found = context_keys[slot]
+                        if found == key:
+                            break
+                        if not found:
+                            context_keys[slot] = key
+                            context_used += 1
+                            break
+                        slot = (slot + 1) & context_mask
+                    symbol_key = ((key ^ _SYMBOL_SALT ^ code) * _MULTIPLIER) & _MASK
+                    symbol = (symbol_key ^ (symbol_key >> 31)) & symbol_mask
+                    while True:
+                        found = symbol_keys[symbol]
+                        if found == symbol_key:
+                            break
+                        if not found:
+                            symbol_keys[symbol] = symbol_key
+                            symbol_used += 1
+                            break
+                        symbol = (symbol + 1) & symbol_mask
+                    totals[slot] += 1
+                    count = counts[symbol] + 1
+                    counts[symbol] = count
+                    if count > best_counts[slot]:
+                        best_counts[slot] = count
+                        best_chars[slot] = code
+                pos += 1
+            contexts.used, symbols.used = context_used, symbol_used
+            self._fit_budget()
+
+    def forget(self, text: str):
+        """Subtract a previously trained text.  The most frequent next character
+        of a context is only re-evaluated when the context is seen again, so a
+        forgotten continuation loses confidence but is not replaced."""
+        text = text[:_MAX_TEXT_CHARS] + "\n"
+        contexts, symbols = self._contexts, self._symbols
+        totals, best_counts, best_chars = contexts.columns
+        counts = symbols.columns[0]
+        for pos in range(1, len(text)):
+            ch = text[pos]
+            key = _SEED
+            for back in range(pos - 1, max(pos - self.order, 0) - 1, -1):
+                key = _extend(key, text[back])
+                slot = contexts.find(key)
+                if slot < 0:
+                    break
+                symbol = symbols.find(_extend(key ^ _SYMBOL_SALT, ch))
+                if symbol < 0 or not counts[symbol]:
+                    continue
+                counts[symbol] -= 1
+                if totals[slot]:
+                    totals[slot] -= 1
+                if best_chars[slot] == ord(ch):
+                    best_counts[slot] = min(best_counts[slot], counts[symbol])
+
+    def _fit_budget(self):
+        contexts = self._grow(self._contexts, self._max_contexts)
+        symbols = self._grow(self._symbols, self._max_symbols)
+        if contexts.over(_MAX_LOAD) or symbols.over(_MAX_LOAD):
+            # Both tables age together, so context totals match symbol counts
+            while contexts.over(_PRUNE_LOAD) or symbols.over(_PRUNE_LOAD):
+                contexts = contexts.rebuilt(contexts.capacity, halve=True)
+                symbols = symbols.rebuilt(symbols.capacity, halve=True)
+                self.prunes += 1
+        self._contexts, self._symbols = contexts, symbols
+
+    @staticmethod
+    def _grow(table: _CountTable, max_capacity: int) -> _CountTable:
+        while table.over(_MAX_LOAD) and table.capacity < max_capacity:
+            table = table.rebuilt(table.capacity * 2)
+        return table
+
+    def predict(self, context: str) -> Tuple[str, float]:
+        """Return (completion, probability) for the text typed so far, or ("", 0.0)."""
+        contexts = self._contexts
+        totals, best_counts, best_chars = contexts.columns
+        buffer = list(context[-self.order:])
+        completion = []
+        probability = 1.0
+        while len(completion) < _MAX_COMPLETION:
+            # The longest context seen so far decides the next character
+            chosen = -1
+            key = _SEED
+            for back in range(1, min(self.order, len(buffer)) + 1):
+                key = _extend(key, buffer[-back])
+                slot = contexts.find(key)
+                if slot < 0:
+                    break
+                chosen = slot
+            if chosen < 0 or totals[chosen] < _MIN_CONTEXT_COUNT or not best_counts[chosen]:
+                break
+            step = best_counts[chosen] / totals[chosen]
+            if probability * step < _MIN_PROBABILITY:
+                break
+            ch = chr(best_chars[chosen])
+            if ch == "\n":
+                break
+            probability *= step
+            completion.append(ch)
+            buffer.append(ch)
+
+        text = "".join(completion).rstrip()
+        if len(text) < _MIN_COMPLETION:
+            return "", 0.0
+        return text, probability
@@ -1,6 +1,10 @@
 """
 Prediction Engine - Multi-level real-time text prediction.
 
+Tiers, tried in order: exact matches against clipboard history
+(prediction_index), an offline n-gram model trained on the history
+(ngram_model), then the LLM.  The first two need no AI configuration.
+
 SAFETY-FIRST design:
   - NO keyboard.add_hotkey / keyboard.remove_hotkey — avoids lock contention
     with the WH_KEYBOARD_LL hook thread that destabilised Windows.
@@ -11,6 +15,8 @@ SAFETY-FIRST design:
 """
 
 import threading
+import time
+from typing import Dict, List
 try:
     import keyboard
     _KEYBOARD_IMPORT_ERROR = None
@@ -21,17 +27,22 @@ from PyQt6.QtCore import QObject, QTimer, pyqtSignal
 
 from services.ai_service import AIService
 from services.clipboard_service import ClipboardService
+from models.clipboard_item import ClipboardText, ContentType
+from services.prediction_index import LocalMatchIndex, MatchCursor
+from services.ngram_model import NGramModel
 from controllers.input_monitor import InputMonitor
 from views.components.prediction_overlay import PredictionOverlay
 from config.settings import Settings
 from utils.logger import logger
 
 
-_CACHE_REFRESH_MS = 5000
 _LOCAL_DEBOUNCE_MS = 20     # Faster response for local matching
 _AI_DEBOUNCE_MS = 400       # Slightly longer for AI to reduce API calls
 _MIN_LOCAL_CHARS = 2        # Lower threshold for faster triggering
-_MAX_LOCAL_ITEMS = 30       # More items for better matching
+_MAX_LOCAL_ITEMS = 2000     # Texts indexed for local matching
+_REBUILD_DELAY_MS = 2000    # Coalesces index rebuilds after history changes
+_NGRAM_TRAIN_CHARS = 200_000  # Recent history the offline model is trained on
+_NGRAM_SLICE_MS = 10        # Training time per event-loop turn
 _AUTO_DISMISS_MS = 8000     # auto-dismiss overlay after 8 s
 _MAX_AI_PREDICTION_LEN = 50  # Limit AI prediction length
 
@@ -56,11 +67,27 @@ class PredictionEngine(QObject):
         self._cooldown = False
         self._ai_busy = False
 
-        # Clipboard cache (refreshed periodically, not per keystroke)
-        self._clip_cache: list = []
-        self._cache_timer = QTimer(self)
-        self._cache_timer.setInterval(_CACHE_REFRESH_MS)
-        self._cache_timer.timeout.connect(self._refresh_cache)
+        # Text records of the clipboard history, oldest first (the order they
+        # were added to the match index).  Loaded once, then kept in sync
+        # through the clipboard service's change signals.
+        self._clip_cache: Dict[str, ClipboardText] = {}
+        self._cache_loaded = False
+        self._local_index = LocalMatchIndex([])
+        # Matching state of the line being typed, advanced per keystroke
+        self._cursor = MatchCursor(self._local_index)
+        self._rebuild_timer = QTimer(self)
+        self._rebuild_timer.setSingleShot(True)
+        self._rebuild_timer.setInterval(_REBUILD_DELAY_MS)
+        self._rebuild_timer.timeout.connect(self._rebuild_index)
+
+        # Offline n-gram tier between local matching and the LLM; trained in
+        # short slices on the event loop so loading the history never blocks
+        self._ngram = NGramModel()
+        self._ngram_texts: Dict[str, str] = {}      # content_hash -> trained text
+        self._ngram_queue: List[ClipboardText] = []  # newest first
+        self._ngram_timer = QTimer(self)
+        self._ngram_timer.setInterval(0)
+        self._ngram_timer.timeout.connect(self._train_ngram_slice)
 
         # Local match debounce
         self._local_timer = QTimer(self)
@@ -81,14 +108,22 @@ class PredictionEngine(QObject):
         self._ai_realtime_timer.timeout.connect(self._try_realtime_ai_prediction)
 
         # Wire signals — ALL on the main thread via InputMonitor's polling
+        self.input_monitor.char_appended.connect(self._on_char_appended)
+        self.input_monitor.char_removed.connect(self._on_char_removed)
+        self.input_monitor.buffer_cleared.connect(self._on_buffer_cleared)
+        self.input_monitor.buffer_trimmed.connect(self._reset_cursor)
         self.input_monitor.typing_changed.connect(self._on_typing_changed)
         self.input_monitor.word_completed.connect(self._on_word_completed)
         self.input_monitor.tab_pressed.connect(self._do_accept)
         self.input_monitor.esc_pressed.connect(self._do_dismiss)
+        self.clipboard_service.item_added.connect(self._on_item_added)
+        self.clipboard_service.items_removed.connect(self._on_items_removed)
+        self.clipboard_service.favorite_changed.connect(self._on_favorite_changed)
+        self.clipboard_service.history_changed.connect(self._on_history_changed)
         self.ai_service.prediction_ready.connect(self._on_ai_result)
         self.ai_service.prediction_error.connect(self._on_ai_error)
 
-        if self.ai_service.is_configured():
+        if self._should_run():
             self.start()
 
     # ── Lifecycle ────────────────────────────────────────────────────
@@ -97,23 +132,29 @@ class PredictionEngine(QObject):
         if not self.is_available():
             logger.warning("Prediction engine unavailable on this platform or environment")
             return
-        if not self.ai_service.is_configured():
-            logger.warning("AI service not configured; prediction engine idle")
+        if not self._should_run():
+            logger.warning("AI service not configured and offline prediction off; "
+                           "prediction engine idle")
             return
-        self._refresh_cache()
-        self._cache_timer.start()
+        if not self._cache_loaded:
+            self._load_cache()
+        elif self._ngram_queue:
+            self._ngram_timer.start()
         self.input_monitor.start()
-        self.status_changed.emit("AI prediction ON")
+        if self.ai_service.is_configured():
+            self.status_changed.emit("AI prediction ON")
+        else:
+            self.status_changed.emit("Offline prediction ON")
         logger.info("Prediction engine started")
 
     def stop(self):
         self.input_monitor.stop()
-        self._cache_timer.stop()
+        self._ngram_timer.stop()
         self._local_timer.stop()
         self._ai_realtime_timer.stop()
         self._dismiss_timer.stop()
         self._do_dismiss()
-        self.status_changed.emit("AI prediction OFF")
+        self.status_changed.emit("Prediction OFF")
         logger.info("Prediction engine stopped")
 
     def is_available(self) -> bool:
@@ -129,24 +170,165 @@ class PredictionEngine(QObject):
         self.ai_service.reload_settings()
         ai = Settings.get("ai", {})
         self.input_monitor.set_pause_delay(ai.get("trigger_delay", 300))
-        if self.ai_service.is_configured():
+        if self._should_run():
             self.start()
 
+    def _should_run(self) -> bool:
+        return (self.ai_service.is_configured()
+                or bool(Settings.get("ai", {}).get("offline_prediction", False)))
+
     # ── Clipboard cache ──────────────────────────────────────────────
 
-    def _refresh_cache(self):
+    def _load_cache(self):
+        """Load the most recent texts and rebuild the match index."""
         try:
-            items = self.clipboard_service.get_history(limit=_MAX_LOCAL_ITEMS)
-            self._clip_cache = [
-                it.content.strip()
-                for it in items
-                if it.content_type.value == "text" and it.content.strip()
-            ]
+            records = self.clipboard_service.get_texts(limit=_MAX_LOCAL_ITEMS)
         except Exception as e:
-            logger.error(f"Failed to refresh clipboard cache: {e}")
+            logger.error(f"Failed to load clipboard cache: {e}")
+            return
+        self._clip_cache = {}
+        for record in reversed(records):
+            record.text = record.text.strip()
+            if record.text:
+                self._clip_cache[record.content_hash] = record
+        self._cache_loaded = True
+        self._rebuild_index()
+        self._reset_ngram()
+
+    def _rebuild_index(self):
+        self._rebuild_timer.stop()
+        records = list(self._clip_cache.values())
+        records.reverse()
+        self._local_index = LocalMatchIndex([r.text for r in records],
+                                            [r.content_hash for r in records])
+        self._reset_cursor()
+
+    def _cache_text(self, record: ClipboardText):
+        """Add or move a record to the most recent end of the cache."""
+        self._clip_cache.pop(record.content_hash, None)
+        self._clip_cache[record.content_hash] = record
+        self._local_index.add(record.text, record.content_hash)
+        # Keep the newest texts; favorites are never dropped
+        excess = len(self._clip_cache) - _MAX_LOCAL_ITEMS
+        if excess > 0:
+            oldest = [h for h, r in self._clip_cache.items() if not r.is_favorite][:excess]
+            for content_hash in oldest:
+                del self._clip_cache[content_hash]
+                self._local_index.remove(content_hash)
+
+    def _schedule_rebuild(self):
+        if self._local_index.stale and not self._rebuild_timer.isActive():
+            self._rebuild_timer.start()
+
+    def _index_changed(self):
+        self._schedule_rebuild()
+        # Index states may have been split or added; replay the current line
+        self._reset_cursor()
+
+    def _on_item_added(self, item):
+        if not self._cache_loaded or item.content_type != ContentType.TEXT:
+            return
+        text = item.content.strip()
+        if not text:
+            return
+        record = ClipboardText(item.content_hash, text, item.is_favorite)
+        self._cache_text(record)
+        self._index_changed()
+        # Trained by the sliced trainer, never inline: a long text or a prune
+        # of the count tables would otherwise stall the GUI thread
+        self._ngram_queue.insert(0, record)
+        if self.input_monitor._enabled:
+            self._ngram_timer.start()
+
+    def _on_items_removed(self, content_hashes: list):
+        if not self._cache_loaded:
+            return
+        removed = False
+        for content_hash in content_hashes:
+            if self._clip_cache.pop(content_hash, None) is not None:
+                self._local_index.remove(content_hash)
+                removed = True
+            text = self._ngram_texts.pop(content_hash, None)
+            if text is not None:
+                self._ngram.forget(text)
+        if removed:
+            self._index_changed()
+
+    def _on_favorite_changed(self, content_hash: str, is_favorite: bool):
+        if not self._cache_loaded:
+            return
+        record = self._clip_cache.get(content_hash)
+        if record is None:
+            if not is_favorite:
+                return
+            # A favorite from beyond the cached window
+            records = self.clipboard_service.get_texts(limit=1, content_hashes=[content_hash])
+            if not records or not records[0].text.strip():
+                return
+            record = records[0]
+            record.text = record.text.strip()
+        record.is_favorite = is_favorite
+        if is_favorite:
+            # Favorites are listed first, so they rank like the newest texts
+            self._cache_text(record)
+            self._index_changed()
+
+    def _on_history_changed(self):
+        if self._cache_loaded:
+            self._load_cache()
+
+    # ── Offline model ────────────────────────────────────────────────
+
+    def _reset_ngram(self):
+        """Retrain the offline model from the most recent cached texts."""
+        self._ngram.clear()
+        self._ngram_texts.clear()
+        self._ngram_queue = []
+        budget = _NGRAM_TRAIN_CHARS
+        for record in reversed(list(self._clip_cache.values())):
+            budget -= len(record.text)
+            if budget < 0:
+                break
+            self._ngram_queue.append(record)
+        if self._ngram_queue:
+            self._ngram_timer.start()
+
+    def _train_ngram_slice(self):
+        # Oldest first, so pruning ages out older statistics
+        deadline = time.perf_counter() + _NGRAM_SLICE_MS / 1000
+        while self._ngram_queue and time.perf_counter() < deadline:
+            record = self._ngram_queue.pop()
+            if record.content_hash in self._clip_cache:
+                self._train_ngram(record)
+        if not self._ngram_queue:
+            self._ngram_timer.stop()
+            logger.debug(f"Offline model trained: {len(self._ngram_texts)} texts, "
+                         f"{self._ngram.nbytes // 1024} KiB")
+
+    def _train_ngram(self, record: ClipboardText):
+        if record.content_hash not in self._ngram_texts:
+            self._ngram.train(record.text)
+            self._ngram_texts[record.content_hash] = record.text
 
     # ── Every keystroke ──────────────────────────────────────────────
 
+    def _current_line(self) -> str:
+        return self.input_monitor.get_context().rpartition("\n")[2]
+
+    def _reset_cursor(self):
+        self._cursor = self._local_index.cursor(self._current_line())
+
+    def _on_char_appended(self, char: str):
+        self._cursor.push(char)
+
+    def _on_char_removed(self):
+        # Backspace over a newline: resume matching on the previous line
+        if not self._cursor.pop():
+            self._cursor.reset(self._current_line())
+
+    def _on_buffer_cleared(self):
+        self._cursor.reset()
+
     def _on_typing_changed(self, context: str):
         if self._cooldown:
             return
@@ -194,62 +376,12 @@ class PredictionEngine(QObject):
         if not context or self._cooldown or self._showing:
             return
 
-        lines = context.split("\n")
-        current_line = (lines[-1] if lines else context)
-
-        if len(current_line.strip()) < _MIN_LOCAL_CHARS:
-            return
-
-        current_lower = current_line.lower().strip()
-        best = ""
-        best_score = 0
-
-        for content in self._clip_cache:
-            content_stripped = content.strip()
-            if len(content_stripped) <= len(current_line.strip()):
-                continue
-
-            content_lower = content_stripped.lower()
-
-            # Priority 1: Exact prefix match (user typed beginning of cached content)
-            if content_lower.startswith(current_lower):
-                remainder = content_stripped[len(current_line):]
-                if len(remainder) >= 2:
-                    # Score based on how much of the content matches + base score
-                    match_ratio = len(current_lower) / len(content_lower)
-                    score = 2000 + int(match_ratio * 1000) + len(remainder)
-                    if score > best_score:
-                        best = remainder
-                        best_score = score
-                continue
-
-            # Priority 2: Partial suffix/prefix match (typed ending of one line matches start of another)
-            line_len = len(current_lower)
-            cnt_len = len(content_lower)
-
-            # Try matching last 2-10 characters of input with start of clipboard content
-            for match_len in range(min(10, line_len), min(1, line_len) - 1, -1):
-                if match_len < 2:
-                    break
-                if current_lower[-match_len:] == content_lower[:match_len]:
-                    remainder = content_stripped[match_len:]
-                    if len(remainder) >= 2:
-                        # Higher score for longer matches
-                        score = 500 + match_len * 10 + len(remainder)
-                        if score > best_score and best_score < 2000:
-                            best = remainder
-                            best_score = score
-                    break
-
-            # Priority 3: Check if clipboard contains the current line somewhere in middle
-            if current_lower in content_lower:
-                idx = content_lower.find(current_lower)
-                remainder = content_stripped[idx + len(current_line):]
-                if len(remainder) >= 2:
-                    score = 300 + len(remainder)
-                    if score > best_score and best_score < 500:
-                        best = remainder
-                        best_score = score
+        if self._cursor.stripped_length < _MIN_LOCAL_CHARS:
+            return
+
+        best, best_score = self._cursor.match()
+        # The match may have run into a removed text
+        self._schedule_rebuild()
 
         # Only show if score meets threshold
         if best and len(best) >= 2 and best_score >= 300:
@@ -257,6 +389,15 @@ class PredictionEngine(QObject):
             self._pred_context = context
             self._pred_full = best
             self._show(best)
+            return
+
+        # No history text matches: continue the line with the offline model
+        completion, probability = self._ngram.predict(context.rpartition("\n")[2])
+        if completion:
+            logger.debug(f"Offline prediction: p={probability:.2f}, text='{completion[:30]}'")
+            self._pred_context = context
+            self._pred_full = completion
+            self._show(completion)
 
     # ── Word boundary → AI prediction ────────────────────────────────
 
@@ -264,6 +405,8 @@ class PredictionEngine(QObject):
         """Try AI prediction during active typing (not just at word boundaries)."""
         if self._cooldown or self._ai_busy or self._showing:
             return
+        if not self.ai_service.is_configured():
+            return
 
         context = self.input_monitor.get_context()
         if not context or len(context.strip()) < 5:
@@ -285,7 +428,6 @@ class PredictionEngine(QObject):
 
         # Don't trigger too frequently
         if hasattr(self, '_last_ai_time'):
-            import time
             if time.time() - self._last_ai_time < 3:  # Max once per 3 seconds
                 return
 
@@ -297,7 +439,6 @@ class PredictionEngine(QObject):
         self._gen += 1
         gen = self._gen
         self._ai_busy = True
-        import time
         self._last_ai_time = time.time()
         self.ai_service.request_prediction(context, text_items, gen)
         logger.debug(f"Realtime AI prediction triggered for: '{last_word}'")
@@ -306,6 +447,8 @@ class PredictionEngine(QObject):
         """Trigger AI prediction with smarter filtering."""
         if self._cooldown or self._ai_busy:
             return
+        if not self.ai_service.is_configured():
+            return
         if self._showing and len(self._pred_full) > 5:
             return
         if not self._clip_cache:
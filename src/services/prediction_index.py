@@ -0,0 +1,399 @@
+"""
+Prediction Index - Precomputed lookup structures for local clipboard matching.
+
+Built from the cached clipboard texts and updated as texts are added or
+removed, queried on every keystroke:
+
+  - Priority 1 (the typed line is the beginning of a cached text): a prefix
+    trie over the lowercase texts, ``_PREFIX_DEPTH`` characters deep.  Every
+    node stores the best-scoring text for its prefix.  Longer lines fall back
+    to the bucket of texts sharing the first ``_PREFIX_DEPTH`` characters.
+  - Priority 2 (the tail of the line is the beginning of a cached text): a
+    k-gram map from the leading 2..10 characters of each text to the longest
+    text starting with them.
+  - Priority 3 (the end of the line appears inside a cached text): a
+    generalized suffix automaton over the cached corpus.  Walking the typed
+    line through it yields the longest tail of the line that occurs anywhere
+    in the corpus, and every state carries its best continuation.
+
+Typing is tracked incrementally by a ``MatchCursor``: it holds the trie node
+and automaton state of the line typed so far, advances them by one character
+on each keystroke and keeps the previous states on an undo stack, so
+backspace is a pop.  Both a keystroke and a lookup cost O(1) amortized,
+independent of the line length and of how many texts are cached.
+
+Scores follow the original PredictionEngine heuristics; a higher priority
+always wins over a lower one.
+"""
+
+from typing import Dict, Hashable, List, Optional, Sequence, Set, Tuple
+
+_PREFIX_DEPTH = 32          # prefixes indexed directly; longer lines use buckets
+_MIN_LEAD = 2               # shortest tail / leading k-gram for priority 2
+_MAX_LEAD = 10              # longest tail / leading k-gram for priority 2
+_MIN_REMAINDER = 2          # completions shorter than this are not offered
+_MIN_TAIL = 8               # shortest partial tail accepted for priority 3
+_SAM_TEXT_CHARS = 1000      # characters of each text fed to the automaton
+_SAM_MAX_CHARS = 64_000     # automaton budget (~300 bytes per character)
+_SAM_SLACK_CHARS = 32_000   # characters appended past the budget before a rebuild
+_EDGE_BASE = 0x110000       # trie edge key: node * _EDGE_BASE + ord(char)
+
+
+def _prefix_score(typed_len: int, text_len: int) -> int:
+    return 2000 + int(typed_len / text_len * 1000) + (text_len - typed_len)
+
+
+def _lead_score(lead_len: int, text_len: int) -> int:
+    return 500 + lead_len * 10 + (text_len - lead_len)
+
+
+def _substring_score(remainder_len: int) -> int:
+    return 300 + remainder_len
+
+
+class SuffixAutomaton:
+    """Generalized suffix automaton over several texts, built online.
+
+    States are stored column-wise in parallel lists.  ``best[state]`` is the
+    occurrence with the longest continuation among all end positions of the
+    state, as ``(remaining_chars, text_id)``; ties go to the larger (newer)
+    text id.  Clones inherit the best occurrence of the state they split
+    from, and each new end position is pushed up the suffix links until it
+    stops improving, so texts can be appended without a rebuild.
+    """
+
+    __slots__ = ("_next", "_link", "_len", "_best", "chars")
+
+    def __init__(self):
+        self._next: List[dict] = [{}]
+        self._link: List[int] = [-1]
+        self._len: List[int] = [0]
+        self._best: List[Tuple[int, int]] = [(-1, -1)]
+        self.chars = 0
+
+    def __len__(self) -> int:
+        return len(self._len)
+
+    def _new_state(self, length: int, transitions: dict, link: int, best) -> int:
+        self._next.append(transitions)
+        self._link.append(link)
+        self._len.append(length)
+        self._best.append(best)
+        return len(self._len) - 1
+
+    def add(self, text: str, full_length: int, text_id: int):
+        """Append a text; ``full_length`` is the length of the untruncated text."""
+        nxt, link, length, best = self._next, self._link, self._len, self._best
+        last = 0
+        for pos, ch in enumerate(text):
+            q = nxt[last].get(ch)
+            if q is not None:
+                # The text so far already occurs: reuse or split the state
+                if length[last] + 1 == length[q]:
+                    cur = q
+                else:
+                    cur = self._new_state(length[last] + 1, dict(nxt[q]), link[q], best[q])
+                    link[q] = cur
+                    p = last
+                    while p != -1 and nxt[p].get(ch) == q:
+                        nxt[p][ch] = cur
+                        p = link[p]
+            else:
+                cur = self._new_state(length[last] + 1, {}, 0, (-1, -1))
+                p = last
+                while p != -1 and ch not in nxt[p]:
+                    nxt[p][ch] = cur
+                    p = link[p]
+                if p != -1:
+                    q = nxt[p][ch]
+                    if length[p] + 1 == length[q]:
+                        link[cur] = q
+                    else:
+                        clone = self._new_state(length[p] + 1, dict(nxt[q]), link[q], best[q])
+                        while p != -1 and nxt[p].get(ch) == q:
+                            nxt[p][ch] = clone
+                            p = link[p]
+                        link[q] = clone
+                        link[cur] = clone
+
+            occurrence = (full_length - pos - 1, text_id)
+            state = cur
+            while state > 0 and occurrence > best[state]:
+                best[state] = occurrence
+                state = link[state]
+            last = cur
+        self.chars += len(text)
+
+    def step(self, state: int, matched: int, ch: str) -> Tuple[int, int]:
+        """Extend a match of ``matched`` characters ending in ``state`` by one
+        character; returns the state and length of the longest matching tail."""
+        nxt, link = self._next, self._link
+        while state and ch not in nxt[state]:
+            state = link[state]
+            matched = self._len[state]
+        target = nxt[state].get(ch)
+        if target is None:
+            return 0, 0
+        return target, matched + 1
+
+    def best(self, state: int) -> Tuple[int, int]:
+        """Return (remaining_chars, text_id) of the best occurrence of a state."""
+        return self._best[state]
+
+
+class LocalMatchIndex:
+    """Index over cached clipboard texts.
+
+    Built from a list of texts (most recent first).  ``add`` appends a text
+    as the most recent one and ``remove`` drops a text by key, so the index
+    can follow history changes without a rebuild.  Removed texts are only
+    tombstoned; the index reports ``stale`` once tombstones start to shadow
+    live matches or the automaton outgrows its budget, and the owner then
+    rebuilds it from its texts.
+    """
+
+    def __init__(self, texts: Sequence[str] = (), keys: Optional[Sequence[Hashable]] = None):
+        # Texts are stored oldest first; a text's position is its id
+        self._texts: List[str] = []
+        self._lower: List[str] = []
+        self._ids: Dict[Hashable, int] = {}                   # key -> idx
+        self._removed: Set[int] = set()
+        self._stale = False
+
+        self._edges: Dict[int, int] = {}                      # edge key -> child node
+        self._node_best: List[Optional[Tuple[int, int]]] = [None]   # node -> (score, idx)
+        self._prefix_bucket: Dict[int, List[int]] = {}        # deepest node -> idxs
+        self._leads: Dict[str, int] = {}                      # leading k-gram -> idx
+        self._automaton = SuffixAutomaton()
+
+        # The automaton keeps the most recent texts that fit the budget
+        budget = _SAM_MAX_CHARS
+        indexed = 0
+        for text in texts:
+            budget -= min(len(text), _SAM_TEXT_CHARS)
+            if budget < 0:
+                break
+            indexed += 1
+        if keys is None:
+            keys = [None] * len(texts)
+        for pos in range(len(texts) - 1, -1, -1):
+            self._append(texts[pos], keys[pos], pos < indexed)
+
+    def __len__(self) -> int:
+        return len(self._texts) - len(self._removed)
+
+    @property
+    def texts(self) -> List[str]:
+        """Live texts, most recent first."""
+        return [self._texts[idx] for idx in range(len(self._texts) - 1, -1, -1)
+                if idx not in self._removed]
+
+    @property
+    def stale(self) -> bool:
+        """True once the index should be rebuilt from its texts."""
+        return self._stale
+
+    def add(self, text: str, key: Optional[Hashable] = None):
+        """Add a text as the most recent one, replacing the text with the same key."""
+        self._append(text, key, True)
+        if self._automaton.chars > _SAM_MAX_CHARS + _SAM_SLACK_CHARS:
+            self._stale = True
+
+    def remove(self, key: Hashable) -> bool:
+        """Remove the text added with ``key``; False if there is none."""
+        idx = self._ids.pop(key, None)
+        if idx is None:
+            return False
+        self._tombstone(idx)
+        return True
+
+    def _tombstone(self, idx: int):
+        self._removed.add(idx)
+        if len(self._removed) * 4 > len(self._texts):
+            self._stale = True
+
+    def _append(self, text: str, key: Optional[Hashable], in_automaton: bool):
+        lower = text.lower()
+        # Case folding that changes the length would break offsets
+        if len(lower) != len(text):
+            return
+        idx = len(self._texts)
+        if key is not None:
+            previous = self._ids.get(key)
+            if previous is not None:
+                self._tombstone(previous)
+            self._ids[key] = idx
+        self._texts.append(text)
+        self._lower.append(lower)
+        length = len(lower)
+
+        # Later texts win ties, so the most recent text is preferred
+        edges, node_best = self._edges, self._node_best
+        node = 0
+        # Only prefixes that leave a completion get a node
+        for depth in range(1, min(length - _MIN_REMAINDER, _PREFIX_DEPTH) + 1):
+            edge = node * _EDGE_BASE + ord(lower[depth - 1])
+            child = edges.get(edge)
+            if child is None:
+                child = len(node_best)
+                node_best.append(None)
+                edges[edge] = child
+            node = child
+            if depth >= _MIN_LEAD:
+                score = _prefix_score(depth, length)
+                best = node_best[node]
+                if best is None or score >= best[0]:
+                    node_best[node] = (score, idx)
+        if length > _PREFIX_DEPTH + _MIN_REMAINDER:
+            self._prefix_bucket.setdefault(node, []).append(idx)
+
+        for lead_len in range(_MIN_LEAD, min(_MAX_LEAD, length - _MIN_REMAINDER) + 1):
+            lead = lower[:lead_len]
+            best = self._leads.get(lead)
+            if best is None or length >= len(self._lower[best]):
+                self._leads[lead] = idx
+
+        if in_automaton:
+            self._automaton.add(lower[:_SAM_TEXT_CHARS], length, idx + 1)
+
+    def _live(self, idx: int) -> bool:
+        if idx in self._removed:
+            # A tombstone shadows whatever the next best live text would be
+            self._stale = True
+            return False
+        return True
+
+    def cursor(self, line: str = "") -> "MatchCursor":
+        """Return a cursor positioned after ``line``."""
+        return MatchCursor(self, line)
+
+    def match(self, line: str) -> Tuple[str, int]:
+        """Return (completion, score) for the line being typed, or ("", 0)."""
+        return MatchCursor(self, line).match()
+
+    def _step_prefix(self, node: int, depth: int, ch: str) -> int:
+        """Trie node after typing ``ch`` as character number ``depth``; -1 once
+        no indexed text starts with the line."""
+        if node < 0 or depth > _PREFIX_DEPTH:
+            return node
+        return self._edges.get(node * _EDGE_BASE + ord(ch), -1)
+
+    def _match_prefix(self, node: int, typed: List[str]):
+        typed_len = len(typed)
+        if node < 0 or typed_len < _MIN_LEAD:
+            return None
+        if typed_len <= _PREFIX_DEPTH:
+            best = self._node_best[node]
+            if best is None:
+                return None
+            score, idx = best
+            if not self._live(idx):
+                return None
+            return self._texts[idx][typed_len:], score
+
+        line = "".join(typed)
+        best_score, best_idx = 0, -1
+        for idx in reversed(self._prefix_bucket.get(node, ())):
+            lower = self._lower[idx]
+            if (len(lower) - typed_len >= _MIN_REMAINDER and lower.startswith(line)
+                    and idx not in self._removed):
+                score = _prefix_score(typed_len, len(lower))
+                if score > best_score:
+                    best_score, best_idx = score, idx
+        if best_idx < 0:
+            return None
+        return self._texts[best_idx][typed_len:], best_score
+
+    def _match_lead(self, typed: List[str]):
+        tail = "".join(typed[-_MAX_LEAD:])
+        best_score, best = 0, None
+        for lead_len in range(len(tail), _MIN_LEAD - 1, -1):
+            idx = self._leads.get(tail[-lead_len:])
+            if idx is None or not self._live(idx):
+                continue
+            score = _lead_score(lead_len, len(self._lower[idx]))
+            if score > best_score:
+                best_score, best = score, self._texts[idx][lead_len:]
+        if best is None:
+            return None
+        return best, best_score
+
+    def _match_substring(self, state: int, matched: int, typed_len: int):
+        if matched < min(typed_len, _MIN_TAIL):
+            return None
+        remaining, text_id = self._automaton.best(state)
+        if not self._live(text_id - 1) or remaining < _MIN_REMAINDER:
+            return None
+        text = self._texts[text_id - 1]
+        return text[len(text) - remaining:], _substring_score(remaining)
+
+
+class MatchCursor:
+    """Matching state of the line being typed, updated one keystroke at a time.
+
+    ``push`` advances the trie node and automaton state by one character,
+    ``pop`` restores the states saved by the matching ``push``.  A newline
+    starts a new line; popping past the start of the line returns False, and
+    the caller has to ``reset`` the cursor to the previous line.
+    """
+
+    __slots__ = ("_index", "_typed", "_undo", "_node", "_state", "_matched", "_trailing")
+
+    def __init__(self, index: LocalMatchIndex, line: str = ""):
+        self._index = index
+        self.reset(line)
+
+    def reset(self, line: str = ""):
+        """Position the cursor after ``line``."""
+        self._typed: List[str] = []     # lowercase line without leading whitespace
+        self._undo: List[tuple] = []
+        self._node = 0
+        self._state = 0
+        self._matched = 0
+        self._trailing = 0              # trailing whitespace characters
+        for ch in line:
+            self.push(ch)
+
+    @property
+    def stripped_length(self) -> int:
+        """Length of the line without surrounding whitespace."""
+        return len(self._typed) - self._trailing
+
+    def push(self, ch: str):
+        if ch == "\n":
+            self.reset()
+            return
+        is_space = ch.isspace()
+        typed = self._typed
+        if is_space and not typed:
+            # Leading whitespace is not part of the match
+            self._undo.append(None)
+            return
+        self._undo.append((self._node, self._state, self._matched, self._trailing))
+        lower = ch.lower()
+        if len(lower) != 1:
+            lower = ch
+        typed.append(lower)
+        self._node = self._index._step_prefix(self._node, len(typed), lower)
+        self._state, self._matched = self._index._automaton.step(self._state, self._matched, lower)
+        self._trailing = self._trailing + 1 if is_space else 0
+
+    def pop(self) -> bool:
+        """Undo the last ``push``; False if the cursor is at the start of the line."""
+        if not self._undo:
+            return False
+        saved = self._undo.pop()
+        if saved is not None:
+            self._node, self._state, self._matched, self._trailing = saved
+            self._typed.pop()
+        return True
+
+    def match(self) -> Tuple[str, int]:
+        """Return (completion, score) for the line so far, or ("", 0)."""
+        index, typed = self._index, self._typed
+        if not typed or not index:
+            return "", 0
+        return (index._match_prefix(self._node, typed)
+                or index._match_lead(typed)
+                or index._match_substring(self._state, self._matched, len(typed))
+                or ("", 0))
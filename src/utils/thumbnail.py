@@ -0,0 +1,48 @@
+"""
+Thumbnail - Render small list thumbnails for captured images.
+
+Uses QImage only, which is safe to use outside the GUI thread, so thumbnails
+can be produced by the history writer thread at capture/migration time.
+"""
+
+from typing import Optional
+
+from PyQt6.QtCore import QBuffer, QByteArray, Qt
+from PyQt6.QtGui import QImage
+
+from utils.logger import logger
+
+# Logical size of the list thumbnail; stored at 2x for high-DPI screens.
+THUMB_WIDTH = 60
+THUMB_HEIGHT = 44
+THUMB_SCALE = 2
+_THUMB_QUALITY = 80
+
+
+def make_thumbnail(data: bytes) -> Optional[bytes]:
+    """Decode image bytes and return a JPEG thumbnail, or None on failure."""
+    image = QImage()
+    if not image.loadFromData(data) or image.isNull():
+        return None
+    return render_thumbnail(image)
+
+
+def render_thumbnail(image: QImage) -> Optional[bytes]:
+    """Scale an already decoded image down to a JPEG thumbnail."""
+    try:
+        if image.isNull():
+            return None
+        thumb = image.scaled(
+            THUMB_WIDTH * THUMB_SCALE,
+            THUMB_HEIGHT * THUMB_SCALE,
+            Qt.AspectRatioMode.KeepAspectRatio,
+            Qt.TransformationMode.SmoothTransformation,
+        )
+        byte_array = QByteArray()
+        buffer = QBuffer(byte_array)
+        buffer.open(QBuffer.OpenModeFlag.WriteOnly)
+        thumb.save(buffer, "JPEG", _THUMB_QUALITY)
+        return byte_array.data()
+    except Exception as e:
+        logger.warning(f"Failed to render thumbnail: {e}")
+        return None
@@ -25,6 +25,9 @@ class ExportWorker(QThread):
             self.finished.emit(success, self.file_path)
         except Exception as e:
             self.finished.emit(False, str(e))
+        finally:
+            # 释放本线程的数据库连接（WAL 模式下读写可与主线程并行）
+            self.controller.service.db.close()
 
 
 class ImportWorker(QThread):
@@ -43,6 +46,9 @@ class ImportWorker(QThread):
             self.finished.emit(success, self.file_path)
         except Exception as e:
             self.finished.emit(False, str(e))
+        finally:
+            # 释放本线程的数据库连接（WAL 模式下读写可与主线程并行）
+            self.controller.service.db.close()
 
 
 class DataDialog(QDialog):
@@ -153,9 +159,10 @@ class DataDialog(QDialog):
         """更新统计信息"""
         try:
             count = self.clipboard_controller.get_count()
+            size_mb = self.clipboard_controller.get_stored_bytes() / (1024 * 1024)
             self.stats_label.setText(
                 f"📋 当前历史记录总数: <b>{count}</b> 条\n"
-                f"💾 数据存储在本地数据库中\n"
+                f"💾 数据存储在本地数据库中，约占用 {size_mb:.1f} MB\n"
                 f"🔒 数据仅保存在您的设备上"
             )
         except Exception as e:
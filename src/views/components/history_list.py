@@ -1,27 +1,166 @@
 from PyQt6.QtWidgets import (
-   QListWidget, QAbstractItemView, QMenu,
-   QApplication, QMessageBox, QTextEdit,
-   QWidget, QHBoxLayout, QVBoxLayout, QLabel,
-    QPushButton, QListWidgetItem
+    QListView, QAbstractItemView, QMenu,
+    QMessageBox, QTextEdit, QStyledItemDelegate, QStyle
+)
+from PyQt6.QtCore import (
+    pyqtSignal, Qt, QSize, QTimer, QRect, QRectF, QEvent,
+    QAbstractListModel, QModelIndex
+)
+from PyQt6.QtGui import (
+    QAction, QFont, QColor, QPixmap, QPixmapCache, QPainter, QPen, QFontMetrics
 )
-from PyQt6.QtCore import pyqtSignal, Qt, QSize, QTimer
-from PyQt6.QtGui import QAction, QFont, QIcon, QColor, QPixmap, QImage
 
-from models.clipboard_item import ClipboardItem, ContentType
+from models.clipboard_item import ClipboardItem, ClipboardListRow, ContentType
 from utils.logger import logger
+from utils.thumbnail import THUMB_HEIGHT, THUMB_SCALE, THUMB_WIDTH
 
 
-class HistoryListItem(QWidget):
-    """自定义历史列表项"""
-    
+# 自定义数据角色
+HashRole = Qt.ItemDataRole.UserRole       # content_hash
+ItemRole = Qt.ItemDataRole.UserRole + 1   # ClipboardListRow
+
+
+class HistoryListModel(QAbstractListModel):
+    """历史记录列表模型：保存已加载的列表行（不含完整内容），不为每行创建部件"""
+
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self._items: list[ClipboardListRow] = []
+        self._rows: dict[str, int] = {}  # content_hash -> 行号
+
+    def rowCount(self, parent=QModelIndex()) -> int:
+        return 0 if parent.isValid() else len(self._items)
+
+    def data(self, index: QModelIndex, role: int = Qt.ItemDataRole.DisplayRole):
+        if not index.isValid() or not 0 <= index.row() < len(self._items):
+            return None
+        item = self._items[index.row()]
+        if role == ItemRole:
+            return item
+        if role == HashRole:
+            return item.content_hash
+        if role == Qt.ItemDataRole.DisplayRole:
+            return item.preview_text(60)
+        if role == Qt.ItemDataRole.ToolTipRole:
+            if item.get_source_display() != "未知来源":
+                return item.get_source_tooltip()
+        return None
+
+    def items(self) -> list[ClipboardListRow]:
+        return self._items
+
+    def item_at(self, row: int) -> ClipboardListRow | None:
+        if 0 <= row < len(self._items):
+            return self._items[row]
+        return None
+
+    def row_of(self, content_hash: str) -> int:
+        return self._rows.get(content_hash, -1)
+
+    def set_items(self, items: list[ClipboardListRow]):
+        """替换全部数据"""
+        self.beginResetModel()
+        self._items = list(items)
+        self._reindex()
+        self.endResetModel()
+
+    def append_items(self, items: list[ClipboardListRow]):
+        """在末尾追加数据（忽略已存在的项目）"""
+        items = [it for it in items if it.content_hash not in self._rows]
+        if not items:
+            return
+        first = len(self._items)
+        self.beginInsertRows(QModelIndex(), first, first + len(items) - 1)
+        for offset, item in enumerate(items):
+            self._rows[item.content_hash] = first + offset
+            self._items.append(item)
+        self.endInsertRows()
+
+    def insert_item(self, item: ClipboardListRow) -> int:
+        """按 (收藏, 时间) 倒序插入新项目；已存在的同内容项目先移除，返回插入的行号"""
+        self.remove_hashes([item.content_hash])
+        row = self._sorted_row(item)
+        self.beginInsertRows(QModelIndex(), row, row)
+        self._items.insert(row, item)
+        self._reindex(row)
+        self.endInsertRows()
+        return row
+
+    def remove_hashes(self, hashes) -> int:
+        """移除指定的项目，返回实际移除的行数"""
+        rows = sorted((self._rows[h] for h in set(hashes) if h in self._rows), reverse=True)
+        if not rows:
+            return 0
+        # 合并相邻行，倒序移除以保持行号有效
+        start = end = rows[0]
+        for row in rows[1:] + [None]:
+            if row is not None and row == start - 1:
+                start = row
+                continue
+            self.beginRemoveRows(QModelIndex(), start, end)
+            del self._items[start:end + 1]
+            self.endRemoveRows()
+            if row is not None:
+                start = end = row
+        for content_hash in hashes:
+            self._rows.pop(content_hash, None)
+        self._reindex(rows[-1])
+        return len(rows)
+
+    def set_favorite(self, content_hash: str, is_favorite: bool, keep_order: bool = False) -> int:
+        """更新单行的收藏状态，并移动到排序后的位置；返回新的行号，不在列表中时返回 -1"""
+        row = self.row_of(content_hash)
+        if row < 0:
+            return -1
+        item = self._items[row]
+        item.is_favorite = is_favorite
+        index = self.index(row)
+        self.dataChanged.emit(index, index)
+        if keep_order:
+            return row
+
+        del self._items[row]
+        target = self._sorted_row(item)
+        self._items.insert(row, item)
+        if target != row:
+            # beginMoveRows 的目标行号是移动前的位置
+            self.beginMoveRows(QModelIndex(), row, row, QModelIndex(),
+                               target + 1 if target > row else target)
+            self._items.insert(target, self._items.pop(row))
+            self.endMoveRows()
+            self._reindex(min(row, target))
+        return target
+
+    def _sorted_row(self, item: ClipboardListRow) -> int:
+        """新项目在 (is_favorite, timestamp) 倒序中的插入位置"""
+        key = (item.is_favorite, item.timestamp)
+        for row, other in enumerate(self._items):
+            if (other.is_favorite, other.timestamp) < key:
+                return row
+        return len(self._items)
+
+    def _reindex(self, start: int = 0):
+        """重建 content_hash -> 行号映射（从 start 行开始）"""
+        if start <= 0:
+            self._rows = {}
+            start = 0
+        for row in range(start, len(self._items)):
+            self._rows[self._items[row].content_hash] = row
+
+
+class HistoryItemDelegate(QStyledItemDelegate):
+    """直接绘制历史记录卡片：图标/缩略图、预览文字、时间、来源和收藏星标"""
+
+    favoriteClicked = pyqtSignal(str)  # content_hash
+
     # 亮色主题颜色
     _LIGHT = {
         "border": "#D8E3EE",
         "selected_border": "#0A84FF",
-        "selected_bg": "rgba(10, 132, 255, 0.12)",
-        "favorite_bg": "rgba(255, 204, 102, 0.14)",
-        "card_bg": "rgba(255, 255, 255, 0.75)",
-        "hover_bg": "rgba(248, 251, 255, 0.95)",
+        "selected_bg": QColor(10, 132, 255, 31),
+        "favorite_bg": QColor(255, 204, 102, 36),
+        "card_bg": QColor(255, 255, 255, 191),
+        "hover_bg": QColor(248, 251, 255, 242),
         "text": "#152033",
         "meta": "#7D8EA3",
         "source": "#0A84FF",
@@ -30,218 +169,203 @@ class HistoryListItem(QWidget):
     _DARK = {
         "border": "#29415B",
         "selected_border": "#4CC2FF",
-        "selected_bg": "rgba(76, 194, 255, 0.14)",
-        "favorite_bg": "rgba(255, 190, 92, 0.16)",
-        "card_bg": "rgba(24, 33, 47, 0.76)",
-        "hover_bg": "rgba(32, 51, 71, 0.92)",
+        "selected_bg": QColor(76, 194, 255, 36),
+        "favorite_bg": QColor(255, 190, 92, 41),
+        "card_bg": QColor(24, 33, 47, 194),
+        "hover_bg": QColor(32, 51, 71, 235),
         "text": "#F5F9FF",
         "meta": "#9FB3C8",
         "source": "#4CC2FF",
     }
-    
+
+    ROW_HEIGHT = 72
     # 图片缩略图尺寸
-    _THUMB_W = 60
-    _THUMB_H = 44
+    _THUMB_W = THUMB_WIDTH
+    _THUMB_H = THUMB_HEIGHT
+    _ICON_SIZE = 28
+    _STAR_SIZE = 32
+    _MARGIN_H = 10
+    _MARGIN_V = 8
+    _SPACING = 10
+    # 进程级 QPixmapCache 的容量（KB），按像素字节数淘汰最久未用的缩略图
+    _PIXMAP_CACHE_KB = 16 * 1024
 
-    def __init__(self, item: ClipboardItem, parent=None):
+    def __init__(self, parent=None):
         super().__init__(parent)
-        self.item_data = item
-        self._selected = False
-        self._thumbnail: QPixmap | None = None  # 缩略图缓存
-        # 允许 QWidget 渲染 stylesheet 中的 background 和 border
-        self.setAttribute(Qt.WidgetAttribute.WA_StyledBackground, True)
-        self._init_ui()
+        if QPixmapCache.cacheLimit() < self._PIXMAP_CACHE_KB:
+            QPixmapCache.setCacheLimit(self._PIXMAP_CACHE_KB)
 
-    def _init_ui(self):
-        """初始化UI"""
-        layout = QHBoxLayout(self)
-        layout.setContentsMargins(10, 8, 10, 8)
-        layout.setSpacing(10)
+        self._text_font = QFont()
+        self._text_font.setPointSize(10)
+        self._text_font.setWeight(QFont.Weight.Medium)
+        self._meta_font = QFont()
+        self._meta_font.setPixelSize(11)
+        self._source_font = QFont()
+        self._source_font.setPixelSize(10)
+        self._icon_font = QFont()
+        self._icon_font.setPixelSize(18)
+        self._star_font = QFont()
+        self._star_font.setPixelSize(16)
 
-        # 左侧：图标或缩略图
-        self.icon_label = QLabel()
-        self.icon_label.setAlignment(Qt.AlignmentFlag.AlignCenter)
-        layout.addWidget(self.icon_label)
-
-        # 内容区域
-        content_layout = QVBoxLayout()
-        content_layout.setSpacing(3)
-        content_layout.setContentsMargins(0, 0, 0, 0)
-
-        self.text_label = QLabel()
-        self.text_label.setWordWrap(False)
-        self.text_label.setStyleSheet("border: none; background: transparent;")
-        font = QFont()
-        font.setPointSize(10)
-        font.setWeight(QFont.Weight.Medium)
-        self.text_label.setFont(font)
-        content_layout.addWidget(self.text_label)
-
-        # 时间和来源在一行
-        info_layout = QHBoxLayout()
-        info_layout.setSpacing(8)
-        info_layout.setContentsMargins(0, 0, 0, 0)
-
-        self.time_label = QLabel()
-        info_layout.addWidget(self.time_label)
-
-        self.source_label = QLabel()
-        info_layout.addWidget(self.source_label)
-        info_layout.addStretch()
-
-        content_layout.addLayout(info_layout)
-
-        layout.addLayout(content_layout, 1)
-
-        # 收藏按钮
-        self.fav_button = QPushButton()
-        self.fav_button.setObjectName("iconButton")
-        self.fav_button.setFixedSize(32, 32)
-        self.fav_button.setStyleSheet("border: none; background: transparent; font-size: 16px;")
-        layout.addWidget(self.fav_button)
-
-        self._refresh_display()
-        self._update_style()
+    # ── 几何 ──────────────────────────────────────────────────
+    def _card_rect(self, option) -> QRect:
+        return option.rect.adjusted(4, 0, -4, 0)
+
+    def _star_rect(self, option) -> QRect:
+        card = self._card_rect(option)
+        return QRect(
+            card.right() - self._MARGIN_H - self._STAR_SIZE + 1,
+            card.center().y() - self._STAR_SIZE // 2,
+            self._STAR_SIZE, self._STAR_SIZE,
+        )
+
+    def sizeHint(self, option, index) -> QSize:
+        return QSize(max(option.rect.width(), 0), self.ROW_HEIGHT)
 
     # ── 缩略图生成 ────────────────────────────────────────────
-    def _make_thumbnail(self) -> QPixmap | None:
-        """将 base64 图片内容解码并缩放为缩略图，结果缓存"""
-        if self._thumbnail is not None:
-            return self._thumbnail
-        try:
-            content = self.item_data.content
-            if content.startswith('data:image'):
-                import base64 as _b64
-                raw = _b64.b64decode(content.split(',', 1)[1])
-                img = QImage()
-                if img.loadFromData(raw) and not img.isNull():
-                    pix = QPixmap.fromImage(img)
-                    self._thumbnail = pix.scaled(
-                        self._THUMB_W, self._THUMB_H,
-                        Qt.AspectRatioMode.KeepAspectRatio,
-                        Qt.TransformationMode.SmoothTransformation,
-                    )
-                    return self._thumbnail
-        except Exception as e:
-            logger.warning(f"生成缩略图失败: {e}")
-        return None
+    def _thumbnail(self, item: ClipboardListRow) -> QPixmap | None:
+        """解码写入时生成的缩略图，缓存在进程级 QPixmapCache 中"""
+        if not item.thumbnail:
+            return None
+        key = f"clip-thumb:{item.content_hash}"
+        pixmap = QPixmapCache.find(key)
+        if pixmap is None:
+            pixmap = QPixmap()
+            if not pixmap.loadFromData(item.thumbnail):
+                return None
+            pixmap.setDevicePixelRatio(THUMB_SCALE)
+            QPixmapCache.insert(key, pixmap)
+        return pixmap
 
-    # ── 内容刷新 ──────────────────────────────────────────────
-    def _refresh_display(self):
-        """刷新图标/缩略图、文字、时间、收藏按钮"""
-        item = self.item_data
+    # ── 绘制 ──────────────────────────────────────────────────
+    def paint(self, painter: QPainter, option, index: QModelIndex):
+        item = index.data(ItemRole)
+        if item is None:
+            return
 
+        from views.styles.main_style import StyleManager
+        c = self._DARK if StyleManager.is_dark_mode() else self._LIGHT
+        selected = bool(option.state & QStyle.StateFlag.State_Selected)
+        hovered = bool(option.state & QStyle.StateFlag.State_MouseOver)
+
+        painter.save()
+        painter.setRenderHint(QPainter.RenderHint.Antialiasing)
+
+        # 卡片背景与边框
+        card = QRectF(self._card_rect(option)).adjusted(0.5, 0.5, -0.5, -0.5)
+        if selected:
+            background, border = c["selected_bg"], c["selected_border"]
+        else:
+            background = c["hover_bg"] if hovered else (
+                c["favorite_bg"] if item.is_favorite else c["card_bg"]
+            )
+            border = c["border"]
+        painter.setPen(QPen(QColor(border), 1))
+        painter.setBrush(background)
+        painter.drawRoundedRect(card, 12, 12)
+
+        inner = self._card_rect(option).adjusted(
+            self._MARGIN_H, self._MARGIN_V, -self._MARGIN_H, -self._MARGIN_V
+        )
+
+        # 左侧：图标或缩略图
+        painter.setPen(QColor(c["text"]))
         if item.content_type == ContentType.IMAGE:
-            # 图片：显示缩略图
-            self.icon_label.setFixedSize(self._THUMB_W, self._THUMB_H)
-            thumb = self._make_thumbnail()
+            icon_rect = QRect(inner.left(), inner.center().y() - self._THUMB_H // 2,
+                              self._THUMB_W, self._THUMB_H)
+            thumb = self._thumbnail(item)
             if thumb:
-                self.icon_label.setPixmap(thumb)
-                self.icon_label.setText("")
-                self.icon_label.setStyleSheet(
-                    "border: none; background: transparent; border-radius: 4px;"
-                )
+                size = thumb.deviceIndependentSize().toSize()
+                target = QRect(0, 0, size.width(), size.height())
+                target.moveCenter(icon_rect.center())
+                painter.drawPixmap(target, thumb)
             else:
-                self.icon_label.setPixmap(QPixmap())
-                self.icon_label.setText("🖼️")
-                self.icon_label.setStyleSheet(
-                    "font-size: 20px; border: none; background: transparent;"
-                )
+                font = QFont(self._icon_font)
+                font.setPixelSize(20)
+                painter.setFont(font)
+                painter.drawText(icon_rect, Qt.AlignmentFlag.AlignCenter, "🖼️")
         else:
-            # 其他类型：emoji 图标
-            self.icon_label.setFixedSize(28, 28)
-            self.icon_label.setPixmap(QPixmap())
-            self.icon_label.setText(item.get_icon())
-            self.icon_label.setStyleSheet("font-size: 18px; border: none; background: transparent;")
+            icon_rect = QRect(inner.left(), inner.center().y() - self._ICON_SIZE // 2,
+                              self._ICON_SIZE, self._ICON_SIZE)
+            painter.setFont(self._icon_font)
+            painter.drawText(icon_rect, Qt.AlignmentFlag.AlignCenter, item.get_icon())
+
+        # 右侧：收藏星标
+        star_rect = self._star_rect(option)
+        painter.setFont(self._star_font)
+        painter.setPen(QColor(c["source"]))
+        painter.drawText(star_rect, Qt.AlignmentFlag.AlignCenter,
+                         "⭐" if item.is_favorite else "☆")
 
-        self.text_label.setText(item.preview_text(60))
-        self.time_label.setText(item.timestamp.strftime("%m-%d %H:%M"))
+        # 中间：预览文字、时间和来源
+        text_left = icon_rect.right() + 1 + self._SPACING
+        text_width = max(star_rect.left() - self._SPACING - text_left, 0)
+        text_metrics = QFontMetrics(self._text_font)
+        meta_metrics = QFontMetrics(self._meta_font)
+        block_height = text_metrics.height() + 3 + meta_metrics.height()
+        top = inner.center().y() - block_height // 2
+
+        painter.setFont(self._text_font)
+        painter.setPen(QColor(c["text"]))
+        preview = text_metrics.elidedText(
+            index.data(Qt.ItemDataRole.DisplayRole) or "",
+            Qt.TextElideMode.ElideRight, text_width,
+        )
+        painter.drawText(QRect(text_left, top, text_width, text_metrics.height()),
+                         Qt.AlignmentFlag.AlignLeft | Qt.AlignmentFlag.AlignVCenter, preview)
+
+        meta_top = top + text_metrics.height() + 3
+        time_text = item.timestamp.strftime("%m-%d %H:%M")
+        painter.setFont(self._meta_font)
+        painter.setPen(QColor(c["meta"]))
+        time_width = meta_metrics.horizontalAdvance(time_text)
+        painter.drawText(QRect(text_left, meta_top, time_width, meta_metrics.height()),
+                         Qt.AlignmentFlag.AlignLeft | Qt.AlignmentFlag.AlignVCenter, time_text)
 
-        # 显示来源
         source_display = item.get_source_display()
         if source_display and source_display != "未知来源":
-            self.source_label.setText(f"📍 {source_display}")
-            self.source_label.setToolTip(item.get_source_tooltip())
-        else:
-            self.source_label.setText("")
+            source_left = text_left + time_width + 8
+            source_width = max(text_left + text_width - source_left, 0)
+            source_metrics = QFontMetrics(self._source_font)
+            painter.setFont(self._source_font)
+            painter.setPen(QColor(c["source"]))
+            painter.drawText(
+                QRect(source_left, meta_top, source_width, meta_metrics.height()),
+                Qt.AlignmentFlag.AlignLeft | Qt.AlignmentFlag.AlignVCenter,
+                source_metrics.elidedText(f"📍 {source_display}",
+                                          Qt.TextElideMode.ElideRight, source_width),
+            )
 
-        self.fav_button.setText("⭐" if item.is_favorite else "☆")
-    
-    def _update_style(self):
-        """根据选中状态和收藏状态更新边框与背景"""
-        from views.styles.main_style import StyleManager
-        c = self._DARK if StyleManager.is_dark_mode() else self._LIGHT
+        painter.restore()
 
-        self.text_label.setStyleSheet(
-            f"color: {c['text']}; border: none; background: transparent;"
-        )
-        self.time_label.setStyleSheet(
-            f"color: {c['meta']}; font-size: 11px; border: none; background: transparent;"
-        )
-        self.source_label.setStyleSheet(
-            f"color: {c['source']}; font-size: 10px; border: none; background: transparent;"
-        )
-        self.fav_button.setStyleSheet(
-            f"border: none; background: transparent; font-size: 16px; color: {c['source']};"
-        )
-        
-        if self._selected:
-            self.setStyleSheet(
-                f"HistoryListItem {{"
-                f"background-color: {c['selected_bg']};"
-                f"border: 1px solid {c['selected_border']};"
-                f"border-radius: 12px;"
-                f"}}"
-            )
-        elif self.item_data.is_favorite:
-            self.setStyleSheet(
-                f"HistoryListItem {{"
-                f"background-color: {c['favorite_bg']};"
-                f"border: 1px solid {c['border']};"
-                f"border-radius: 12px;"
-                f"}}"
-                f"HistoryListItem:hover {{"
-                f"background-color: {c['hover_bg']};"
-                f"}}"
-            )
-        else:
-            self.setStyleSheet(
-                f"HistoryListItem {{"
-                f"background-color: {c['card_bg']};"
-                f"border: 1px solid {c['border']};"
-                f"border-radius: 12px;"
-                f"}}"
-                f"HistoryListItem:hover {{"
-                f"background-color: {c['hover_bg']};"
-                f"}}"
-            )
-    
-    def set_selected(self, selected: bool):
-        """由 HistoryList 调用，更新选中状态样式"""
-        if self._selected != selected:
-            self._selected = selected
-            self._update_style()
-    
-    def update_item(self, item: ClipboardItem):
-        """更新显示"""
-        self.item_data = item
-        self._thumbnail = None  # 清除旧缩略图缓存
-        self._refresh_display()
-        self._update_style()
+    def editorEvent(self, event, model, option, index) -> bool:
+        """点击收藏星标时切换收藏状态"""
+        if event.type() in (QEvent.Type.MouseButtonRelease, QEvent.Type.MouseButtonDblClick):
+            if self._star_rect(option).contains(event.position().toPoint()):
+                if event.type() == QEvent.Type.MouseButtonRelease:
+                    self.favoriteClicked.emit(index.data(HashRole))
+                return True
+        return super().editorEvent(event, model, option, index)
 
 
-class HistoryList(QListWidget):
-    """优化的历史记录列表组件"""
+class HistoryList(QListView):
+    """历史记录列表（模型/视图 + 委托绘制）"""
     
-    itemCopied = pyqtSignal(object)  # ClipboardItem
+    itemCopied = pyqtSignal(object)  # ClipboardListRow
     itemDeleted = pyqtSignal(str)    # content_hash
     favoriteToggled = pyqtSignal(str)  # content_hash
+    loadMoreRequested = pyqtSignal()   # 滚动接近底部，需要加载下一页
+    
+    # 距离底部小于该像素数时预取下一页
+    _PREFETCH_MARGIN = 300
     
     def __init__(self, parent=None):
         super().__init__(parent)
-        self._items = []  # ClipboardItem 列表
-        self._item_widgets = {}  # content_hash -> widget
-        self._prev_selected_row = -1  # 上一次选中的行号
+        self._model = HistoryListModel(self)
+        self._delegate = HistoryItemDelegate(self)
+        self._has_more = False  # 是否还有下一页
+        self._loading_more = False  # 是否正在等待下一页
+        self._item_loader = None  # content_hash -> 完整 ClipboardItem
         self._init_ui()
         
         # 延迟加载定时器
@@ -252,17 +376,23 @@ class HistoryList(QListWidget):
     def _init_ui(self):
         """初始化UI"""
         self.setObjectName("historyList")
+        self.setModel(self._model)
+        self.setItemDelegate(self._delegate)
+        self.setUniformItemSizes(True)
+        self.setSelectionMode(QAbstractItemView.SelectionMode.SingleSelection)
+        self.setEditTriggers(QAbstractItemView.EditTrigger.NoEditTriggers)
         self.setVerticalScrollMode(QAbstractItemView.ScrollMode.ScrollPerPixel)
         self.setHorizontalScrollBarPolicy(Qt.ScrollBarPolicy.ScrollBarAlwaysOff)
         self.setContextMenuPolicy(Qt.ContextMenuPolicy.CustomContextMenu)
+        self.setMouseTracking(True)
+        self.viewport().setAttribute(Qt.WidgetAttribute.WA_Hover, True)
         self.setSpacing(4)
         
         # 连接信号
         self.customContextMenuRequested.connect(self._show_context_menu)
-        self.itemClicked.connect(self._handle_item_click)
-        self.itemDoubleClicked.connect(self._handle_item_double_click)
+        self.doubleClicked.connect(self._handle_item_double_click)
+        self._delegate.favoriteClicked.connect(self.favoriteToggled.emit)
         self.verticalScrollBar().valueChanged.connect(self._on_scroll)
-        self.currentRowChanged.connect(self._on_selection_changed)
     
     def _on_scroll(self):
         """滚动时延迟加载"""
@@ -270,46 +400,43 @@ class HistoryList(QListWidget):
         self._load_timer.start(50)
     
     def _load_visible_items(self):
-        """加载可见项（虚拟滚动优化）"""
-        # 可以在这里实现更复杂的虚拟滚动逻辑
-        pass
-
-    def _item_size_hint(self, item: ClipboardItem) -> QSize:
-        item_height = 76 if item.content_type == ContentType.IMAGE else 70
-        item_width = max(self.viewport().width() - 8, 0)
-        return QSize(item_width, item_height)
-
-    def _refresh_item_sizes(self):
-        for row, item in enumerate(self._items):
-            list_item = self.item(row)
-            if list_item:
-                list_item.setSizeHint(self._item_size_hint(item))
+        """滚动接近底部（或内容不足一屏）时请求加载下一页"""
+        if not self._has_more or self._loading_more:
+            return
+        scroll_bar = self.verticalScrollBar()
+        if scroll_bar.maximum() - scroll_bar.value() > self._PREFETCH_MARGIN:
+            return
+        self._loading_more = True
+        self.loadMoreRequested.emit()
+    
+    # ── 数据 ──────────────────────────────────────────────────
+    def set_item_loader(self, loader):
+        """设置按 content_hash 获取完整项目的函数（查看完整内容时使用）"""
+        self._item_loader = loader
+    
+    def count(self) -> int:
+        return self._model.rowCount()
+    
+    def item_at(self, row: int) -> ClipboardListRow | None:
+        return self._model.item_at(row)
+    
+    def currentRow(self) -> int:
+        index = self.currentIndex()
+        return index.row() if index.isValid() else -1
+    
+    def setCurrentRow(self, row: int):
+        """选中并滚动到指定行"""
+        index = self._model.index(row)
+        if index.isValid():
+            self.setCurrentIndex(index)
+            self.scrollTo(index)
     
-    def update_items(self, items: list[ClipboardItem]):
-        """更新列表项（使用增量更新）"""
+    def update_items(self, items: list[ClipboardListRow], has_more: bool = False):
+        """更新列表项（替换为第一页数据）"""
         # 保存当前选中项
         current_row = self.currentRow()
         
-        # 清空列表
-        self.clear()
-        self._items = items
-        self._item_widgets.clear()
-        
-        # 批量添加项目
-        for i, item in enumerate(items):
-            list_item = QListWidgetItem()
-            list_item.setData(Qt.ItemDataRole.UserRole, item.content_hash)
-            list_item.setSizeHint(self._item_size_hint(item))
-            
-            self.addItem(list_item)
-            
-            # 创建自定义部件
-            widget = HistoryListItem(item)
-            widget.fav_button.clicked.connect(
-                lambda checked, h=item.content_hash: self.favoriteToggled.emit(h)
-            )
-            self.setItemWidget(list_item, widget)
-            self._item_widgets[item.content_hash] = widget
+        self._model.set_items(items)
         
         # 恢复选中或默认选中第一项
         if current_row >= 0 and current_row < len(items):
@@ -317,81 +444,53 @@ class HistoryList(QListWidget):
         elif len(items) > 0:
             self.setCurrentRow(0)
 
-        QTimer.singleShot(0, self._refresh_item_sizes)
+        self._set_has_more(has_more)
+    
+    def append_items(self, items: list[ClipboardListRow], has_more: bool = False):
+        """在列表末尾追加下一页数据"""
+        self._model.append_items(items)
+        self._set_has_more(has_more)
+    
+    def _set_has_more(self, has_more: bool):
+        """记录是否还有下一页；内容不足一屏时继续预取"""
+        self._has_more = has_more
+        self._loading_more = False
+        if has_more:
+            self._load_timer.stop()
+            self._load_timer.start(50)
     
     def filter_items(self, text: str, favorites_only: bool = False):
         """过滤列表项（支持模糊搜索）"""
         text = text.lower().strip()
         
-        items_by_hash = {it.content_hash: it for it in self._items}
-        
-        for i in range(self.count()):
-            list_item = self.item(i)
-            content_hash = list_item.data(Qt.ItemDataRole.UserRole)
-            item = items_by_hash.get(content_hash)
-            
-            if item is None:
-                list_item.setHidden(True)
-                continue
-            
+        for row, item in enumerate(self._model.items()):
             if favorites_only and not item.is_favorite:
-                list_item.setHidden(True)
+                self.setRowHidden(row, True)
                 continue
             
             if text:
-                searchable = item.content.lower()
-                if item.tags:
-                    searchable += ' ' + ' '.join(item.tags).lower()
-                list_item.setHidden(text not in searchable)
+                self.setRowHidden(row, text not in item.preview.lower())
             else:
-                list_item.setHidden(False)
-    
-    def _on_selection_changed(self, current_row: int):
-        """当选中行变化时，只更新旧选中项和新选中项的样式"""
-        prev = self._prev_selected_row
-        if prev == current_row:
-            return
-        
-        for row in (prev, current_row):
-            if 0 <= row < self.count():
-                list_item = self.item(row)
-                if list_item:
-                    content_hash = list_item.data(Qt.ItemDataRole.UserRole)
-                    widget = self._item_widgets.get(content_hash)
-                    if widget:
-                        widget.set_selected(row == current_row)
-        
-        self._prev_selected_row = current_row
+                self.setRowHidden(row, False)
     
-    def _handle_item_click(self, list_item: QListWidgetItem):
-        """处理项目点击 (仅选中，不做复制)"""
-        pass
-    
-    def _handle_item_double_click(self, list_item: QListWidgetItem):
+    def _handle_item_double_click(self, index: QModelIndex):
         """处理项目双击 (触发复制)"""
-        content_hash = list_item.data(Qt.ItemDataRole.UserRole)
-        item = self._find_item_by_hash(content_hash)
+        item = self._model.item_at(index.row())
         if item:
             self.itemCopied.emit(item)
     
-    def _find_item_by_hash(self, content_hash: str) -> ClipboardItem:
+    def _find_item_by_hash(self, content_hash: str) -> ClipboardListRow:
         """根据哈希查找项目"""
-        for item in self._items:
-            if item.content_hash == content_hash:
-                return item
-        return None
+        return self._model.item_at(self._model.row_of(content_hash))
     
     def _show_context_menu(self, position):
         """显示上下文菜单"""
         try:
-            list_item = self.itemAt(position)
-            if not list_item:
-                return
-            
-            content_hash = list_item.data(Qt.ItemDataRole.UserRole)
-            item = self._find_item_by_hash(content_hash)
+            index = self.indexAt(position)
+            item = self._model.item_at(index.row()) if index.isValid() else None
             if not item:
                 return
+            content_hash = item.content_hash
             
             menu = QMenu(self)
             dark = False
@@ -461,14 +560,17 @@ class HistoryList(QListWidget):
             delete_action.triggered.connect(lambda: self.itemDeleted.emit(content_hash))
             menu.addAction(delete_action)
             
-            menu.exec(self.mapToGlobal(position))
+            menu.exec(self.viewport().mapToGlobal(position))
             
         except Exception as e:
             logger.error(f"显示上下文菜单时发生错误: {str(e)}")
     
-    def _show_full_content(self, item: ClipboardItem):
-        """显示完整内容"""
+    def _show_full_content(self, row: ClipboardListRow):
+        """显示完整内容（按需读取）"""
         try:
+            item = self._item_loader(row.content_hash) if self._item_loader else None
+            if item is None:
+                return
             dialog = QMessageBox(self)
             dialog.setWindowTitle("剪贴板内容")
             
@@ -494,17 +596,32 @@ class HistoryList(QListWidget):
         except Exception as e:
             logger.error(f"显示完整内容时发生错误: {str(e)}")
     
-    def update_item_favorite(self, content_hash: str, is_favorite: bool):
-        """更新项目的收藏状态显示"""
-        widget = self._item_widgets.get(content_hash)
-        if widget:
-            widget.item_data.is_favorite = is_favorite
-            widget.update_item(widget.item_data)
-
-    def resizeEvent(self, event):
-        super().resizeEvent(event)
-        self._refresh_item_sizes()
-
-    def showEvent(self, event):
-        super().showEvent(event)
-        QTimer.singleShot(0, self._refresh_item_sizes)
+    def insert_item(self, item: ClipboardItem):
+        """插入新捕获的项目（已存在的同内容项目会移动到新位置）"""
+        item = ClipboardListRow.from_item(item)
+        current = self.currentIndex()
+        at_top = self.verticalScrollBar().value() == 0
+        row = self._model.insert_item(item)
+        if row >= self._model.rowCount() - 1 and self._has_more:
+            # 排在已加载数据之后，交给后续分页加载
+            self._model.remove_hashes([item.content_hash])
+            return
+        if not current.isValid() or at_top:
+            self.setCurrentRow(0)
+    
+    def remove_items(self, hashes: list[str]):
+        """移除已删除或被淘汰的项目"""
+        current_row = self.currentRow()
+        if self._model.remove_hashes(hashes) and self.count() > 0:
+            if not self.currentIndex().isValid():
+                self.setCurrentRow(min(max(current_row, 0), self.count() - 1))
+            # 移除后内容可能不足一屏，继续预取
+            self._set_has_more(self._has_more)
+    
+    def update_item_favorite(self, content_hash: str, is_favorite: bool,
+                             keep_order: bool = False):
+        """更新项目的收藏状态显示，并按收藏优先的顺序移动该行"""
+        row = self._model.set_favorite(content_hash, is_favorite, keep_order)
+        if row >= 0 and row == self._model.rowCount() - 1 and self._has_more and not keep_order:
+            # 移到了已加载数据的末尾之后，交给后续分页加载
+            self._model.remove_hashes([content_hash])
@@ -88,6 +88,13 @@ class SettingsDialog(QDialog):
         self.max_history_spinbox.setSingleStep(50)
         self.max_history_spinbox.setToolTip("设置最多保存多少条历史记录（建议 500-2000）")
         history_layout.addRow("最大历史记录数:", self.max_history_spinbox)
+        self.max_storage_spinbox = QSpinBox()
+        self.max_storage_spinbox.setRange(0, 10240)
+        self.max_storage_spinbox.setSingleStep(50)
+        self.max_storage_spinbox.setSuffix(" MB")
+        self.max_storage_spinbox.setSpecialValueText("不限制")
+        self.max_storage_spinbox.setToolTip("历史记录最多占用的磁盘空间，超出时优先删除又大又旧的非收藏记录")
+        history_layout.addRow("存储空间上限:", self.max_storage_spinbox)
         layout.addWidget(history_group)
 
         layout.addStretch()
@@ -189,6 +196,10 @@ class SettingsDialog(QDialog):
         self.ai_enabled_cb = QCheckBox("启用 AI 智能预测")
         eg_layout.addWidget(self.ai_enabled_cb)
 
+        self.offline_prediction_cb = QCheckBox("启用离线预测（无需 AI，使用本地模型）")
+        self.offline_prediction_cb.setToolTip("根据剪贴板历史训练本地模型补全输入，不访问网络")
+        eg_layout.addWidget(self.offline_prediction_cb)
+
         desc = QLabel(
             "AI 将学习你的剪贴板记录，在你打字时预测并建议内容。\n"
             "按 Tab 键接受建议，按 Esc 键忽略。"
@@ -316,6 +327,7 @@ class SettingsDialog(QDialog):
         """Write AI-related fields into Settings (used by test & save)."""
         ai = Settings.get("ai", {})
         ai["enabled"] = self.ai_enabled_cb.isChecked()
+        ai["offline_prediction"] = self.offline_prediction_cb.isChecked()
         ai["provider"] = self.ai_provider_combo.currentData()
         ai["api_url"] = self.ai_api_url.text().strip()
         ai["api_key"] = self.ai_api_key.text().strip()
@@ -371,6 +383,7 @@ class SettingsDialog(QDialog):
             self.startup_checkbox.setChecked(Settings.get("startup", True))
             self.minimize_to_tray_checkbox.setChecked(Settings.get("minimize_to_tray", False))
             self.max_history_spinbox.setValue(Settings.get("max_history", 1000))
+            self.max_storage_spinbox.setValue(Settings.get("max_storage_mb", 0))
 
             hotkeys = Settings.get("hotkeys", {})
             self.show_window_hotkey.setText(hotkeys.get("show_window", Settings.DEFAULT_HOTKEYS["show_window"]))
@@ -383,6 +396,7 @@ class SettingsDialog(QDialog):
             # AI settings
             ai = Settings.get("ai", {})
             self.ai_enabled_cb.setChecked(ai.get("enabled", False))
+            self.offline_prediction_cb.setChecked(ai.get("offline_prediction", False))
 
             provider = ai.get("provider", "openai")
             idx = self._provider_keys.index(provider) if provider in self._provider_keys else 0
@@ -411,6 +425,7 @@ class SettingsDialog(QDialog):
             Settings.set("startup", self.startup_checkbox.isChecked())
             Settings.set("minimize_to_tray", self.minimize_to_tray_checkbox.isChecked())
             Settings.set("max_history", self.max_history_spinbox.value())
+            Settings.set("max_storage_mb", self.max_storage_spinbox.value())
 
             hotkeys = Settings.get("hotkeys", {})
             hotkeys["show_window"] = self.show_window_hotkey.text() or Settings.DEFAULT_HOTKEYS["show_window"]
@@ -94,6 +94,10 @@ class MainWindow(QMainWindow):
         self._is_moving = False
         self.is_top = False
         self.show_favorites_only = False
+        
+        # 分页状态：令牌用于丢弃过期的后台分页结果
+        self._history_token = 0
+        self._history_cursor = None
         self._platform = platform.system()
         
         # 加载主题设置
@@ -334,6 +338,9 @@ class MainWindow(QMainWindow):
             # 剪贴板控制器连接
             self.clipboard_controller.history_updated.connect(self._update_history)
             self.clipboard_controller.item_added.connect(self._on_item_added)
+            self.clipboard_controller.items_removed.connect(self._on_items_removed)
+            self.clipboard_controller.favorite_changed.connect(self._on_favorite_changed)
+            self.clipboard_controller.page_loaded.connect(self._on_page_loaded)
             
             # 搜索栏连接
             self.search_bar.textChanged.connect(self._on_search_changed)
@@ -346,6 +353,8 @@ class MainWindow(QMainWindow):
             self.history_list.itemCopied.connect(self._handle_item_copy)
             self.history_list.itemDeleted.connect(self._handle_item_delete)
             self.history_list.favoriteToggled.connect(self._handle_favorite_toggle)
+            self.history_list.loadMoreRequested.connect(self._load_more_history)
+            self.history_list.set_item_loader(self.clipboard_controller.get_item)
             
             # 置顶按钮连接
             self.top_button.clicked.connect(self.toggle_top_window)
@@ -415,15 +424,16 @@ class MainWindow(QMainWindow):
         self._update_debounce.start()
 
     def _do_update_history(self):
-        """实际执行历史记录列表更新"""
+        """实际执行历史记录列表更新（同步加载第一页，后续页在滚动时后台加载）"""
         try:
             search_text = self.search_bar.text()
-            history = self.clipboard_controller.get_history(
-                limit=100,
+            self._history_token += 1
+            history, self._history_cursor = self.clipboard_controller.get_history_page(
+                limit=self._page_size(),
                 search_text=search_text if search_text else None,
                 favorites_only=self.show_favorites_only
             )
-            self.history_list.update_items(history)
+            self.history_list.update_items(history, has_more=self._history_cursor is not None)
             
             count = self.clipboard_controller.get_count()
             self.status_bar.setText(f"共 {count} 条记录")
@@ -432,16 +442,59 @@ class MainWindow(QMainWindow):
         except Exception as e:
             logger.error(f"更新历史记录列表时发生错误: {str(e)}")
     
+    def _page_size(self) -> int:
+        """每页加载的记录数"""
+        return max(int(Settings.get("display_limit", 100)), 20)
+    
+    def _load_more_history(self):
+        """列表滚动到底部附近，后台加载下一页"""
+        if self._history_cursor is None:
+            self.history_list.append_items([], has_more=False)
+            return
+        search_text = self.search_bar.text()
+        self.clipboard_controller.request_history_page(
+            self._history_token,
+            limit=self._page_size(),
+            after=self._history_cursor,
+            search_text=search_text if search_text else None,
+            favorites_only=self.show_favorites_only
+        )
+    
+    def _on_page_loaded(self, token: int, items: list, next_cursor):
+        """后台分页结果返回"""
+        if token != self._history_token:
+            # 列表已刷新或搜索条件已变化，丢弃旧结果
+            return
+        self._history_cursor = next_cursor
+        self.history_list.append_items(items, has_more=next_cursor is not None)
+        logger.debug(f"已加载下一页，共 {len(items)} 项")
+    
     def _on_item_added(self, item):
-        """新项目添加时的处理"""
-        # 如果不在搜索模式，刷新列表
-        if not self.search_bar.text() and not self.show_favorites_only:
-            self._update_history()
+        """新项目添加时的处理：直接插入到列表中，不重新加载"""
+        # 搜索模式按相关度排序，不插入新项目
+        if not self.search_bar.text() and (item.is_favorite or not self.show_favorites_only):
+            self.history_list.insert_item(item)
         
         # 更新状态栏
         count = self.clipboard_controller.get_count()
         self.status_bar.setText(f"共 {count} 条记录 | 刚刚添加新内容")
     
+    def _on_items_removed(self, hashes: list):
+        """项目被删除、过期清理或超出上限淘汰时，只移除对应的行"""
+        self.history_list.remove_items(hashes)
+        count = self.clipboard_controller.get_count()
+        self.status_bar.setText(f"共 {count} 条记录")
+    
+    def _on_favorite_changed(self, content_hash: str, is_favorite: bool):
+        """收藏状态变化时，只更新对应的行"""
+        if self.show_favorites_only and not is_favorite:
+            self.history_list.remove_items([content_hash])
+            return
+        # 搜索结果按相关度排序，只更新星标不移动位置
+        self.history_list.update_item_favorite(
+            content_hash, is_favorite, keep_order=bool(self.search_bar.text())
+        )
+    
     def _on_search_changed(self, text: str):
         """搜索文本变化（使用独立的300ms防抖，避免每次按键都查询数据库）"""
         self._search_debounce.stop()
@@ -452,10 +505,14 @@ class MainWindow(QMainWindow):
         self.show_favorites_only = checked
         self._update_history()
     
-    def _handle_item_copy(self, item):
-        """处理项目复制与自动粘贴"""
+    def _handle_item_copy(self, row):
+        """处理项目复制与自动粘贴（列表行不含完整内容，复制前按哈希读取）"""
+        item = self.clipboard_controller.get_item(row.content_hash)
+        if item is None:
+            self.status_bar.setText("该记录已不存在")
+            return
         self.clipboard_controller.copy_item(item)
-        self.status_bar.setText(f"已复制: {item.preview_text(30)}")
+        self.status_bar.setText(f"已复制: {row.preview_text(30)}")
         
         # 隐藏窗口
         self.hide()
@@ -477,13 +534,11 @@ class MainWindow(QMainWindow):
     def _handle_item_delete(self, content_hash: str):
         """处理项目删除"""
         self.clipboard_controller.delete_item(content_hash)
-        self._update_history()
         self.status_bar.setText("已删除项目")
     
     def _handle_favorite_toggle(self, content_hash: str):
         """处理收藏切换"""
         self.clipboard_controller.toggle_favorite(content_hash)
-        self._update_history()
     
     def toggle_window_visibility(self):
         """切换窗口的显示和隐藏"""
@@ -512,19 +567,14 @@ class MainWindow(QMainWindow):
         if key in up_keys:
             next_row = current - 1 if current > 0 else count - 1
             self.history_list.setCurrentRow(next_row)
-            self.history_list.scrollToItem(self.history_list.item(next_row))
         elif key in down_keys:
             next_row = current + 1 if current < count - 1 else 0
             self.history_list.setCurrentRow(next_row)
-            self.history_list.scrollToItem(self.history_list.item(next_row))
         elif key in enter_keys:
             if current >= 0:
-                list_item = self.history_list.item(current)
-                if list_item:
-                    content_hash = list_item.data(Qt.ItemDataRole.UserRole)
-                    item = self.history_list._find_item_by_hash(content_hash)
-                    if item:
-                        self.history_list.itemCopied.emit(item)
+                item = self.history_list.item_at(current)
+                if item:
+                    self.history_list.itemCopied.emit(item)
                     
     def show_and_activate(self):
         """显示并激活窗口"""
@@ -634,7 +684,7 @@ class MainWindow(QMainWindow):
         try:
             self.prediction_engine.stop()
             self.hotkey_controller.unregister_all()
-            self.clipboard_controller.service.db.close()
+            self.clipboard_controller.service.shutdown()
             self.tray_icon.hide()
             app = QApplication.instance()
             if app:
@@ -712,7 +762,8 @@ class MainWindow(QMainWindow):
             # 更新设置
             max_history = Settings.get("max_history", 1000)
             retention_days = Settings.get("retention_days", 30)
-            self.clipboard_controller.update_settings(max_history, retention_days)
+            max_storage_mb = Settings.get("max_storage_mb", 0)
+            self.clipboard_controller.update_settings(max_history, retention_days, max_storage_mb)
 
             self._update_history()
             logger.info("已应用新设置")
@@ -725,12 +776,13 @@ class MainWindow(QMainWindow):
         try:
             self.prediction_engine.reload_settings()
             ai = Settings.get("ai", {})
-            if ai.get("enabled") and self.prediction_engine.is_available():
-                self.status_bar.setText("AI 智能预测已启用")
-            elif ai.get("enabled"):
-                self.status_bar.setText("AI 智能预测不可用：缺少键盘监听能力")
+            enabled = ai.get("enabled") or ai.get("offline_prediction")
+            if enabled and self.prediction_engine.is_available():
+                self.status_bar.setText("AI 智能预测已启用" if ai.get("enabled") else "离线预测已启用")
+            elif enabled:
+                self.status_bar.setText("智能预测不可用：缺少键盘监听能力")
             else:
-                self.status_bar.setText("AI 智能预测已关闭")
+                self.status_bar.setText("智能预测已关闭")
         except Exception as e:
             logger.error(f"应用AI设置时发生错误: {str(e)}")
     
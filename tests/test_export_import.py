@@ -0,0 +1,62 @@
+import os
+import sys
+from datetime import datetime, timedelta
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "src"))
+
+from models.clipboard_item import ClipboardItem, ContentType  # noqa: E402
+from services.clipboard_service import DatabaseManager  # noqa: E402
+
+
+def test_blob_url_text_round_trips_through_json(tmp_path):
+    base = datetime.now() - timedelta(minutes=1)
+    texts = ["blob:https://web.whatsapp.com/3f2a-11", "normal text"]
+    source = DatabaseManager(str(tmp_path / "source.db"))
+    for i, text in enumerate(texts):
+        assert source.add_item(ClipboardItem(content=text, timestamp=base + timedelta(seconds=i)))
+    image = ClipboardItem(content="", timestamp=base, content_type=ContentType.IMAGE,
+                          metadata={"format": "png"}, data=b"\x89PNG fake image bytes")
+    assert source.add_item(image)
+
+    export_path = str(tmp_path / "history.json")
+    assert source.export_to_json(export_path)
+
+    target = DatabaseManager(str(tmp_path / "target.db"))
+    assert target.import_from_json(export_path)
+    imported = target.get_items(limit=10)
+    contents = {item.content for item in imported if item.content_type == ContentType.TEXT}
+    assert contents == set(texts)
+    assert target.get_blob(image.content_hash) == image.data
+    # A blob URL is plain text: it must not count against the blob table
+    assert target.get_blob(ClipboardItem(content=texts[0], timestamp=base).content_hash) is None
+    source.close_all()
+    target.close_all()
+
+
+def test_reimport_keeps_use_count_and_reports_failures(tmp_path, monkeypatch):
+    db = DatabaseManager(str(tmp_path / "history.db"))
+    base = datetime.now() - timedelta(minutes=1)
+    items = [ClipboardItem(content=f"text {i}", timestamp=base + timedelta(seconds=i))
+             for i in range(3)]
+    db.add_items(items)
+    db.add_item(ClipboardItem(content="text 0", timestamp=datetime.now()))
+    export_path = str(tmp_path / "history.json")
+    assert db.export_to_json(export_path)
+
+    assert db.import_from_json(export_path)
+    counts = {item.content: item.use_count for item in db.get_items(limit=10)}
+    assert counts == {"text 0": 2, "text 1": 1, "text 2": 1}
+
+    target = DatabaseManager(str(tmp_path / "target.db"))
+    insert_item = DatabaseManager._insert_item
+
+    def failing_insert(self, cursor, item, upsert=True):
+        if item.content == "text 1":
+            raise ValueError("broken item")
+        return insert_item(self, cursor, item, upsert)
+
+    monkeypatch.setattr(DatabaseManager, "_insert_item", failing_insert)
+    assert not target.import_from_json(export_path)
+    assert {item.content for item in target.get_items(limit=10)} == {"text 0", "text 2"}
+    db.close_all()
+    target.close_all()
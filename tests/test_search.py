@@ -0,0 +1,27 @@
+import os
+import sys
+from datetime import datetime, timedelta
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "src"))
+
+from models.clipboard_item import ClipboardItem  # noqa: E402
+from services.clipboard_service import DatabaseManager  # noqa: E402
+
+
+def test_search_keeps_old_rows_among_many_matches(tmp_path):
+    db = DatabaseManager(str(tmp_path / "history.db"))
+    base = datetime.now() - timedelta(days=1)
+    old = ClipboardItem(content="config old snippet 公园", timestamp=base, is_favorite=True)
+    assert db.add_item(old)
+    db.add_items([ClipboardItem(content=f"config value {i} 公园", timestamp=base + timedelta(seconds=i + 1))
+                  for i in range(3000)])
+    # Copying the old snippet again keeps its id and only moves its timestamp
+    assert db.add_item(ClipboardItem(content=old.content, timestamp=datetime.now()))
+
+    for query in ("config", "snippet", "公园", "园"):
+        hashes = [item.content_hash for item in db.get_items(limit=5000, search_text=query)]
+        assert old.content_hash in hashes, query
+        favorites = db.get_items(limit=10, search_text=query, favorites_only=True)
+        assert [item.content_hash for item in favorites] == [old.content_hash], query
+    assert len(db.get_items(limit=5000, search_text="config")) == 3001
+    db.close_all()
@@ -0,0 +1,138 @@
+"""Compare content codecs on clipboard-sized texts, one row at a time.
+
+Reports the compression ratio and encode/decode throughput of the legacy
+gzip path, zlib and (if zstandard is installed) zstd with and without a
+dictionary. The dictionary is trained on half of the samples and measured on
+the other half, the way it is trained on existing history and then used for
+new captures.
+
+Samples come from an existing history database (``--db``, e.g. the
+``clipboard.db`` in the data directory) or from a synthetic mix of URLs,
+paths and code snippets.
+
+    python tools/codec_benchmark.py [--db PATH] [--rows 4000] [--threshold 32]
+"""
+
+import argparse
+import gzip
+import os
+import random
+import sqlite3
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "src"))
+
+from services.content_codec import CODEC_NONE, ContentCodec, zstd_available  # noqa: E402
+
+
+def synthetic_samples(count):
+    rng = random.Random(42)
+    words = ["config", "user", "item", "history", "render", "value", "index", "buffer"]
+    samples = []
+    for i in range(count):
+        kind = i % 4
+        if kind == 0:
+            samples.append(f"https://github.com/{rng.choice(words)}/{rng.choice(words)}-"
+                           f"{rng.randint(1, 999)}/blob/main/src/{rng.choice(words)}.py#L{i}")
+        elif kind == 1:
+            samples.append(f"C:\\Users\\dev\\Projects\\{rng.choice(words)}\\src\\"
+                           f"{rng.choice(words)}_{rng.randint(1, 99)}.py")
+        elif kind == 2:
+            name = f"{rng.choice(words)}_{rng.choice(words)}"
+            samples.append(f"def {name}(self, {rng.choice(words)}):\n"
+                           f"    return self.{rng.choice(words)}.get({rng.choice(words)}, None)\n")
+        else:
+            samples.append(" ".join(rng.choice(words) for _ in range(rng.randint(5, 60))))
+    return samples
+
+
+def database_samples(path, count):
+    codec = ContentCodec()
+    conn = sqlite3.connect(f"file:{path}?mode=ro", uri=True)
+    # Rows compressed with a trained dictionary need it to decode
+    has_dictionaries = conn.execute(
+        "SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'codec_dictionaries'"
+    ).fetchone()
+    if has_dictionaries:
+        for dict_id, data in conn.execute("SELECT dict_id, data FROM codec_dictionaries"):
+            codec.load_dictionary(dict_id, data, activate=False)
+    rows = conn.execute(
+        "SELECT content, compressed FROM clipboard_history "
+        "WHERE content_type IN ('text', 'html') ORDER BY id DESC LIMIT ?", (count,)
+    ).fetchall()
+    conn.close()
+    return [codec.decode(content, compressed) for content, compressed in rows]
+
+
+class GzipCodec:
+    """The pre-codec behaviour: gzip texts over 1000 characters."""
+
+    def encode(self, text):
+        if len(text) > 1000:
+            return gzip.compress(text.encode("utf-8")), 1
+        return text, CODEC_NONE
+
+    def decode(self, value, codec):
+        return gzip.decompress(value).decode("utf-8") if codec else value
+
+
+def measure(name, codec, samples):
+    raw_bytes = sum(len(text.encode("utf-8")) for text in samples)
+
+    start = time.perf_counter()
+    encoded = [codec.encode(text) for text in samples]
+    encode_time = time.perf_counter() - start
+
+    start = time.perf_counter()
+    for value, codec_id in encoded:
+        codec.decode(value, codec_id)
+    decode_time = time.perf_counter() - start
+
+    stored = sum(len(value) if codec_id else len(value.encode("utf-8"))
+                 for value, codec_id in encoded)
+    compressed_rows = sum(1 for _, codec_id in encoded if codec_id)
+    mb = raw_bytes / (1024 * 1024)
+    print(f"  {name:<24} ratio={raw_bytes / max(stored, 1):6.2f}x  "
+          f"stored={stored / 1024:9.1f} KiB  compressed rows={compressed_rows:5d}  "
+          f"encode={mb / max(encode_time, 1e-9):8.1f} MB/s  "
+          f"decode={mb / max(decode_time, 1e-9):8.1f} MB/s")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--db", help="history database to sample texts from")
+    parser.add_argument("--rows", type=int, default=4000)
+    parser.add_argument("--threshold", type=int, default=32,
+                        help="minimum size in bytes before a text is compressed")
+    args = parser.parse_args()
+
+    samples = database_samples(args.db, args.rows) if args.db else synthetic_samples(args.rows)
+    if len(samples) < 2:
+        print("Not enough text samples")
+        return
+    train, test = samples[::2], samples[1::2]
+    raw_bytes = sum(len(text.encode("utf-8")) for text in test)
+    print(f"{len(test)} samples, {raw_bytes / 1024:.1f} KiB, "
+          f"mean {raw_bytes / len(test):.0f} bytes per row")
+
+    measure("gzip > 1000 chars (old)", GzipCodec(), test)
+    for level in (1, 6, 9):
+        measure(f"zlib level {level}", ContentCodec("zlib", level, args.threshold), test)
+
+    if not zstd_available():
+        print("  zstandard is not installed; zstd results skipped")
+        return
+    for level in (1, 3, 9):
+        measure(f"zstd level {level}", ContentCodec("zstd", level, args.threshold), test)
+        codec = ContentCodec("zstd", level, args.threshold)
+        trained = codec.train([text.encode("utf-8") for text in train])
+        if trained is None:
+            print("  not enough samples to train a dictionary")
+            continue
+        codec.load_dictionary(*trained)
+        measure(f"zstd level {level} + dict", codec, test)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,121 @@
+"""Measure SQLite insert/read latency of the history store.
+
+Runs the same workload against a plain rollback-journal connection
+(``tuned=False``, the old behaviour) and the WAL + tuned PRAGMA connection
+(``tuned=True``), each on a fresh temporary database.
+
+    python tools/db_benchmark.py [--rows 2000] [--reads 200]
+"""
+
+import argparse
+import os
+import statistics
+import sys
+import tempfile
+import threading
+import time
+from datetime import datetime, timedelta
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "src"))
+
+from models.clipboard_item import ClipboardItem, ContentType  # noqa: E402
+from services.clipboard_service import DatabaseManager  # noqa: E402
+
+
+def make_items(count, tag=""):
+    base = datetime.now() - timedelta(days=1)
+    items = []
+    for i in range(count):
+        if i % 10 == 0:
+            content = f"def function_{i}{tag}(x):\n    return x * {i}\n" * 40
+        else:
+            content = f"https://example.com/path/{i}?q=item-{i}{tag}"
+        items.append(ClipboardItem(
+            content=content,
+            timestamp=base + timedelta(seconds=i),
+            content_type=ContentType.TEXT,
+            metadata={"source": {"app_name": "bench", "domain": "example.com"}},
+        ))
+    return items
+
+
+def percentile(samples, pct):
+    ordered = sorted(samples)
+    index = min(len(ordered) - 1, int(len(ordered) * pct / 100))
+    return ordered[index]
+
+
+def summarize(name, samples):
+    ms = [s * 1000 for s in samples]
+    print(f"  {name:<28} mean={statistics.mean(ms):8.3f} ms  "
+          f"p50={percentile(ms, 50):8.3f} ms  p99={percentile(ms, 99):8.3f} ms")
+
+
+def run(tuned, rows, reads):
+    with tempfile.TemporaryDirectory() as tmp:
+        db = DatabaseManager(os.path.join(tmp, "bench.db"), tuned=tuned)
+        items = make_items(rows)
+
+        # One commit per capture (the old synchronous path)
+        single = []
+        for item in items[: rows // 2]:
+            start = time.perf_counter()
+            db.add_item(item)
+            single.append(time.perf_counter() - start)
+
+        # Batched commits (the writer thread path)
+        batched = []
+        rest = items[rows // 2:]
+        for i in range(0, len(rest), 50):
+            batch = rest[i:i + 50]
+            start = time.perf_counter()
+            db.add_items(batch)
+            batched.append((time.perf_counter() - start) / len(batch))
+
+        read = []
+        for _ in range(reads):
+            start = time.perf_counter()
+            db.get_items(limit=100)
+            read.append(time.perf_counter() - start)
+
+        # Reads on a second thread while this thread keeps writing
+        concurrent = []
+        stop = threading.Event()
+
+        def reader():
+            while not stop.is_set():
+                start = time.perf_counter()
+                db.get_items(limit=100)
+                concurrent.append(time.perf_counter() - start)
+            db.close()
+
+        thread = threading.Thread(target=reader)
+        thread.start()
+        for item in make_items(200, tag="-concurrent"):
+            db.add_item(item)
+        stop.set()
+        thread.join()
+
+        db.close_all()
+
+    label = "WAL + tuned pragmas" if tuned else "rollback journal (default)"
+    print(f"\n{label}")
+    summarize("insert, commit per item", single)
+    summarize("insert, batched (per item)", batched)
+    summarize("read 100 rows", read)
+    if concurrent:
+        summarize("read 100 rows during writes", concurrent)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--rows", type=int, default=2000)
+    parser.add_argument("--reads", type=int, default=200)
+    args = parser.parse_args()
+
+    run(False, args.rows, args.reads)
+    run(True, args.rows, args.reads)
+
+
+if __name__ == "__main__":
+    main()